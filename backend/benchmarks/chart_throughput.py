@@ -0,0 +1,140 @@
+# Charts/sec for one /generate-charts call: the previous renderer (pyplot,
+# radar + bar chart per job, sequential) vs the current one (bar chart once
+# per attempt, radar charts through the process pool). No Firestore needed.
+# Run from backend/: python -m benchmarks.chart_throughput [--jobs 10]
+#   [--skills 8] [--repeats 3] [--workers 4]
+
+import argparse
+import base64
+import io
+import os
+import time
+
+import numpy as np
+
+
+def legacy_radar_chart(skills, user_level, required_level):
+    """The pyplot renderer as it was before the Figure API rewrite."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    angles = np.linspace(0, 2 * np.pi, len(skills), endpoint=False).tolist()
+    user_level_radar = user_level + user_level[:1]
+    required_level_radar = required_level + required_level[:1]
+    angles += angles[:1]
+
+    plt.figure(figsize=(6, 6))
+    ax = plt.subplot(111, polar=True)
+    ax.plot(angles, user_level_radar, label="Your Level", color="#F7A8A8")
+    ax.fill(angles, user_level_radar, color="#F7A8A8", alpha=0.25)
+    ax.plot(
+        angles,
+        required_level_radar,
+        label="Required Level",
+        color="#A8D0F7",
+        linestyle="dashed",
+    )
+    ax.fill(angles, required_level_radar, color="#A8D0F7", alpha=0.1)
+    ax.set_xticks(angles[:-1])
+    ax.set_xticklabels(skills)
+    ax.set_yticks([0, 1, 2, 3])
+    ax.set_yticklabels(["Not Detected", "Basic", "Intermediate", "Advanced"])
+    ax.set_title("Skill Gap Analysis", size=12)
+    ax.legend(loc="upper right")
+
+    buf = io.BytesIO()
+    plt.savefig(buf, format="png", dpi=300, bbox_inches="tight")
+    plt.close()
+    return base64.b64encode(buf.getvalue()).decode("utf-8")
+
+
+def legacy_bar_chart(data):
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(4, 4))
+    bars = plt.bar(list(data), list(data.values()), color=["#A8D0F7", "#F7A8A8"])
+    plt.title("Overall Test Performance")
+    plt.xlabel("Result")
+    plt.ylabel("Number of Questions")
+    plt.ylim(0, max(data.values()) + 1)
+    for bar, value in zip(bars, data.values()):
+        plt.text(bar.get_x() + bar.get_width() / 2, bar.get_height() + 0.1, value)
+
+    buf = io.BytesIO()
+    plt.savefig(buf, format="png", dpi=300, bbox_inches="tight")
+    plt.close()
+    return base64.b64encode(buf.getvalue()).decode("utf-8")
+
+
+def make_jobs(n_jobs: int, n_skills: int):
+    rng = np.random.default_rng(0)
+    return [
+        (
+            [f"Skill {j}-{k}" for k in range(n_skills)],
+            rng.integers(0, 4, n_skills).tolist(),
+            rng.integers(1, 4, n_skills).tolist(),
+        )
+        for j in range(n_jobs)
+    ]
+
+
+def run_legacy(jobs, performance):
+    return [(legacy_radar_chart(*job), legacy_bar_chart(performance)) for job in jobs]
+
+
+def run_current(jobs, performance):
+    from services.chart_rendering import bar_chart_png
+    from services.charts_generation_service import render_radar_charts
+
+    result_chart = bar_chart_png(performance)
+    return [(radar, result_chart) for radar in render_radar_charts(jobs)]
+
+
+def charts_per_sec(fn, jobs, performance, repeats: int):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        charts = fn(jobs, performance)
+        samples.append(time.perf_counter() - start)
+    # charts delivered to the client: one radar + one result chart per job
+    return 2 * len(charts) / float(np.median(samples)), float(np.median(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=10)
+    parser.add_argument("--skills", type=int, default=8)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.workers is not None:
+        # read by charts_generation_service at import time
+        os.environ["CHART_RENDER_WORKERS"] = str(args.workers)
+    from services import charts_generation_service
+
+    jobs = make_jobs(args.jobs, args.skills)
+    performance = {"Correct": 7, "Incorrect": 3}
+
+    # warm-up: matplotlib import, font cache and pool start-up
+    run_legacy(jobs[:1], performance)
+    run_current(jobs[:2], performance)
+
+    print(
+        f"jobs={args.jobs} skills={args.skills} "
+        f"workers={charts_generation_service.CHART_RENDER_WORKERS} "
+        f"cpus={os.cpu_count()}"
+    )
+    print(f"{'renderer':>10}{'charts/s':>12}{'call s':>10}")
+    for name, fn in (("legacy", run_legacy), ("current", run_current)):
+        rate, seconds = charts_per_sec(fn, jobs, performance, args.repeats)
+        print(f"{name:>10}{rate:>12.2f}{seconds:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# Throughput benchmark for core.model_loader.get_embeddings_batch.
+# Run from backend/:  python -m benchmarks.embedding_throughput [--samples 256]
+
+import argparse
+import glob
+import time
+
+import pandas as pd
+
+import core.model_loader as loader
+
+
+def load_descriptions(limit: int):
+    dfs = [pd.read_csv(f) for f in glob.glob("data/*.csv")]
+    df = pd.concat(dfs, ignore_index=True)
+    texts = df["Full Job Description"].astype(str).tolist()
+    return texts[:limit]
+
+
+def run_single(texts):
+    start = time.perf_counter()
+    for text in texts:
+        loader.get_embeddings(text)
+    return len(texts) / (time.perf_counter() - start)
+
+
+def run_batched(texts, batch_size: int):
+    start = time.perf_counter()
+    loader.get_embeddings_batch(texts, batch_size=batch_size)
+    return len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=256)
+    parser.add_argument("--batch-sizes", default="1,8,16,32,64,128")
+    args = parser.parse_args()
+
+    loader.load_embedding_model()
+    texts = load_descriptions(args.samples)
+
+    # warm up kernels and the tokenizer before timing
+    loader.get_embeddings_batch(texts[:8])
+
+    print(f"{len(texts)} job descriptions")
+    print(f"{'mode':<16}{'texts/sec':>12}")
+    print(f"{'one-by-one':<16}{run_single(texts):>12.1f}")
+    for size in (int(s) for s in args.batch_sizes.split(",")):
+        print(f"{'batch=' + str(size):<16}{run_batched(texts, size):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# Gap analysis of one user against N jobs: the previous per-job dict loops
+# vs core.gap_engine's single vectorized pass. Checks both give identical
+# results first. Times the computation only (no Firestore needed) and lists
+# the Firestore round trips each path makes: the old path read the profile
+# and wrote the result once per job; the engine reads once and writes in
+# batches of FIRESTORE_BATCH_LIMIT.
+# Run from backend/: python -m benchmarks.gap_analysis_throughput
+#   [--jobs 10,100,500,1000] [--skills 12] [--vocab 400] [--repeats 5]
+
+import argparse
+import time
+
+import numpy as np
+
+from core.gap_engine import LEVEL_ORDER, batch_gap_analysis
+
+LEVELS = list(LEVEL_ORDER)
+FIRESTORE_BATCH_LIMIT = 500  # models.firestore_models, Firestore's batch cap
+
+
+def legacy_gap_analysis(user_data, job_data):
+    """compare_and_save's comparison loops as they were before the engine."""
+    gap_analysis = {"skills": {}, "knowledge": {}}
+    for section, job_field in (
+        ("skills", "required_skills"),
+        ("knowledge", "required_knowledge"),
+    ):
+        user_levels = user_data.get(section, {})
+        for name, req_level in job_data.get(job_field, {}).items():
+            user_level = user_levels.get(name, "Not Provided")
+            if user_level == "Not Provided":
+                status = "Missing"
+            elif LEVEL_ORDER[user_level] >= LEVEL_ORDER[req_level]:
+                status = "Achieved"
+            else:
+                status = "Weak"
+            gap_analysis[section][name] = {
+                "required_level": req_level,
+                "user_level": user_level,
+                "status": status,
+            }
+    return gap_analysis
+
+
+def make_data(n_jobs: int, per_job: int, vocab: int, rng):
+    names = [f"Item {i}" for i in range(vocab)]
+
+    def levels(k, allow_missing):
+        picked = rng.choice(vocab, size=k, replace=False)
+        low = 0 if allow_missing else 1
+        return {names[i]: LEVELS[rng.integers(low, 4)] for i in picked}
+
+    user_data = {
+        "skills": levels(vocab // 3, True),
+        "knowledge": levels(vocab // 3, True),
+    }
+    jobs = [
+        {
+            "job_index": str(j),
+            "required_skills": levels(per_job, False),
+            "required_knowledge": levels(per_job, False),
+        }
+        for j in range(n_jobs)
+    ]
+    return user_data, jobs
+
+
+def time_ms(fn, repeats: int):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", default="10,100,500,1000")
+    parser.add_argument("--skills", type=int, default=12)
+    parser.add_argument("--vocab", type=int, default=400)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(
+        f"{'jobs':>6}{'legacy ms':>12}{'engine ms':>12}{'speedup':>10}"
+        f"{'legacy trips':>14}{'engine trips':>14}"
+    )
+    for n_jobs in (int(n) for n in args.jobs.split(",")):
+        user_data, jobs = make_data(n_jobs, args.skills, args.vocab, rng)
+
+        legacy = [legacy_gap_analysis(user_data, job) for job in jobs]
+        assert batch_gap_analysis(user_data, jobs) == legacy
+
+        legacy_ms = time_ms(
+            lambda: [legacy_gap_analysis(user_data, job) for job in jobs],
+            args.repeats,
+        )
+        engine_ms = time_ms(lambda: batch_gap_analysis(user_data, jobs), args.repeats)
+        engine_trips = 1 + -(-n_jobs // FIRESTORE_BATCH_LIMIT)
+        print(
+            f"{n_jobs:>6}{legacy_ms:>12.2f}{engine_ms:>12.2f}"
+            f"{legacy_ms / engine_ms:>9.2f}x{2 * n_jobs:>14}{engine_trips:>14}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Import-time profile of the API entry point.
+# Run from backend/:  python -m benchmarks.import_time [--module main] [--top 15]
+# Exits non-zero when a heavy library is pulled in at import time; those must
+# only load on first use (model startup thread, first LLM call, first chart).
+
+import argparse
+import subprocess
+import sys
+
+HEAVY_MODULES = (
+    "torch",
+    "transformers",
+    "pandas",
+    "matplotlib",
+    "langchain_core",
+    "langchain_groq",
+    "langchain_classic",
+    "groq",
+    "pinecone",
+)
+
+
+def profile_import(module: str):
+    """Return [(cumulative_us, module_name)] from python -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        tail = "\n".join(result.stderr.strip().splitlines()[-5:])
+        raise SystemExit(f"import {module} failed:\n{tail}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        entries.append((int(cumulative), name.strip()))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    entries = profile_import(args.module)
+    total = next((us for us, name in entries if name == args.module), 0)
+    print(f"import {args.module}: {total / 1000:.1f} ms")
+    print(f"{'cumulative ms':>14}  module")
+    top_level = [(us, name) for us, name in entries if "." not in name]
+    for us, name in sorted(top_level, reverse=True)[: args.top]:
+        print(f"{us / 1000:>14.1f}  {name}")
+
+    loaded = {name.split(".")[0] for _, name in entries}
+    eager = [m for m in HEAVY_MODULES if m in loaded]
+    if eager:
+        print(f"\n[FAIL] imported at startup: {', '.join(eager)}")
+        sys.exit(1)
+    print("\n[OK] no heavy libraries imported at startup")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# Cost of fetching one user's job match: the old full-collection scan vs the
+# user-scoped get_job_by_index, as the number of recommendations grows.
+# Run from backend/ against the Firestore emulator only (it seeds data):
+#   FIRESTORE_EMULATOR_HOST=localhost:8080 python -m benchmarks.job_lookup_cost
+#   [--sizes 100,1000,10000] [--lookups 20]
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+if not os.getenv("FIRESTORE_EMULATOR_HOST"):
+    sys.exit("Set FIRESTORE_EMULATOR_HOST; this benchmark writes seed data.")
+
+from core.database import db
+from models.firestore_models import (
+    commit_writes,
+    get_job_by_index,
+    get_recommendation_id_by_user_test_id,
+)
+
+COLLECTION = "career_recommendations"
+
+
+def seed(start: int, stop: int):
+    """Recommendations bench_user_{i} with job matches "0", "1", "2"."""
+    writes = []
+    for i in range(start, stop):
+        rec_ref = db.collection(COLLECTION).document(f"bench_rec_{i}")
+        writes.append((rec_ref, {"user_test_id": f"bench_user_{i}"}))
+        for job_index in ("0", "1", "2"):
+            writes.append(
+                (
+                    rec_ref.collection("job_matches").document(job_index),
+                    {"job_title": f"Job {job_index} of user {i}"},
+                )
+            )
+    result = commit_writes(writes)
+    if result["failed"]:
+        sys.exit(f"Seeding failed for {len(result['failed'])} documents")
+
+
+def legacy_get_job_by_index(job_index: str, user_test_id: str):
+    """
+    The previous scan over every recommendation. It returned the first hit,
+    usually another user's job; to find this user's job it has to keep
+    going until it reaches their recommendation.
+    """
+    reads = 0
+    for rec in db.collection(COLLECTION).stream():
+        reads += 1
+        job_doc = (
+            db.collection(COLLECTION)
+            .document(rec.id)
+            .collection("job_matches")
+            .document(job_index)
+            .get()
+        )
+        reads += 1
+        if job_doc.exists and rec.to_dict().get("user_test_id") == user_test_id:
+            return job_doc.to_dict(), reads
+    return None, reads
+
+
+def time_ms(fn, repeats: int):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--lookups", type=int, default=20)
+    args = parser.parse_args()
+    sizes = sorted(int(s) for s in args.sizes.split(","))
+
+    print(
+        f"{'recommendations':>16}{'scan ms':>12}{'scan reads':>12}"
+        f"{'scoped ms':>12}{'scoped+rec ms':>15}"
+    )
+    seeded = 0
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        seed(seeded, size)
+        seeded = size
+
+        users = [f"bench_user_{i}" for i in rng.integers(0, size, args.lookups)]
+        scan_users = users[: max(1, args.lookups // 10)]
+        reads = np.mean([legacy_get_job_by_index("2", u)[1] for u in scan_users])
+        it = iter(scan_users)
+        scan_ms = time_ms(
+            lambda: legacy_get_job_by_index("2", next(it)), len(scan_users)
+        )
+
+        rec_ids = {u: get_recommendation_id_by_user_test_id(u) for u in users}
+        it = iter(users)
+
+        def scoped():
+            u = next(it)
+            job = get_job_by_index("2", u, rec_id=rec_ids[u])
+            assert job and job["job_title"].endswith(f"user {u.rsplit('_', 1)[1]}")
+
+        scoped_ms = time_ms(scoped, len(users))
+        it = iter(users)
+        with_rec_ms = time_ms(lambda: get_job_by_index("2", next(it)), len(users))
+        print(
+            f"{size:>16}{scan_ms:>12.1f}{reads:>12.0f}{scoped_ms:>12.2f}{with_rec_ms:>15.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# Latency of a top-3 job query: local index (each quantization) vs Pinecone.
+# Run from backend/:  python -m benchmarks.job_match_latency [--jobs 3000]
+# Uses the job store in data/ when present, otherwise random unit vectors.
+# Pinecone is measured only when PINECONE_API_KEY is set.
+
+import argparse
+import time
+
+import numpy as np
+
+from core import job_store
+from core.model_loader import HF_MODEL_NAME
+from core.vector_index import QUANTIZATION_MODES, LocalVectorIndex
+
+
+def load_matrix(num_jobs: int, dim: int):
+    store = job_store.load_job_store("data", HF_MODEL_NAME)
+    if store is not None:
+        return np.asarray(store[0]), "data/job_embeddings.npy"
+    rng = np.random.default_rng(0)
+    return job_store.normalize_rows(rng.standard_normal((num_jobs, dim))), "random"
+
+
+def percentiles(samples):
+    ms = np.array(samples) * 1000
+    return np.percentile(ms, 50), np.percentile(ms, 99)
+
+
+def time_queries(query_fn, queries):
+    samples = []
+    for q in queries:
+        start = time.perf_counter()
+        query_fn(q)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=3000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--pinecone-queries", type=int, default=20)
+    args = parser.parse_args()
+
+    matrix, source = load_matrix(args.jobs, args.dim)
+    rng = np.random.default_rng(1)
+    queries = rng.standard_normal((args.queries, matrix.shape[1])).astype(np.float32)
+    ids = [str(i) for i in range(len(matrix))]
+    metadata = [{} for _ in ids]
+
+    print(f"{len(matrix)} jobs x {matrix.shape[1]} dims ({source})")
+    print(f"{'engine':<20}{'p50 ms':>10}{'p99 ms':>10}{'index MB':>10}")
+
+    exact = LocalVectorIndex(matrix, ids, metadata)
+    for mode in QUANTIZATION_MODES:
+        index = LocalVectorIndex(matrix, ids, metadata, quantization=mode)
+        p50, p99 = time_queries(lambda q: index.query(q, top_k=3), queries)
+        recall = np.mean(
+            [
+                len(
+                    {m["id"] for m in index.query(q, 3)}
+                    & {m["id"] for m in exact.query(q, 3)}
+                )
+                / 3
+                for q in queries[:50]
+            ]
+        )
+        print(
+            f"{'local-' + mode:<20}{p50:>10.3f}{p99:>10.3f}{index.nbytes / 1e6:>10.2f}"
+            f"   recall@3={recall:.2f}"
+        )
+
+    from services.pinecone_service import PineconeService
+
+    service = PineconeService(index_name="code-map")
+    if service.initialized and service.index is not None:
+        p50, p99 = time_queries(
+            lambda q: service.query_similar_jobs(q.tolist(), top_k=3),
+            queries[: args.pinecone_queries],
+        )
+        print(f"{'pinecone':<20}{p50:>10.3f}{p99:>10.3f}{'-':>10}")
+    else:
+        print("pinecone: skipped (PINECONE_API_KEY not set or index unavailable)")
+
+
+if __name__ == "__main__":
+    main()
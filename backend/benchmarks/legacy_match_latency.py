@@ -0,0 +1,71 @@
+# Per-query latency of the legacy local matcher's ranking step.
+# Compares the old path (full argsort + df.iloc title dedup) with
+# top_k_unique over precomputed title ids at several corpus sizes.
+# Run from backend/:  python -m benchmarks.legacy_match_latency
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.job_store import normalize_rows
+from core.vector_index import top_k_unique
+
+
+def argsort_iloc(similarities, df, top_n=3):
+    sorted_indices = np.argsort(similarities)[::-1]
+    seen_titles = set()
+    unique_indices = []
+    for idx in sorted_indices:
+        title = df.iloc[idx].get("Title", "N/A")
+        if title not in seen_titles:
+            seen_titles.add(title)
+            unique_indices.append(idx)
+        if len(unique_indices) >= top_n:
+            break
+    return unique_indices
+
+
+def make_corpus(num_jobs: int, dim: int, rng):
+    # few distinct titles with heavy repetition, like the jobstreet CSVs
+    num_titles = max(num_jobs // 60, 3)
+    title_ids = rng.zipf(1.3, num_jobs) % num_titles
+    df = pd.DataFrame({"Title": [f"Title {t}" for t in title_ids]})
+    matrix = normalize_rows(rng.standard_normal((num_jobs, dim)))
+    ids = pd.factorize(df["Title"])[0].astype(np.int32)
+    return matrix, df, ids
+
+
+def measure(fn, queries):
+    samples = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(q)
+        samples.append(time.perf_counter() - start)
+    ms = np.array(samples) * 1000
+    return np.percentile(ms, 50), np.percentile(ms, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="3000,30000,300000")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'jobs':>8}  {'method':<22}{'p50 ms':>10}{'p99 ms':>10}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        matrix, df, title_ids = make_corpus(size, args.dim, rng)
+        queries = normalize_rows(rng.standard_normal((args.queries, args.dim)))
+
+        old = measure(lambda q: argsort_iloc(matrix @ q, df), queries)
+        new = measure(lambda q: top_k_unique(matrix @ q, title_ids, 3), queries)
+
+        print(f"{size:>8}  {'argsort + df.iloc':<22}{old[0]:>10.3f}{old[1]:>10.3f}")
+        print(f"{size:>8}  {'argpartition + ids':<22}{new[0]:>10.3f}{new[1]:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
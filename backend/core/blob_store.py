@@ -0,0 +1,138 @@
+# core/blob_store.py
+# Content-addressed blob store: sha256(bytes) -> bytes. Identical blobs are
+# stored once, and a hash never changes meaning, so readers can cache forever.
+# LocalBlobStore keeps files under BLOB_STORE_DIR; object storage plugs in by
+# subclassing BlobStore and registering it in BLOB_STORE_BACKENDS.
+
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BLOB_STORE_BACKEND = os.getenv("BLOB_STORE_BACKEND", "local")
+BLOB_STORE_DIR = os.path.join(BASE_DIR, os.getenv("BLOB_STORE_DIR", "data/blobs"))
+CHUNK_SIZE = 64 * 1024
+
+
+def blob_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def is_blob_hash(value) -> bool:
+    return (
+        isinstance(value, str)
+        and len(value) == 64
+        and all(c in "0123456789abcdef" for c in value)
+    )
+
+
+def png_size(data: bytes) -> Tuple[int, int]:
+    """(width, height) from the IHDR chunk of a PNG."""
+    if data[:8] != b"\x89PNG\r\n\x1a\n" or data[12:16] != b"IHDR":
+        raise ValueError("Not a PNG image")
+    return struct.unpack(">II", data[16:24])
+
+
+class BlobStore(ABC):
+    """
+    Interface for blob backends; a backend missing any abstract method fails
+    at instantiation. put() must be idempotent: storing bytes that are already
+    present returns the same hash without rewriting them.
+    """
+
+    @abstractmethod
+    def put(self, data: bytes) -> str:
+        """Store the bytes and return their hash."""
+
+    @abstractmethod
+    def exists(self, digest: str) -> bool:
+        """Whether the blob is stored."""
+
+    @abstractmethod
+    def size(self, digest: str) -> Optional[int]:
+        """Size in bytes, or None if the blob does not exist."""
+
+    @abstractmethod
+    def iter_chunks(self, digest: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """Stream the blob; raises KeyError if it does not exist."""
+
+    def get(self, digest: str) -> bytes:
+        return b"".join(self.iter_chunks(digest))
+
+
+class LocalBlobStore(BlobStore):
+    """Files at root/<first 2 hex chars>/<hash>, written atomically."""
+
+    def __init__(self, root: str = BLOB_STORE_DIR):
+        self.root = root
+
+    def path(self, digest: str) -> str:
+        if not is_blob_hash(digest):
+            raise KeyError(digest)
+        return os.path.join(self.root, digest[:2], digest)
+
+    def put(self, data: bytes) -> str:
+        digest = blob_hash(data)
+        path = self.path(digest)
+        if os.path.exists(path):
+            return digest
+        folder = os.path.dirname(path)
+        os.makedirs(folder, exist_ok=True)
+        # unique tmp name: concurrent writers of the same blob must not collide
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return digest
+
+    def exists(self, digest: str) -> bool:
+        try:
+            return os.path.exists(self.path(digest))
+        except KeyError:
+            return False
+
+    def size(self, digest: str) -> Optional[int]:
+        try:
+            return os.path.getsize(self.path(digest))
+        except (KeyError, OSError):
+            return None
+
+    def iter_chunks(self, digest: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        try:
+            f = open(self.path(digest), "rb")
+        except FileNotFoundError:
+            raise KeyError(digest)
+        with f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+
+BLOB_STORE_BACKENDS: Dict[str, type] = {"local": LocalBlobStore}
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = BLOB_STORE_BACKENDS[BLOB_STORE_BACKEND]()
+    return _store
@@ -0,0 +1,121 @@
+# core/embedding_cache.py
+# Content-addressed embedding cache: sha1(model name + normalized text) -> vector.
+# Lets startup and the Pinecone uploader embed only new or changed descriptions.
+
+import hashlib
+import os
+from typing import Callable, Dict, Iterable, List
+
+import numpy as np
+
+from core.job_store import normalize_rows, write_temp
+
+CACHE_FILE = "embedding_cache.npz"
+
+
+class EmbeddingCache:
+    """
+    On-disk map of content key -> L2-normalized float32 vector.
+    hits/misses count lookups made through embed(); removed counts
+    entries dropped by retain().
+    """
+
+    def __init__(self, folder: str, model_name: str):
+        self.path = os.path.join(folder, CACHE_FILE)
+        self.model_name = model_name
+        self._vectors: Dict[str, np.ndarray] = {}
+        self.hits = 0
+        self.misses = 0
+        self.removed = 0
+        self.dirty = False
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._vectors
+
+    def key(self, text) -> str:
+        normalized = " ".join(str(text).split())
+        return hashlib.sha1(f"{self.model_name}\n{normalized}".encode()).hexdigest()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                keys, vectors = data["keys"], data["vectors"]
+            self._vectors = {str(k): v for k, v in zip(keys, vectors)}
+        except Exception as e:
+            print(f"Error loading embedding cache, starting empty: {e}")
+            self._vectors = {}
+
+    def seed(self, keys: List[str], matrix):
+        """Add vectors for keys that are not cached yet (no hit/miss accounting)."""
+        matrix = normalize_rows(matrix)
+        for key, vector in zip(keys, matrix):
+            if key and key not in self._vectors:
+                self._vectors[key] = vector
+                self.dirty = True
+
+    def embed(
+        self, texts: List[str], embed_fn: Callable[[List[str]], np.ndarray]
+    ) -> np.ndarray:
+        """
+        Return normalized vectors for texts, calling embed_fn only for the
+        texts whose key is not cached.
+        """
+        keys = [self.key(t) for t in texts]
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key in self._vectors:
+                self.hits += 1
+            elif key not in missing:
+                self.misses += 1
+                missing[key] = text
+            else:
+                self.hits += 1
+
+        if missing:
+            print(f"Embedding {len(missing)} new or changed descriptions...")
+            vectors = normalize_rows(embed_fn(list(missing.values())))
+            self._vectors.update(zip(missing.keys(), vectors))
+            self.dirty = True
+
+        if not keys:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack([self._vectors[k] for k in keys])
+
+    def retain(self, keys: Iterable[str]) -> int:
+        """Garbage-collect entries whose job no longer exists."""
+        live = set(keys)
+        stale = [k for k in self._vectors if k not in live]
+        for k in stale:
+            del self._vectors[k]
+        if stale:
+            self.removed += len(stale)
+            self.dirty = True
+        return len(stale)
+
+    def save(self):
+        if not self.dirty:
+            return
+        keys = np.array(list(self._vectors.keys()), dtype="U40")
+        vectors = (
+            np.stack(list(self._vectors.values()))
+            if self._vectors
+            else np.empty((0, 0), dtype=np.float32)
+        )
+        tmp_path = write_temp(
+            os.path.dirname(self.path),
+            lambda f: np.savez(f, keys=keys, vectors=vectors.astype(np.float32)),
+        )
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def stats(self) -> str:
+        return (
+            f"embedding cache: {self.hits} hits, {self.misses} misses, "
+            f"{self.removed} removed, {len(self)} entries"
+        )
@@ -0,0 +1,102 @@
+# core/gap_engine.py
+# Batch skill/knowledge gap analysis: one user against many jobs in a single
+# pass. Requirement names and level labels are mapped to integer ids, every
+# (job, name, required level) triple goes into flat arrays, and the statuses
+# for all jobs come out of a few vectorized comparisons against the user's
+# level vector.
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+LEVEL_ORDER = {"Not Provided": 0, "Basic": 1, "Intermediate": 2, "Advanced": 3}
+NOT_PROVIDED = "Not Provided"
+STATUS_LABELS = ("Missing", "Weak", "Achieved")
+MISSING, WEAK, ACHIEVED = range(3)
+GAP_SECTIONS = {"skills": "required_skills", "knowledge": "required_knowledge"}
+
+
+def level_value(level) -> int:
+    """LEVEL_ORDER value of a level label; unknown labels count as 0."""
+    return LEVEL_ORDER.get(str(level).strip(), 0)
+
+
+def _factorize(values: List) -> tuple:
+    """(unique values in first-seen order, int64 id of each value)."""
+    uniques = list(dict.fromkeys(values))
+    ids = {value: i for i, value in enumerate(uniques)}
+    codes = np.fromiter(map(ids.__getitem__, values), dtype=np.int64, count=len(values))
+    return uniques, codes
+
+
+def _section_gaps(user_levels: Dict, requirements: Sequence[Dict]) -> List[Dict]:
+    """Gap dicts of one section ("skills" or "knowledge") for every job."""
+    names, labels = [], []
+    for reqs in requirements:
+        names.extend(reqs.keys())
+        labels.extend(reqs.values())
+    if not names:
+        return [{} for _ in requirements]
+
+    vocab, name_ids = _factorize(names)
+    label_values, label_ids = _factorize(labels)
+
+    # user level per name id (-1: not provided), required level per label id
+    user_labels = [user_levels.get(name, NOT_PROVIDED) for name in vocab]
+    user = np.array(
+        [-1 if label == NOT_PROVIDED else level_value(label) for label in user_labels],
+        dtype=np.int8,
+    )
+    required = np.array([level_value(label) for label in label_values], dtype=np.int8)
+
+    # status of every (name, required label) combination in one comparison
+    status = np.where(
+        user[:, None] < 0,
+        MISSING,
+        np.where(user[:, None] >= required[None, :], ACHIEVED, WEAK),
+    ).ravel()
+    status_codes = status.tolist()
+
+    # A result entry depends only on (name, required label): build one per
+    # combination the jobs actually use and share it between those jobs.
+    pair_ids = name_ids * len(label_values) + label_ids
+    used = np.zeros(len(status), dtype=bool)
+    used[pair_ids] = True
+    entries = np.empty(len(status), dtype=object)
+    for pair in np.flatnonzero(used).tolist():
+        name_id, label_id = divmod(pair, len(label_values))
+        entries[pair] = {
+            "required_level": label_values[label_id],
+            "user_level": user_labels[name_id],
+            "status": STATUS_LABELS[status_codes[pair]],
+        }
+
+    flat = entries[pair_ids].tolist()
+    gaps, start = [], 0
+    for reqs in requirements:
+        stop = start + len(reqs)
+        gaps.append(dict(zip(reqs, flat[start:stop])))
+        start = stop
+    return gaps
+
+
+def batch_gap_analysis(user_data: Dict, jobs: Sequence[Dict]) -> List[Dict]:
+    """
+    Gap analysis of user_data ({"skills": {...}, "knowledge": {...}}) against
+    each job's required_skills/required_knowledge, in job order. Each result
+    has the compare_and_save shape:
+    {"skills": {name: {"required_level", "user_level", "status"}}, "knowledge": ...}
+    Entry dicts are shared between jobs with the same requirement; treat the
+    results as read-only.
+    """
+    sections = {
+        section: _section_gaps(
+            user_data.get(section, {}) or {},
+            [job.get(job_field, {}) or {} for job in jobs],
+        )
+        for section, job_field in GAP_SECTIONS.items()
+    }
+    return [
+        {section: gaps[j] for section, gaps in sections.items()}
+        for j in range(len(jobs))
+    ]
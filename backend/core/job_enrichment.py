@@ -0,0 +1,70 @@
+# core/job_enrichment.py
+# Checkpoint file for precomputed job enrichment (summary, required skills and
+# knowledge). services/enrich_jobs.py appends one JSON line per finished job;
+# the API merges current records into the job index metadata at startup.
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+ENRICHMENT_FILE = "job_enrichment.jsonl"
+
+
+def description_key(description) -> str:
+    """Model-independent key of a description; a changed posting is re-enriched."""
+    normalized = " ".join(str(description).split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def load_enrichment(folder: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Read the checkpoint into {job_id: record}. Later lines win; a torn last
+    line from an interrupted run is skipped.
+    """
+    path = os.path.join(folder, ENRICHMENT_FILE)
+    records: Dict[str, Dict[str, Any]] = {}
+    if not os.path.exists(path):
+        return records
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                records[record["job_id"]] = record
+            except (json.JSONDecodeError, KeyError, TypeError):
+                continue
+    return records
+
+
+def append_enrichment(folder: str, record: Dict[str, Any]):
+    """Append one record and flush it to disk so a crash loses at most one job."""
+    path = os.path.join(folder, ENRICHMENT_FILE)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def current_record(
+    records: Dict[str, Dict[str, Any]], job_id: str, description
+) -> Optional[Dict[str, Any]]:
+    """The record for job_id if it was computed from this exact description."""
+    record = records.get(job_id)
+    if record is None or record.get("description_key") != description_key(description):
+        return None
+    return record
+
+
+def enrichment_metadata(record: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Index metadata fields for a record. Skills and knowledge are JSON strings,
+    the format match_user_to_job already parses (Pinecone metadata is flat).
+    """
+    if record is None:
+        return {}
+    return {
+        "summary": record.get("summary", ""),
+        "required_skills": json.dumps(record.get("required_skills", {})),
+        "required_knowledge": json.dumps(record.get("required_knowledge", {})),
+    }
@@ -0,0 +1,174 @@
+# core/job_ingest.py
+# Load the job CSVs and collapse duplicate postings into canonical jobs.
+# Exact duplicates share a hash of the normalized description; near-duplicates
+# are found with MinHash signatures over word shingles and LSH banding.
+
+import glob
+import hashlib
+import re
+import zlib
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from core.job_store import job_id_for
+
+DESCRIPTION_COLUMN = "Full Job Description"
+TITLE_COLUMN = "Title"
+
+SHINGLE_SIZE = 5  # words per shingle
+NUM_PERM = 64  # MinHash signature length
+LSH_BANDS = 16  # NUM_PERM / LSH_BANDS rows per band
+NEAR_DUPLICATE_THRESHOLD = 0.85  # estimated Jaccard similarity
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = np.random.default_rng(1)
+_PERM_A = _rng.integers(1, 1 << 31, NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, 1 << 31, NUM_PERM, dtype=np.uint64)
+
+
+def normalize_description(text) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    if not isinstance(text, str):
+        return ""
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def minhash_signature(normalized: str) -> np.ndarray:
+    words = normalized.split()
+    if len(words) <= SHINGLE_SIZE:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {
+            " ".join(words[i : i + SHINGLE_SIZE])
+            for i in range(len(words) - SHINGLE_SIZE + 1)
+        }
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    # (a * x + b) mod p for every permutation/shingle pair, min per permutation
+    permuted = (_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % _MERSENNE_PRIME
+    return permuted.min(axis=1)
+
+
+def _find(parent: List[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def _union(parent: List[int], a: int, b: int):
+    ra, rb = _find(parent, a), _find(parent, b)
+    if ra != rb:
+        parent[max(ra, rb)] = min(ra, rb)
+
+
+def group_duplicates(descriptions: List[str]) -> List[int]:
+    """
+    Map every row to the row id of its canonical (first-seen) duplicate.
+    """
+    normalized = [normalize_description(d) for d in descriptions]
+    parent = list(range(len(normalized)))
+
+    # exact duplicates
+    first_by_hash: Dict[str, int] = {}
+    unique_rows = []
+    for i, text in enumerate(normalized):
+        if not text:
+            # nothing to compare: postings without a description stay separate
+            continue
+        key = content_hash(text)
+        if key in first_by_hash:
+            _union(parent, first_by_hash[key], i)
+        else:
+            first_by_hash[key] = i
+            unique_rows.append(i)
+
+    # near duplicates among the remaining distinct texts
+    signatures = {i: minhash_signature(normalized[i]) for i in unique_rows}
+    rows_per_band = NUM_PERM // LSH_BANDS
+    for band in range(LSH_BANDS):
+        buckets: Dict[bytes, List[int]] = {}
+        lo, hi = band * rows_per_band, (band + 1) * rows_per_band
+        for i in unique_rows:
+            buckets.setdefault(signatures[i][lo:hi].tobytes(), []).append(i)
+        for members in buckets.values():
+            head = members[0]
+            for other in members[1:]:
+                if _find(parent, head) == _find(parent, other):
+                    continue
+                agreement = np.mean(signatures[head] == signatures[other])
+                if agreement >= NEAR_DUPLICATE_THRESHOLD:
+                    _union(parent, head, other)
+
+    return [_find(parent, i) for i in range(len(normalized))]
+
+
+def canonicalize_jobs(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Keep one row per duplicate group.
+    Adds "Aliases" (other titles posted with the same description),
+    "Duplicate Count", "Source Row" (position in the input frame) and
+    "Job ID" (unique per canonical job, stable across CSV order).
+    """
+    if df.empty:
+        return df
+
+    canonical_of = group_duplicates(df[DESCRIPTION_COLUMN].tolist())
+    titles = df[TITLE_COLUMN].astype(str).tolist()
+
+    members: Dict[int, List[int]] = {}
+    for row, canonical in enumerate(canonical_of):
+        members.setdefault(canonical, []).append(row)
+
+    keep = sorted(members)
+    result = df.iloc[keep].copy()
+    result["Aliases"] = [
+        sorted({titles[m] for m in members[k]} - {titles[k]}) for k in keep
+    ]
+    result["Duplicate Count"] = [len(members[k]) for k in keep]
+    result["Source Row"] = keep
+    result["Job ID"] = [
+        job_id_for(title, description)
+        for title, description in zip(
+            result[TITLE_COLUMN].astype(str), result[DESCRIPTION_COLUMN].astype(str)
+        )
+    ]
+    return result.reset_index(drop=True)
+
+
+def load_raw_jobs(folder_path: str) -> pd.DataFrame:
+    csv_files = glob.glob(f"{folder_path}/*.csv")
+    dfs = []
+
+    for file in csv_files:
+        try:
+            df_temp = pd.read_csv(file)
+            if not df_temp.empty:
+                dfs.append(df_temp)
+        except pd.errors.EmptyDataError:
+            print(f"Skipping empty file: {file}")
+
+    if not dfs:
+        return pd.DataFrame()
+    return pd.concat(dfs, ignore_index=True)
+
+
+def load_job_corpus(folder_path: str) -> pd.DataFrame:
+    """Read every CSV in folder_path and return the canonical job frame."""
+    raw = load_raw_jobs(folder_path)
+    if raw.empty:
+        return raw
+
+    jobs = canonicalize_jobs(raw)
+    print(f"[OK] Deduplicated {len(raw)} job records into {len(jobs)} canonical jobs")
+    return jobs
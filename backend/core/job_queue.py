@@ -0,0 +1,426 @@
+# core/job_queue.py
+# Durable queue for long pipeline requests (profile match, charts, roadmaps).
+# A request is stored as a job row and run by a pool of worker threads; the
+# client gets the job id at once and polls /jobs/{id} (or subscribes to
+# /jobs/{id}/events) for the result, which is kept for JOB_RESULT_TTL_SECONDS
+# so it can be delivered again. SQLite on disk, shared by every worker
+# process; a running job's worker renews its lease every
+# JOB_HEARTBEAT_SECONDS, and a job whose process died is picked up again once
+# its lease (JOB_LEASE_SECONDS) runs out. Duplicate submissions are folded into one
+# job: by flight key while that job is active, by Idempotency-Key for as long
+# as its result is kept. An Idempotency-Key is bound to the request it first
+# came with; sending it with another request is an error, not a replay.
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JOB_QUEUE_PATH = os.path.join(
+    BASE_DIR, os.getenv("JOB_QUEUE_PATH", "data/job_queue.sqlite3")
+)
+JOB_QUEUE_WORKERS = int(os.getenv("JOB_QUEUE_WORKERS", "2"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "1800"))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "2"))
+JOB_RESULT_TTL_SECONDS = float(os.getenv("JOB_RESULT_TTL_SECONDS", str(7 * 24 * 3600)))
+# how often idle workers look for jobs submitted by other processes
+JOB_POLL_SECONDS = 1.0
+# how often wait() checks a job another thread or process is running
+JOB_WAIT_POLL_SECONDS = 0.25
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+# job kind -> handler(payload dict) -> JSON-serializable result
+JOB_HANDLERS: Dict[str, Callable[[Dict], Any]] = {}
+
+
+class IdempotencyKeyReused(ValueError):
+    """An Idempotency-Key was sent again with a different request."""
+
+
+def job_handler(kind: str):
+    """Register the decorated function as the handler of a job kind."""
+
+    def register(fn):
+        JOB_HANDLERS[kind] = fn
+        return fn
+
+    return register
+
+
+class JobQueue:
+    """
+    jobs: one row per submitted job. attempts counts claims, so a job that
+    keeps killing its worker fails after max_attempts instead of looping.
+    claim_token identifies the current claim: heartbeats and the result are
+    only written by the worker that still holds it.
+    flight_key identifies identical work (e.g. endpoint + user test),
+    idempotency_key the client's Idempotency-Key.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        workers: int = JOB_QUEUE_WORKERS,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+        heartbeat_seconds: float = JOB_HEARTBEAT_SECONDS,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        ttl_seconds: float = JOB_RESULT_TTL_SECONDS,
+    ):
+        self.path = path
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        # renew well before the lease can run out
+        self.heartbeat_seconds = min(heartbeat_seconds, lease_seconds / 3)
+        self.max_attempts = max_attempts
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._threads = []
+        self._stopped = threading.Event()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # autocommit; _claim opens its own write transaction
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, timeout=30, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, kind TEXT, payload TEXT, status TEXT,"
+            " result TEXT, error TEXT, attempts INTEGER DEFAULT 0,"
+            " created_at REAL, started_at REAL, finished_at REAL,"
+            " flight_key TEXT, idempotency_key TEXT, claim_token TEXT)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "claim_token" not in columns:  # queue created before claim tokens
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN claim_token TEXT")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_flight ON jobs (kind, flight_key)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_idempotency"
+            " ON jobs (kind, idempotency_key)"
+        )
+
+    def submit(
+        self,
+        kind: str,
+        payload: Dict,
+        flight_key: str = None,
+        idempotency_key: str = None,
+    ) -> str:
+        """
+        Queue a job and return its id, or the id of the existing job it
+        duplicates (see find).
+        """
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                job_id = self._find(kind, flight_key, idempotency_key, payload, now)
+                created = job_id is None
+                if created:
+                    job_id = uuid.uuid4().hex
+                    self._conn.execute(
+                        "INSERT INTO jobs (id, kind, payload, status, created_at,"
+                        " flight_key, idempotency_key) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            job_id,
+                            kind,
+                            json.dumps(payload),
+                            QUEUED,
+                            now,
+                            flight_key,
+                            idempotency_key,
+                        ),
+                    )
+                self._purge(now)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if created:
+            with self._wakeup:
+                self._wakeup.notify()
+        else:
+            print(f"[JOBS] {kind} reusing job {job_id}")
+        return job_id
+
+    def record(
+        self,
+        kind: str,
+        result: Any,
+        idempotency_key: str,
+        flight_key: str = None,
+        payload: Dict = None,
+    ) -> str:
+        """
+        Store the result of work done outside the queue (a synchronous
+        request) as a finished job, so its Idempotency-Key finds it.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, result, attempts,"
+                " created_at, started_at, finished_at, flight_key, idempotency_key)"
+                " VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    kind,
+                    json.dumps(payload),
+                    SUCCEEDED,
+                    json.dumps(result, default=str),
+                    now,
+                    now,
+                    now,
+                    flight_key,
+                    idempotency_key,
+                ),
+            )
+        return job_id
+
+    def find(
+        self,
+        kind: str,
+        flight_key: str = None,
+        idempotency_key: str = None,
+        payload: Dict = None,
+    ) -> Optional[str]:
+        """
+        Id of the job a new submission would duplicate: the job with the same
+        idempotency key, unless it failed or its result is an error, else an
+        active (queued or running within its lease) job with the same flight
+        key. Raises IdempotencyKeyReused if the key's job was for another
+        flight key or payload.
+        """
+        with self._lock:
+            return self._find(kind, flight_key, idempotency_key, payload, time.time())
+
+    def _find(self, kind, flight_key, idempotency_key, payload, now) -> Optional[str]:
+        row = None
+        if idempotency_key:
+            row = self._conn.execute(
+                "SELECT id, flight_key, payload FROM jobs"
+                " WHERE kind = ? AND idempotency_key = ? AND status != ?"
+                " AND json_extract(result, '$.error') IS NULL"
+                " ORDER BY created_at DESC LIMIT 1",
+                (kind, idempotency_key, FAILED),
+            ).fetchone()
+            if row is not None and (
+                row[1] != flight_key
+                or (payload is not None and json.loads(row[2] or "null") != payload)
+            ):
+                raise IdempotencyKeyReused(
+                    f"Idempotency-Key {idempotency_key} was used for another request"
+                )
+        if row is None and flight_key:
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE kind = ? AND flight_key = ?"
+                " AND (status = ? OR (status = ? AND started_at >= ?))"
+                " ORDER BY created_at DESC LIMIT 1",
+                (kind, flight_key, QUEUED, RUNNING, now - self.lease_seconds),
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def _purge(self, now: float):
+        self._conn.execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+            (*FINISHED, now - self.ttl_seconds),
+        )
+
+    def wait(self, job_id: str, timeout: float = None) -> Optional[Dict]:
+        """Poll until the job has finished; the job, or None if it is gone."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] in FINISHED:
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Job {job_id} did not finish in {timeout}s")
+            time.sleep(JOB_WAIT_POLL_SECONDS)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, kind, status, result, error, attempts,"
+                " created_at, started_at, finished_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("job_id", "kind", "status", "result", "error", "attempts")
+        job = dict(zip(keys, row[:6]))
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job.update(zip(("created_at", "started_at", "finished_at"), row[6:]))
+        return job
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        return {
+            "workers": len(self._threads),
+            **dict.fromkeys((QUEUED, RUNNING, SUCCEEDED, FAILED), 0),
+            **dict(rows),
+        }
+
+    def _claim(self) -> Optional[tuple]:
+        """
+        Mark the oldest runnable job (queued, or running with an expired
+        lease) as running under a new claim token and return (id, kind,
+        payload, token), or None. Stale jobs out of attempts found on the way
+        are failed and skipped.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = self._conn.execute(
+                        "SELECT id, kind, payload, attempts FROM jobs"
+                        " WHERE status = ? OR (status = ? AND started_at < ?)"
+                        " ORDER BY created_at LIMIT 1",
+                        (QUEUED, RUNNING, now - self.lease_seconds),
+                    ).fetchone()
+                    if row is None or row[3] < self.max_attempts:
+                        break
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, finished_at = ?"
+                        " WHERE id = ?",
+                        (FAILED, "Job did not finish (worker lost)", now, row[0]),
+                    )
+                token = uuid.uuid4().hex
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, started_at = ?, claim_token = ?,"
+                        " attempts = attempts + 1 WHERE id = ?",
+                        (RUNNING, now, token, row[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return (*row[:3], token) if row is not None else None
+
+    def _heartbeat(self, job_id: str, token: str) -> bool:
+        """Renew the lease of a claimed job; False if the claim was lost."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET started_at = ?"
+                " WHERE id = ? AND claim_token = ? AND status = ?",
+                (time.time(), job_id, token, RUNNING),
+            )
+        return cursor.rowcount > 0
+
+    def _keep_alive(self, job_id: str, token: str, done: threading.Event):
+        while not done.wait(self.heartbeat_seconds):
+            if not self._heartbeat(job_id, token):
+                print(f"[JOBS] Lost the claim on job {job_id}")
+                return
+
+    def _finish(
+        self, job_id: str, token: str, result: Any = None, error: str = None
+    ) -> bool:
+        """Store the outcome; False if another worker has claimed the job since."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?"
+                " WHERE id = ? AND claim_token = ? AND status = ?",
+                (
+                    FAILED if error else SUCCEEDED,
+                    json.dumps(result, default=str) if error is None else None,
+                    error,
+                    time.time(),
+                    job_id,
+                    token,
+                    RUNNING,
+                ),
+            )
+        return cursor.rowcount > 0
+
+    def run_next(self) -> bool:
+        """Run one runnable job in this thread; False if there was none."""
+        job = self._claim()
+        if job is None:
+            return False
+        job_id, kind, payload, token = job
+        start = time.perf_counter()
+        done = threading.Event()
+        threading.Thread(
+            target=self._keep_alive,
+            args=(job_id, token, done),
+            name=f"job-heartbeat-{job_id[:8]}",
+            daemon=True,
+        ).start()
+        try:
+            result = JOB_HANDLERS[kind](json.loads(payload))
+        except Exception as e:
+            traceback.print_exc()
+            finished = self._finish(job_id, token, error=f"{type(e).__name__}: {e}")
+            print(f"[JOBS] {kind} {job_id} failed: {e}")
+        else:
+            finished = self._finish(job_id, token, result)
+            print(f"[JOBS] {kind} {job_id} done in {time.perf_counter() - start:.1f}s")
+        finally:
+            done.set()
+        if not finished:
+            print(f"[JOBS] {kind} {job_id} was claimed again; result discarded")
+        return True
+
+    def _work(self):
+        while not self._stopped.is_set():
+            try:
+                if self.run_next():
+                    continue
+            except Exception as e:
+                print(f"[JOBS] Worker error: {e}")
+            with self._wakeup:
+                self._wakeup.wait(JOB_POLL_SECONDS)
+
+    def start(self):
+        """Start the worker threads (idempotent)."""
+        with self._lock:
+            if self._threads:
+                return
+            self._threads = [
+                threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue(JOB_QUEUE_PATH)
+    return _queue
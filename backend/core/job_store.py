@@ -0,0 +1,174 @@
+# core/job_store.py
+# On-disk job embedding store: a float32 .npy matrix with L2-normalized rows
+# plus a JSON sidecar mapping each row to its job id and title.
+# The matrix is opened with mmap so every uvicorn worker shares the same pages.
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+EMBEDDINGS_FILE = "job_embeddings.npy"
+INDEX_FILE = "job_embeddings.index.json"
+LEGACY_PICKLE_FILE = "job_embeddings.pkl"
+
+
+def job_id_for(title: str, description) -> str:
+    """
+    Stable job id, identical to the vector id used in the Pinecone index.
+    Distinct canonical jobs can share a title, so the description is part of it.
+    """
+    return hashlib.md5(f"{title}\n{description}".encode()).hexdigest()
+
+
+def write_temp(folder: str, write) -> str:
+    """
+    Write a file through write(f) (binary) under a unique temp name in folder
+    and return its path, to os.replace into place. Workers writing the same
+    file at once never share a temp file.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path
+
+
+def normalize_rows(matrix) -> np.ndarray:
+    """Return a float32 copy of matrix with every row scaled to unit length."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def build_index_rows(
+    titles: List[str], job_ids: List[str], content_keys: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Sidecar rows: matrix row i belongs to job_ids[i] (titled titles[i]).
+    content_keys (embedding cache keys) let startup detect changed descriptions.
+    """
+    rows = [
+        {"job_id": job_id, "title": title} for job_id, title in zip(job_ids, titles)
+    ]
+    if content_keys is not None:
+        for row, key in zip(rows, content_keys):
+            row["content_key"] = key
+    return rows
+
+
+def save_job_store(
+    folder: str,
+    embeddings,
+    titles: List[str],
+    job_ids: List[str],
+    model_name: str,
+    content_keys: Optional[List[str]] = None,
+) -> np.ndarray:
+    """
+    Normalize and write embeddings with their row index.
+    Files are written to unique temp paths and renamed so a worker never maps
+    a half-written matrix.
+    """
+    matrix = normalize_rows(embeddings)
+    if len(matrix) != len(titles) or len(titles) != len(job_ids):
+        raise ValueError(
+            f"Embedding rows ({len(matrix)}) do not match job titles ({len(titles)})"
+            f" and ids ({len(job_ids)})"
+        )
+
+    index = {
+        "model": model_name,
+        "dim": int(matrix.shape[1]) if matrix.size else 0,
+        "rows": build_index_rows(titles, job_ids, content_keys),
+    }
+
+    matrix_path = os.path.join(folder, EMBEDDINGS_FILE)
+    index_path = os.path.join(folder, INDEX_FILE)
+
+    matrix_tmp = write_temp(folder, lambda f: np.save(f, matrix))
+    try:
+        index_tmp = write_temp(
+            folder, lambda f: f.write(json.dumps(index).encode("utf-8"))
+        )
+    except BaseException:
+        os.remove(matrix_tmp)
+        raise
+
+    os.replace(matrix_tmp, matrix_path)
+    os.replace(index_tmp, index_path)
+    print(f"[OK] Saved {len(matrix)} normalized embeddings to {matrix_path}")
+    return matrix
+
+
+def load_job_store(
+    folder: str, model_name: str
+) -> Optional[Tuple[np.ndarray, List[Dict[str, Any]]]]:
+    """
+    Memory-map the embedding matrix and read its row index.
+    Returns None when the store is missing, unreadable, or built with another model.
+    """
+    matrix_path = os.path.join(folder, EMBEDDINGS_FILE)
+    index_path = os.path.join(folder, INDEX_FILE)
+    if not (os.path.exists(matrix_path) and os.path.exists(index_path)):
+        return None
+
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        matrix = np.load(matrix_path, mmap_mode="r")
+    except Exception as e:
+        print(f"Error loading job store: {e}")
+        return None
+
+    rows = index.get("rows", [])
+    if index.get("model") != model_name:
+        print(f"Job store was built with {index.get('model')}, expected {model_name}")
+        return None
+    if matrix.dtype != np.float32 or matrix.ndim != 2 or len(matrix) != len(rows):
+        print("Job store matrix does not match its row index")
+        return None
+
+    return matrix, rows
+
+
+def load_legacy_pickle(
+    folder: str, count: int, source_rows: Optional[List[int]] = None
+) -> Optional[np.ndarray]:
+    """
+    Read the legacy job_embeddings.pkl (list of float lists) as a normalized
+    matrix, for a one-time migration. The pickle is left in place untouched.
+    source_rows selects the pickle rows of the canonical jobs when the pickle
+    was built from the raw, non-deduplicated CSV rows.
+    """
+    pickle_path = os.path.join(folder, LEGACY_PICKLE_FILE)
+    if not os.path.exists(pickle_path):
+        return None
+
+    try:
+        with open(pickle_path, "rb") as f:
+            embeddings = pickle.load(f)
+    except Exception as e:
+        print(f"Error loading legacy embeddings: {e}")
+        return None
+
+    if source_rows is not None and len(embeddings) > max(source_rows, default=-1):
+        embeddings = [embeddings[i] for i in source_rows]
+
+    if len(embeddings) != count:
+        print(
+            f"Legacy embeddings ({len(embeddings)}) do not match job records ({count}); skipping migration"
+        )
+        return None
+
+    print(f"Migrating {len(embeddings)} embeddings from {pickle_path}")
+    return normalize_rows(embeddings)
@@ -0,0 +1,64 @@
+# core/langchain_cache.py
+# LangChain BaseCache backed by core.llm_cache, so ChatGroq models (question
+# chains) share the same persistent cache as call_openai. Imported
+# only where the LangChain models are built.
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+
+from core.llm_cache import LLMCache, get_llm_cache
+
+# keys of LangChain entries, so clear() leaves call_openai's entries alone
+KEY_PREFIX = "langchain:"
+# lookup misses remembered for update()'s latency; a miss whose call fails
+# never reaches update, so the oldest are dropped past this many
+MAX_PENDING_MISSES = 1024
+
+
+class PersistentLLMCache(BaseCache):
+    """
+    llm_string already encodes the model and its parameters (temperature, ...)
+    and prompt is the serialized messages, system message included.
+    """
+
+    def __init__(self, cache: Optional[LLMCache] = None):
+        self._cache = cache or get_llm_cache()
+        self._started = OrderedDict()  # key -> miss time, for latency
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return KEY_PREFIX + LLMCache.key(llm_string, 0.0, "", prompt)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Any]:
+        key = self._key(prompt, llm_string)
+        cached = self._cache.get(key)
+        if cached is None:
+            with self._lock:
+                self._started[key] = time.perf_counter()
+                self._started.move_to_end(key)
+                while len(self._started) > MAX_PENDING_MISSES:
+                    self._started.popitem(last=False)
+            return None
+        return [loads(generation) for generation in json.loads(cached)]
+
+    def update(self, prompt: str, llm_string: str, return_val: Any) -> None:
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            started = self._started.pop(key, None)
+        latency = time.perf_counter() - started if started is not None else 0.0
+        self._cache.put(
+            key,
+            json.dumps([dumps(generation) for generation in return_val]),
+            model=llm_string,
+            latency=latency,
+        )
+
+    def clear(self, **kwargs: Any) -> None:
+        self._cache.clear(prefix=KEY_PREFIX)
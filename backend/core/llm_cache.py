@@ -0,0 +1,209 @@
+# core/llm_cache.py
+# Persistent cache of LLM responses keyed by (model, temperature, system
+# prompt, prompt). SQLite on disk, so entries survive restarts and are shared
+# by every worker process; least-recently-used rows are evicted past
+# LLM_CACHE_MAX_ENTRIES and rows older than LLM_CACHE_TTL_SECONDS expire.
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LLM_CACHE_PATH = os.path.join(
+    BASE_DIR, os.getenv("LLM_CACHE_PATH", "data/llm_cache.sqlite3")
+)
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))  # 0 = off
+
+
+class LLMCache:
+    """
+    hits/misses count lookups in this process; saved_seconds sums the
+    original call latency of every hit.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+        self._conn = None
+        if self.enabled:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, model TEXT, response TEXT,"
+                " latency REAL, created_at REAL, last_used REAL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS llm_cache_last_used"
+                " ON llm_cache (last_used)"
+            )
+            self._conn.commit()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def key(model: str, temperature, system: str, prompt: str, **params) -> str:
+        """params: any other request field that changes the output (e.g. max_tokens)."""
+        payload = json.dumps(
+            [model, float(temperature), system or "", prompt, params],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, latency, created_at FROM llm_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is not None and self.ttl_seconds > 0:
+                if now - row[2] > self.ttl_seconds:
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                    row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            self.saved_seconds += row[1] or 0.0
+            return row[0]
+
+    def put(self, key: str, response: str, model: str = "", latency: float = 0.0):
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, latency, now, now),
+            )
+            # LRU: keep the max_entries most recently used rows
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY last_used DESC"
+                " LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def get_or_call(
+        self,
+        call: Callable[[], str],
+        model: str,
+        temperature,
+        system: str,
+        prompt: str,
+        **params,
+    ) -> str:
+        """Return the cached response, or run call() and cache what it returns."""
+        key = self.key(model, temperature, system, prompt, **params)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        start = time.perf_counter()
+        response = call()
+        if isinstance(response, str):
+            self.put(key, response, model=model, latency=time.perf_counter() - start)
+        return response
+
+    def clear(self, prefix: str = ""):
+        """Delete every entry, or only those whose key starts with prefix."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE substr(key, 1, ?) = ?",
+                (len(prefix), prefix),
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        if not self.enabled:
+            return 0
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "saved_seconds": round(self.saved_seconds, 2),
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache(LLM_CACHE_PATH)
+    return _cache
+
+
+def llm_cached(model: str, system: str = "", ignore: Iterable[str] = ()):
+    """
+    Decorator for fn(prompt, ..., temperature=..., **kwargs) -> str.
+    The remaining arguments, minus those named in ignore (e.g. timeout),
+    become part of the key.
+    """
+    ignore = set(ignore) | {"prompt", "temperature"}
+
+    def decorate(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = bound.arguments
+            params = {k: v for k, v in arguments.items() if k not in ignore}
+            return get_llm_cache().get_or_call(
+                lambda: fn(*args, **kwargs),
+                model=model,
+                temperature=arguments.get("temperature", 0.0),
+                system=system,
+                prompt=arguments["prompt"],
+                **params,
+            )
+
+        return wrapper
+
+    return decorate
@@ -1,71 +1,197 @@
-import glob
+# torch, transformers and pandas are imported where they are first needed, so
+# importing this module (e.g. for is_initialized) does not load them.
 import os
-import pickle
-import pandas as pd
-import torch
-from transformers import AutoTokenizer, AutoModel
+import numpy as np
 from typing import List
+from dotenv import load_dotenv
+from core import job_store
+from core.embedding_cache import EmbeddingCache
+from core.job_enrichment import current_record, enrichment_metadata, load_enrichment
+from core.vector_index import build_job_index
+
+load_dotenv()
+
+HF_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_BATCH_SIZE = 32
+# storage precision of the local job index: none (float32), float16 or int8
+JOB_INDEX_QUANTIZATION = os.getenv("JOB_INDEX_QUANTIZATION", "none")
 
 _tokenizer = None
 _model = None
-df = pd.DataFrame()
-job_embeddings = []
+df = None  # canonical job DataFrame, set by initialize_ai_models
+job_embeddings = np.empty((0, 0), dtype=np.float32)  # normalized, memory-mapped
+job_index = []  # row -> {"job_id", "title"}
+job_title_ids = np.empty(0, dtype=np.int32)  # row -> integer id of its title
+job_vector_index = None  # LocalVectorIndex over job_embeddings
+
+# startup progress per component: pending -> loading -> ready | failed
+_status = {
+    name: {"state": "pending"}
+    for name in ("tokenizer", "model", "corpus", "embeddings")
+}
+_ready = False
+
+
+def _set_status(component: str, state: str, **details):
+    _status[component] = {"state": state, **details}
+
+
+def get_initialization_status() -> dict:
+    """Snapshot of startup progress, used by /health."""
+    return {name: dict(info) for name, info in _status.items()}
+
+
+def load_embedding_model():
+    """Load the HuggingFace tokenizer and model once per process."""
+    global _tokenizer, _model
+
+    if _tokenizer is None:
+        _set_status("tokenizer", "loading")
+        from transformers import AutoTokenizer
+
+        _tokenizer = AutoTokenizer.from_pretrained(HF_MODEL_NAME)
+        _set_status("tokenizer", "ready")
+    if _model is None:
+        _set_status("model", "loading")
+        from transformers import AutoModel
+
+        model = AutoModel.from_pretrained(HF_MODEL_NAME)
+        model.eval()
+        _model = model
+        _set_status("model", "ready", name=HF_MODEL_NAME)
+        print("[OK] HuggingFace model loaded")
 
 
 def initialize_ai_models():
     """Initialize HuggingFace model and load job embeddings."""
-    global _tokenizer, _model, df, job_embeddings
+    global df, job_embeddings, job_index, job_title_ids, job_vector_index, _ready
 
     print("Initializing AI models...")
-    hf_model_name = "sentence-transformers/all-MiniLM-L6-v2"
-    _tokenizer = AutoTokenizer.from_pretrained(hf_model_name)
-    _model = AutoModel.from_pretrained(hf_model_name)
-    print("[OK] HuggingFace model loaded")
-
-    folder_path = "data"
-    csv_files = glob.glob(f"{folder_path}/*.csv")
-    dfs = []
-
-    for file in csv_files:
-        try:
-            df_temp = pd.read_csv(file)
-            if not df_temp.empty:
-                dfs.append(df_temp)
-        except pd.errors.EmptyDataError:
-            print(f"Skipping empty file: {file}")
-
-    if dfs:
-        df = pd.concat(dfs, ignore_index=True)
-        print(f"[OK] Loaded {len(df)} job records")
-        embeddings_file = os.path.join(folder_path, "job_embeddings.pkl")
-
-        if os.path.exists(embeddings_file):
-            try:
-                with open(embeddings_file, "rb") as f:
-                    job_embeddings = pickle.load(f)
-                print(f"[OK] Loaded {len(job_embeddings)} pre-generated embeddings")
-            except Exception as e:
-                print(f"Error loading embeddings: {e}. Regenerating...")
-                job_embeddings = _generate_and_save_embeddings(df, embeddings_file)
-        else:
-            job_embeddings = _generate_and_save_embeddings(df, embeddings_file)
-    else:
-        print("No valid data found in CSV files.")
-        df = pd.DataFrame()
-
-
-def _generate_and_save_embeddings(df, embeddings_file):
-    print("Generating embeddings for all job descriptions...")
-    job_descriptions = df["Full Job Description"].astype(str)
-    embeddings = [get_embeddings(text) for text in job_descriptions]
+    try:
+        load_embedding_model()
+
+        folder_path = "data"
+        _set_status("corpus", "loading")
+        # only canonical (deduplicated) jobs are embedded and indexed
+        from core.job_ingest import load_job_corpus
+
+        corpus = load_job_corpus(folder_path)
+        _set_status("corpus", "ready", jobs=len(corpus))
+
+        if corpus.empty:
+            print("No valid data found in CSV files.")
+            _set_status("embeddings", "failed", error="No valid job data found")
+            df = None
+            return
+
+        print(f"[OK] Loaded {len(corpus)} job records")
+        titles = corpus["Title"].astype(str).tolist()
+
+        _set_status("embeddings", "loading", jobs=len(corpus))
+        matrix, rows = _load_job_embeddings(corpus, folder_path)
+        print(f"[OK] Loaded {len(matrix)} pre-generated embeddings")
+
+        descriptions = corpus["Full Job Description"].astype(str).tolist()
+        # precomputed summaries/skills (services/enrich_jobs.py), when current
+        enrichment = load_enrichment(folder_path)
+        extra_metadata = [
+            enrichment_metadata(current_record(enrichment, row["job_id"], desc))
+            for row, desc in zip(rows, descriptions)
+        ]
+        enriched = sum(1 for extra in extra_metadata if extra)
+        print(f"[OK] Precomputed enrichment for {enriched}/{len(rows)} jobs")
+
+        vector_index = build_job_index(
+            matrix,
+            rows,
+            descriptions,
+            aliases=corpus["Aliases"].tolist(),
+            quantization=JOB_INDEX_QUANTIZATION,
+            extra_metadata=extra_metadata,
+            folder=folder_path,
+        )
+        if vector_index is not None:
+            print(
+                f"[OK] Built local job index: {len(vector_index)} jobs, "
+                f"{vector_index.nbytes / 1e6:.1f} MB ({JOB_INDEX_QUANTIZATION})"
+            )
+
+        # publish everything together so requests never see a half-loaded corpus
+        job_embeddings, job_index = matrix, rows
+        job_title_ids = np.unique(titles, return_inverse=True)[1].astype(np.int32)
+        job_vector_index = vector_index
+        df = corpus
+        _set_status("embeddings", "ready", rows=len(matrix))
+        _ready = True
+
+    except Exception as e:
+        for name, info in _status.items():
+            if info["state"] == "loading":
+                _set_status(name, "failed", error=str(e))
+        raise
+
+
+def _load_job_embeddings(df, folder_path):
+    """
+    Return (matrix, rows) for the canonical jobs in df.
+    Vectors come from the content-addressed cache; only new or changed
+    descriptions are embedded. The memory-mapped store is reused as-is
+    when its job ids and content keys still match the corpus.
+    """
+    descriptions = df["Full Job Description"].astype(str).tolist()
+    titles = df["Title"].astype(str).tolist()
+    job_ids = df["Job ID"].tolist()
+
+    cache = EmbeddingCache(folder_path, HF_MODEL_NAME)
+    keys = [cache.key(text) for text in descriptions]
+
+    store = job_store.load_job_store(folder_path, HF_MODEL_NAME)
+    store_is_current = False
+    if store is not None:
+        matrix, rows = store
+        stored_keys = [row.get("content_key") for row in rows]
+        store_is_current = (
+            stored_keys == keys and [row["job_id"] for row in rows] == job_ids
+        )
+        if all(stored_keys):
+            cache.seed(stored_keys, matrix)
+        elif [row["title"] for row in rows] == titles:
+            # store written before content keys were recorded
+            cache.seed(keys, matrix)
+    elif len(cache) == 0:
+        legacy = job_store.load_legacy_pickle(
+            folder_path, len(keys), df["Source Row"].tolist()
+        )
+        if legacy is not None:
+            cache.seed(keys, legacy)
+
+    embeddings = cache.embed(descriptions, get_embeddings_batch)
+    cache.retain(keys)
+    try:
+        cache.save()
+    except Exception as e:
+        print(f"Error saving embedding cache: {e}")
+    print(f"[OK] {cache.stats()}")
+
+    if store_is_current:
+        return store
 
     try:
-        with open(embeddings_file, "wb") as f:
-            pickle.dump(embeddings, f)
-        print(f"[OK] Saved {len(embeddings)} embeddings to {embeddings_file}")
+        job_store.save_job_store(
+            folder_path,
+            embeddings,
+            titles,
+            job_ids,
+            HF_MODEL_NAME,
+            content_keys=keys,
+        )
+        stored = job_store.load_job_store(folder_path, HF_MODEL_NAME)
+        if stored is not None:
+            return stored
     except Exception as e:
         print(f"Error saving embeddings: {e}")
-    return embeddings
+    # fall back to the in-memory matrix if it could not be written
+    return embeddings, job_store.build_index_rows(titles, job_ids, keys)
 
 
 def _ensure_models_loaded():
@@ -73,14 +199,54 @@ def _ensure_models_loaded():
         raise Exception("AI models not initialized. Call initialize_ai_models() first.")
 
 
-def get_embeddings(text: str):
+def _mean_pool(last_hidden_state, attention_mask):
+    """Average token vectors, ignoring the padding positions of each row."""
+    mask = attention_mask.unsqueeze(-1).to(last_hidden_state.dtype)
+    summed = (last_hidden_state * mask).sum(dim=1)
+    counts = mask.sum(dim=1).clamp(min=1e-9)
+    return summed / counts
+
+
+def get_embeddings_batch(texts: List[str], batch_size: int = EMBEDDING_BATCH_SIZE):
+    """
+    Embed many texts with one forward pass per batch.
+    Texts are sorted by token length so each batch is padded only to its own
+    longest member. Returns a float32 array of shape (len(texts), dim) in the
+    original input order.
+    """
+    import torch
+
     _ensure_models_loaded()
-    inputs = _tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-    with torch.no_grad():
-        outputs = _model(**inputs)
-    emb = outputs.last_hidden_state.mean(dim=1)
-    return emb.squeeze(0).cpu().numpy().tolist()
+    texts = [str(t) for t in texts]
+    if not texts:
+        return torch.empty((0, _model.config.hidden_size)).numpy()
+
+    # tokenize once; padding is applied per bucket below
+    encoded = _tokenizer(texts, truncation=True)
+    input_ids = encoded["input_ids"]
+    order = sorted(range(len(texts)), key=lambda i: len(input_ids[i]))
+
+    embeddings = torch.empty((len(texts), _model.config.hidden_size))
+    for start in range(0, len(order), batch_size):
+        bucket = order[start : start + batch_size]
+        inputs = _tokenizer.pad(
+            {
+                "input_ids": [input_ids[i] for i in bucket],
+                "attention_mask": [encoded["attention_mask"][i] for i in bucket],
+            },
+            return_tensors="pt",
+        )
+        with torch.inference_mode():
+            outputs = _model(**inputs)
+        pooled = _mean_pool(outputs.last_hidden_state, inputs["attention_mask"])
+        embeddings[bucket] = pooled.float()
+
+    return embeddings.cpu().numpy()
+
+
+def get_embeddings(text: str):
+    return get_embeddings_batch([text], batch_size=1)[0].tolist()
 
 
 def is_initialized() -> bool:
-    return _tokenizer is not None and _model is not None and not df.empty
+    return _ready
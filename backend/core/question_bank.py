@@ -0,0 +1,338 @@
+# core/question_bank.py
+# Bank of validated MCQs indexed by topic, language and difficulty, so
+# assessments can be assembled without waiting on the LLM pipeline.
+# SQLite on disk (shared by every worker process). Topics are matched to a
+# user's text by name and by embedding similarity (LocalVectorIndex).
+
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from core.vector_index import LocalVectorIndex
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QUESTION_BANK_PATH = os.path.join(
+    BASE_DIR, os.getenv("QUESTION_BANK_PATH", "data/question_bank.sqlite3")
+)
+# cosine similarity a bank topic needs to count as a match for the user text
+QUESTION_BANK_TOPIC_MIN_SCORE = float(os.getenv("QUESTION_BANK_TOPIC_MIN_SCORE", "0.4"))
+QUESTION_BANK_MAX_TOPICS = int(os.getenv("QUESTION_BANK_MAX_TOPICS", "5"))
+# language names looked for in the user's text besides the bank's own, so a
+# language the bank has no questions for sends the request to the LLM
+KNOWN_LANGUAGES = (
+    "Bash", "C", "C#", "C++", "Clojure", "Dart", "Elixir", "Go", "Golang",
+    "Haskell", "Java", "JavaScript", "Julia", "Kotlin", "Lua", "MATLAB",
+    "Objective-C", "Perl", "PHP", "Python", "R", "Ruby", "Rust", "Scala",
+    "SQL", "Swift", "TypeScript",
+)  # fmt: skip
+# skills looked for in the user's text; one without a bank topic also sends
+# the request to the LLM (and is topped up) instead of being dropped
+KNOWN_SKILLS = (
+    "Android", "Angular", "AWS", "Azure", "Cybersecurity", "Data Science",
+    "Deep Learning", "DevOps", "Django", "Docker", "Flask", "Flutter", "GCP",
+    "Git", "GraphQL", "Hadoop", "iOS", "Kubernetes", "Laravel", "Linux",
+    "Machine Learning", "Microservices", "MongoDB", "MySQL", "NLP", "Node.js",
+    "NumPy", "Pandas", "PostgreSQL", "PyTorch", "React", "Spring Boot",
+    "TensorFlow", "Unity", "Vue",
+)  # fmt: skip
+
+
+def topic_key(topic) -> str:
+    return " ".join(str(topic).lower().split())
+
+
+def question_key(question: Dict) -> str:
+    text = " ".join(str(question.get("question", "")).split())
+    code = " ".join(str(question.get("code") or "").split())
+    return hashlib.sha1(f"{text}\n{code}".encode("utf-8")).hexdigest()
+
+
+def _split_languages(language) -> List[str]:
+    return [topic_key(lang) for lang in str(language or "").split(",") if lang.strip()]
+
+
+def ambiguous_name(name: str) -> bool:
+    """
+    Short or all-caps names ("Go", "R", "AI", "REST") are also plain words or
+    letters, so they only count when written in their own casing.
+    """
+    return len(name) <= 3 or name.isupper()
+
+
+def mentions(text: str, name: str, case_sensitive: bool = False) -> bool:
+    """
+    Whole-word occurrence of name in text ("C" does not match "C++" or
+    "C#"). Case-insensitive unless case_sensitive.
+    """
+    flags = 0 if case_sensitive else re.IGNORECASE
+    pattern = rf"(?<![\w+#]){re.escape(name)}(?![\w+#])"
+    return re.search(pattern, text, flags) is not None
+
+
+class QuestionBank:
+    """
+    questions: one row per distinct MCQ (payload = the validated dict).
+    question_topics: topic tags of each question.
+    topics: display name and embedding (filled lazily) of every topic key.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._topic_index = None
+        self._topic_index_size = -1
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS questions ("
+            " id TEXT PRIMARY KEY, category TEXT, language TEXT, difficulty TEXT,"
+            " payload TEXT, served INTEGER DEFAULT 0, created_at REAL);"
+            "CREATE TABLE IF NOT EXISTS question_topics ("
+            " question_id TEXT, topic_key TEXT, PRIMARY KEY (question_id, topic_key));"
+            "CREATE INDEX IF NOT EXISTS question_topics_topic"
+            " ON question_topics (topic_key);"
+            "CREATE TABLE IF NOT EXISTS topics ("
+            " topic_key TEXT PRIMARY KEY, topic TEXT, embedding BLOB);"
+        )
+        self._conn.commit()
+
+    def add_questions(self, questions: Iterable[Dict], topics: List[str]) -> int:
+        """
+        Store validated MCQs. A question is tagged with its own "topic" when
+        the LLM gave one, otherwise with every topic it was generated for.
+        Returns the number of new questions.
+        """
+        added = 0
+        now = time.time()
+        with self._lock:
+            for q in questions:
+                tags = [q["topic"]] if q.get("topic") else list(topics)
+                tags = [t for t in tags if topic_key(t)]
+                if not tags:
+                    continue
+                qid = question_key(q)
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO questions"
+                    " (id, category, language, difficulty, payload, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        qid,
+                        q.get("category"),
+                        topic_key(q["language"]) if q.get("language") else None,
+                        str(q.get("difficulty", "")).capitalize(),
+                        json.dumps(q),
+                        now,
+                    ),
+                )
+                added += cursor.rowcount
+                for tag in tags:
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO topics (topic_key, topic) VALUES (?, ?)",
+                        (topic_key(tag), str(tag).strip()),
+                    )
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO question_topics VALUES (?, ?)",
+                        (qid, topic_key(tag)),
+                    )
+            self._conn.commit()
+        return added
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+
+    def topic_names(self) -> Dict[str, str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT topic_key, topic FROM topics").fetchall()
+        return dict(rows)
+
+    def languages(self) -> Dict[str, str]:
+        """
+        {language key: name as written in the questions} of the coding
+        questions ("Python, SQL" counts as both).
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT json_extract(payload, '$.language') FROM questions"
+                " WHERE language IS NOT NULL"
+            ).fetchall()
+        names = {}
+        for (language,) in rows:
+            for name in str(language or "").split(","):
+                if name.strip():
+                    names.setdefault(topic_key(name), name.strip())
+        return dict(sorted(names.items()))
+
+    def topic_counts(self, keys: List[str]) -> Dict[str, int]:
+        counts = dict.fromkeys(keys, 0)
+        with self._lock:
+            for key in keys:
+                counts[key] = self._conn.execute(
+                    "SELECT COUNT(*) FROM question_topics WHERE topic_key = ?", (key,)
+                ).fetchone()[0]
+        return counts
+
+    def embed_topics(self, embed_batch: Callable[[List[str]], np.ndarray]) -> int:
+        """Embed topics added since the last call; returns how many."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT topic_key, topic FROM topics WHERE embedding IS NULL"
+            ).fetchall()
+        if not rows:
+            return 0
+        vectors = np.asarray(embed_batch([topic for _, topic in rows]), np.float32)
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE topics SET embedding = ? WHERE topic_key = ?",
+                [(v.tobytes(), key) for (key, _), v in zip(rows, vectors)],
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def _index(self) -> Optional[LocalVectorIndex]:
+        """LocalVectorIndex over the embedded topics, rebuilt when they change."""
+        with self._lock:
+            size = self._conn.execute(
+                "SELECT COUNT(*) FROM topics WHERE embedding IS NOT NULL"
+            ).fetchone()[0]
+            if size != self._topic_index_size:
+                rows = self._conn.execute(
+                    "SELECT topic_key, embedding FROM topics"
+                    " WHERE embedding IS NOT NULL"
+                ).fetchall()
+                if rows:
+                    matrix = np.stack([np.frombuffer(e, np.float32) for _, e in rows])
+                    matrix /= np.maximum(
+                        np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12
+                    )
+                    keys = [key for key, _ in rows]
+                    self._topic_index = LocalVectorIndex(matrix, keys, [{}] * len(keys))
+                else:
+                    self._topic_index = None
+                self._topic_index_size = size
+            return self._topic_index
+
+    def match_topics(
+        self,
+        text: str,
+        query_vector=None,
+        max_topics: int = QUESTION_BANK_MAX_TOPICS,
+        min_score: float = QUESTION_BANK_TOPIC_MIN_SCORE,
+    ) -> List[str]:
+        """
+        Topic keys for the user's text: topics named in it first, then the
+        nearest topics by embedding that score at least min_score.
+        """
+        matched = [
+            key
+            for key, topic in self.topic_names().items()
+            if mentions(text, topic, case_sensitive=ambiguous_name(topic))
+        ]
+        index = self._index() if query_vector is not None else None
+        if index is not None:
+            for hit in index.query(query_vector, top_k=max_topics):
+                if hit["score"] >= min_score and hit["id"] not in matched:
+                    matched.append(hit["id"])
+        return matched[:max_topics]
+
+    def candidates(
+        self, keys: List[str], category: str, languages: Optional[List[str]] = None
+    ) -> List[Dict]:
+        """
+        Questions of category tagged with any of keys (and, if given, in one
+        of languages): [{"id", "topic_key", "difficulty", "served", "question"}].
+        """
+        if not keys:
+            return []
+        sql = (
+            "SELECT q.id, t.topic_key, q.difficulty, q.served, q.payload, q.language"
+            " FROM question_topics t JOIN questions q ON q.id = t.question_id"
+            f" WHERE t.topic_key IN ({','.join('?' * len(keys))}) AND q.category = ?"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, (*keys, category)).fetchall()
+        if languages is not None:
+            wanted = set(languages)
+            rows = [row for row in rows if wanted & set(_split_languages(row[5]))]
+        return [
+            {
+                "id": qid,
+                "topic_key": key,
+                "difficulty": difficulty,
+                "served": served,
+                "question": json.loads(payload),
+            }
+            for qid, key, difficulty, served, payload, _ in rows
+        ]
+
+    def sample_questions(self, keys: List[str], limit: int) -> List[str]:
+        """Up to limit question texts tagged with keys, newest first."""
+        if not keys:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT q.payload, q.created_at FROM question_topics t"
+                " JOIN questions q ON q.id = t.question_id"
+                f" WHERE t.topic_key IN ({','.join('?' * len(keys))})"
+                " ORDER BY q.created_at DESC LIMIT ?",
+                (*keys, limit),
+            ).fetchall()
+        return [json.loads(payload).get("question", "") for payload, _ in rows]
+
+    def mark_served(self, ids: List[str]):
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE questions SET served = served + 1 WHERE id = ?",
+                [(qid,) for qid in ids],
+            )
+            self._conn.commit()
+
+
+def pick_questions(candidates: List[Dict], targets: Dict[str, int]) -> List[Dict]:
+    """
+    Choose targets[difficulty] questions per difficulty, preferring the least
+    served questions and spreading picks across topics. Returns [] when the
+    candidates cannot fill every target.
+    """
+    candidates = list(candidates)
+    random.shuffle(candidates)  # random among equally served questions
+    candidates.sort(key=lambda c: c["served"])
+
+    picked, seen, per_topic = [], set(), {}
+    for difficulty, need in targets.items():
+        pool = [c for c in candidates if c["difficulty"] == difficulty]
+        for _ in range(need):
+            pool = [c for c in pool if c["id"] not in seen]
+            if not pool:
+                return []
+            # least represented topic first; pool is already in served order
+            best = min(pool, key=lambda c: per_topic.get(c["topic_key"], 0))
+            seen.add(best["id"])
+            per_topic[best["topic_key"]] = per_topic.get(best["topic_key"], 0) + 1
+            picked.append(best)
+    return picked
+
+
+_bank = None
+_bank_lock = threading.Lock()
+
+
+def get_question_bank() -> QuestionBank:
+    global _bank
+    if _bank is None:
+        with _bank_lock:
+            if _bank is None:
+                _bank = QuestionBank(QUESTION_BANK_PATH)
+    return _bank
@@ -0,0 +1,95 @@
+# core/streaming.py
+# Server-sent events for the streaming routes, and their latency metrics.
+# Time to first useful byte (TTFUB) is measured from the start of a request
+# to the first event that carries something the client can show (a question
+# batch, the profile text), not to the first byte on the wire.
+
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+# disable proxy buffering (nginx) so events reach the client as they are sent
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+SSE_MEDIA_TYPE = "text/event-stream"
+# recent requests per endpoint the percentiles are computed over
+STREAM_METRICS_WINDOW = 500
+
+
+def sse_event(event: str, data: Any) -> str:
+    """One SSE message: named event, JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _percentile(values, q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+
+class StreamMetrics:
+    """TTFUB and total duration (seconds) of recent streams, per endpoint."""
+
+    def __init__(self, window: int = STREAM_METRICS_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    def record(self, endpoint: str, ttfub: Optional[float], total: float):
+        with self._lock:
+            samples = self._samples.setdefault(
+                endpoint,
+                {
+                    "ttfub": deque(maxlen=self.window),
+                    "total": deque(maxlen=self.window),
+                },
+            )
+            if ttfub is not None:
+                samples["ttfub"].append(ttfub)
+            samples["total"].append(total)
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            snapshot = {
+                endpoint: {name: list(values) for name, values in samples.items()}
+                for endpoint, samples in self._samples.items()
+            }
+        return {
+            endpoint: {
+                "count": len(samples["total"]),
+                "ttfub_p50": _percentile(samples["ttfub"], 0.5),
+                "ttfub_p95": _percentile(samples["ttfub"], 0.95),
+                "total_p50": _percentile(samples["total"], 0.5),
+                "total_p95": _percentile(samples["total"], 0.95),
+            }
+            for endpoint, samples in snapshot.items()
+        }
+
+
+stream_metrics = StreamMetrics()
+
+
+class StreamTimer:
+    """
+    Times one streamed response. Call useful() when a useful event is sent
+    and finish() once at the end (records into stream_metrics).
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.start = time.perf_counter()
+        self.ttfub = None
+
+    def elapsed(self) -> float:
+        return round(time.perf_counter() - self.start, 3)
+
+    def useful(self):
+        if self.ttfub is None:
+            self.ttfub = self.elapsed()
+
+    def finish(self) -> Dict[str, Optional[float]]:
+        total = self.elapsed()
+        stream_metrics.record(self.endpoint, self.ttfub, total)
+        return {"ttfub": self.ttfub, "total": total}
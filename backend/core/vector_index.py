@@ -0,0 +1,226 @@
+# core/vector_index.py
+# Exact in-process top-k search over normalized job embeddings.
+# One matrix-vector product scores every job; argpartition picks the top k
+# without sorting the whole corpus.
+
+import glob
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.job_store import write_temp
+
+QUANTIZATION_MODES = ("none", "float16", "int8")
+STORAGE_DTYPES = {"none": np.float32, "float16": np.float16, "int8": np.int8}
+# deduplicated/quantized job matrix kept next to the job store, memory-mapped
+JOB_INDEX_FILE_PREFIX = "job_index"
+
+
+def quantize_rows(matrix, quantization: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Storage form of float32 rows: (matrix, per-row int8 scales or None)."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if quantization == "float16":
+        return matrix.astype(np.float16), None
+    if quantization == "int8":
+        # symmetric per-row scale: row ≈ int8_row * scale
+        scales = np.abs(matrix).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        quantized = np.round(matrix / scales[:, None]).astype(np.int8)
+        return quantized, scales.astype(np.float32)
+    return np.ascontiguousarray(matrix), None
+
+
+class LocalVectorIndex:
+    """
+    Cosine-similarity index over L2-normalized rows.
+    Results use the same shape as PineconeService.query_similar_jobs:
+    {"id": ..., "score": ..., "metadata": {...}}.
+    A matrix already in the storage dtype of the quantization (with its
+    scales for int8) is used as-is, so a memory-mapped one is not copied.
+    """
+
+    def __init__(
+        self,
+        matrix,
+        ids: List[str],
+        metadata: List[Dict[str, Any]],
+        quantization: str = "none",
+        scales=None,
+    ):
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(
+                f"Unknown quantization '{quantization}'. Use one of {QUANTIZATION_MODES}"
+            )
+        if len(matrix) != len(ids) or len(ids) != len(metadata):
+            raise ValueError("matrix, ids and metadata must have the same length")
+
+        self.ids = list(ids)
+        self.metadata = list(metadata)
+        self.quantization = quantization
+
+        stored = getattr(matrix, "dtype", None) == STORAGE_DTYPES[quantization]
+        if stored and quantization == "int8" and scales is None:
+            raise ValueError("int8 rows need their scales")
+        if stored and (quantization != "none" or matrix.flags.c_contiguous):
+            self._matrix = matrix
+            self._scales = scales
+        else:
+            self._matrix, self._scales = quantize_rows(matrix, quantization)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        extra = self._scales.nbytes if self._scales is not None else 0
+        return self._matrix.nbytes + extra
+
+    def scores(self, query) -> np.ndarray:
+        """Cosine similarity of query against every row."""
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        if self.quantization == "none":
+            return self._matrix @ query
+        sims = self._matrix.astype(np.float32) @ query
+        if self._scales is not None:
+            sims *= self._scales
+        return sims
+
+    def query(self, query, top_k: int = 3) -> List[Dict[str, Any]]:
+        """Return the top_k rows by cosine similarity, best first."""
+        if len(self) == 0 or top_k <= 0:
+            return []
+
+        sims = self.scores(query)
+        top_k = min(top_k, len(sims))
+        if top_k < len(sims):
+            candidates = np.argpartition(-sims, top_k - 1)[:top_k]
+        else:
+            candidates = np.arange(len(sims))
+        best = candidates[np.argsort(-sims[candidates])]
+
+        return [
+            {
+                "id": self.ids[i],
+                "score": float(sims[i]),
+                "metadata": self.metadata[i],
+            }
+            for i in best
+        ]
+
+
+def top_k_unique(sims, group_ids, top_k: int, window: Optional[int] = None):
+    """
+    Row indices of the top_k scores, keeping only the best row of each group.
+    Only a candidate window is partitioned and sorted; it widens when
+    duplicates leave fewer than top_k distinct groups inside it.
+    """
+    n = len(sims)
+    if n == 0 or top_k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    window = window or top_k * 16
+    while True:
+        window = min(window, n)
+        if window < n:
+            candidates = np.argpartition(-sims, window - 1)[:window]
+        else:
+            candidates = np.arange(n)
+        candidates = candidates[np.argsort(-sims[candidates], kind="stable")]
+
+        # first (= best) candidate of every group, in score order
+        _, first = np.unique(group_ids[candidates], return_index=True)
+        picked = candidates[np.sort(first)][:top_k]
+        if len(picked) >= top_k or window == n:
+            return picked
+        window *= 4
+
+
+def _stored_job_matrix(
+    matrix,
+    rows: List[Dict[str, Any]],
+    quantization: str,
+    folder: Optional[str],
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    matrix in quantized storage form. With a folder it is written there once
+    per (rows, quantization) and memory-mapped, like the job store, instead
+    of held as a private copy in every worker.
+    """
+    if folder is None:
+        return quantize_rows(matrix, quantization)
+
+    fingerprint = json.dumps(
+        [
+            quantization,
+            int(matrix.shape[1]),
+            [[row["job_id"], row.get("content_key")] for row in rows],
+        ]
+    )
+    digest = hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:16]
+    base = os.path.join(folder, f"{JOB_INDEX_FILE_PREFIX}.{quantization}.{digest}")
+    matrix_path, scales_path = base + ".npy", base + ".scales.npy"
+
+    if not os.path.exists(matrix_path):
+        stored, scales = quantize_rows(matrix, quantization)
+        try:
+            for path, array in ((scales_path, scales), (matrix_path, stored)):
+                if array is not None:
+                    os.replace(write_temp(folder, lambda f: np.save(f, array)), path)
+        except OSError as e:
+            print(f"Error saving job index matrix: {e}")
+            return stored, scales
+        # matrices of earlier corpora or quantization modes
+        for path in glob.glob(os.path.join(folder, f"{JOB_INDEX_FILE_PREFIX}.*.npy")):
+            if path not in (matrix_path, scales_path):
+                os.remove(path)
+
+    scales = np.load(scales_path) if quantization == "int8" else None
+    return np.load(matrix_path, mmap_mode="r"), scales
+
+
+def build_job_index(
+    matrix,
+    rows: List[Dict[str, Any]],
+    descriptions: List[str],
+    aliases: Optional[List[List[str]]] = None,
+    quantization: str = "none",
+    extra_metadata: Optional[List[Dict[str, Any]]] = None,
+    folder: Optional[str] = None,
+) -> Optional[LocalVectorIndex]:
+    """
+    Build the job index from the job store, one entry per row (job ids are
+    unique per canonical job). extra_metadata (per row, e.g. precomputed
+    enrichment) is merged in. Without quantization the index searches matrix
+    itself; otherwise the quantized matrix is kept in folder (see
+    _stored_job_matrix).
+    """
+    if len(matrix) == 0:
+        return None
+
+    if quantization == "none":
+        stored, scales = matrix, None
+    else:
+        stored, scales = _stored_job_matrix(matrix, rows, quantization, folder)
+
+    metadata = [
+        {
+            "title": rows[i]["title"],
+            "description": descriptions[i],
+            "type": "job",
+            "job_id": rows[i]["job_id"],
+            "aliases": list(aliases[i]) if aliases is not None else [],
+            **(extra_metadata[i] if extra_metadata is not None else {}),
+        }
+        for i in range(len(rows))
+    ]
+    return LocalVectorIndex(
+        stored,
+        [row["job_id"] for row in rows],
+        metadata,
+        quantization=quantization,
+        scales=scales,
+    )
@@ -1,7 +1,16 @@
+import asyncio
+import threading
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from routes import assessment_routes
-from core.model_loader import initialize_ai_models, is_initialized
+from core.job_queue import get_job_queue
+from core.llm_cache import get_llm_cache
+from core.streaming import stream_metrics
+from core.model_loader import (
+    initialize_ai_models,
+    is_initialized,
+    get_initialization_status,
+)
 
 # Create FastAPI app
 app = FastAPI(title="CodeMap API")
@@ -19,18 +28,52 @@ app.add_middleware(
 # Health check endpoint
 @app.get("/health")
 async def health_check():
+    components = get_initialization_status()
     if is_initialized():
-        return {"status": "ready", "message": "Server is running"}
-    else:
-        return {"status": "starting", "message": "Server is initializing"}
+        return {
+            "status": "ready",
+            "message": "Server is running",
+            "components": components,
+            # SQLite reads behind locks: off the event loop, so open streams
+            # are not stalled while they wait
+            "llm_cache": await asyncio.to_thread(lambda: get_llm_cache().stats()),
+            "streaming": stream_metrics.stats(),
+            "jobs": await asyncio.to_thread(lambda: get_job_queue().stats()),
+        }
+    if any(info["state"] == "failed" for info in components.values()):
+        return {
+            "status": "failed",
+            "message": "Server initialization failed",
+            "components": components,
+        }
+    return {
+        "status": "starting",
+        "message": "Server is initializing",
+        "components": components,
+    }
+
+
+def _initialize_in_background():
+    try:
+        initialize_ai_models()  # This will load everything
+        print("[OK] Server startup complete - Ready for requests!")
+    except Exception as e:
+        print(f"[ERROR] AI model initialization failed: {e}")
+        return
+    # queued pipeline jobs (including ones left by a previous run) need the
+    # models, so the job workers start only once they have loaded
+    get_job_queue().start()
 
 
 # Run initialization when FastAPI starts
 @app.on_event("startup")
 async def on_startup():
-    # Initialize AI models and load job data
-    initialize_ai_models()  # This will load everything
-    print("[OK] Server startup complete - Ready for requests!")
+    # Load AI models and job data in the background so the server accepts
+    # connections immediately; model-dependent routes return 503 until ready.
+    threading.Thread(
+        target=_initialize_in_background, name="ai-model-init", daemon=True
+    ).start()
+    print("[OK] Server accepting requests - AI models loading in background")
 
 
 # Register routers
@@ -2,6 +2,31 @@ from core.database import db
 from google.cloud import firestore
 from google.cloud.firestore_v1 import FieldFilter
 
+# Firestore rejects a WriteBatch with more operations than this
+FIRESTORE_BATCH_LIMIT = 500
+
+
+def commit_writes(writes: list, merge: bool = False) -> dict:
+    """
+    Commit (DocumentReference, data) pairs with one WriteBatch per
+    FIRESTORE_BATCH_LIMIT writes. A failed chunk does not stop later chunks.
+    A (ref, data, merge) triple overrides merge for that write.
+    Returns {"written": [doc ids], "failed": [{"id": ..., "error": ...}]}.
+    """
+    written, failed = [], []
+    for start in range(0, len(writes), FIRESTORE_BATCH_LIMIT):
+        chunk = writes[start : start + FIRESTORE_BATCH_LIMIT]
+        batch = db.batch()
+        for ref, data, *options in chunk:
+            batch.set(ref, data, merge=options[0] if options else merge)
+        try:
+            batch.commit()
+            written.extend(write[0].id for write in chunk)
+        except Exception as e:
+            print(f"[ERROR] Batch write of {len(chunk)} documents failed: {e}")
+            failed.extend({"id": write[0].id, "error": str(e)} for write in chunk)
+    return {"written": written, "failed": failed}
+
 
 # -----------------------
 # UserTest
@@ -19,9 +44,92 @@ def create_user_test(data: dict) -> str:
     return user_ref.id
 
 
-def get_user_test(user_id: str) -> dict:
+def get_user_test(user_id: str, include_pointers: bool = False) -> dict:
+    """
+    The user_tests document as the app wrote it. The denormalized pointer
+    fields (below) are internal and left out unless include_pointers.
+    """
     doc = db.collection("user_tests").document(user_id).get()
-    return doc.to_dict() if doc.exists else None
+    if not doc.exists:
+        return None
+    user_test = doc.to_dict()
+    if not include_pointers:
+        for field in POINTER_FIELDS:
+            user_test.pop(field, None)
+    return user_test
+
+
+# Denormalized pointers kept on the user_tests document so the hot lookups
+# are a single document get:
+#   latest_recommendation_id - set with every new career recommendation
+#   latest_attempt           - highest follow-up test_attempt (Maximum transform)
+#   owner_user_id, assessment_attempt - owning users doc and its attemptNumber,
+#                              recorded lazily, each once it is found
+LATEST_RECOMMENDATION_FIELD = "latest_recommendation_id"
+LATEST_ATTEMPT_FIELD = "latest_attempt"
+OWNER_USER_FIELD = "owner_user_id"
+ASSESSMENT_ATTEMPT_FIELD = "assessment_attempt"
+POINTER_FIELDS = (
+    LATEST_RECOMMENDATION_FIELD,
+    LATEST_ATTEMPT_FIELD,
+    OWNER_USER_FIELD,
+    ASSESSMENT_ATTEMPT_FIELD,
+)
+
+
+def _user_test_ref(user_test_id: str):
+    return db.collection("user_tests").document(user_test_id)
+
+
+def get_user_test_pointer(user_test_id: str, field: str, user_test: dict = None):
+    """Read one pointer field; pass an already fetched user_tests dict to skip the get."""
+    if user_test is None:
+        user_test = get_user_test(user_test_id, include_pointers=True) or {}
+    return user_test.get(field)
+
+
+def set_user_test_pointers(user_test_id: str, **fields):
+    _user_test_ref(user_test_id).set(fields, merge=True)
+
+
+def get_test_owner(user_test_id: str, user_test: dict = None):
+    """
+    (owner user id, attemptNumber) for a user test. Served from the pointers
+    once known; until then the owner is looked up in users (written by the
+    app) and each pointer is recorded on the user_tests document once found.
+    The attempt defaults to 1 while the owner has no assessmentAttempts entry
+    for the test yet, and is looked up again on the next call.
+    """
+    if user_test is None:
+        user_test = get_user_test(user_test_id, include_pointers=True) or {}
+    owner_id = user_test.get(OWNER_USER_FIELD)
+    attempt_number = user_test.get(ASSESSMENT_ATTEMPT_FIELD)
+    if owner_id and attempt_number is not None:
+        return owner_id, attempt_number
+
+    if owner_id:
+        owner_doc = db.collection("users").document(owner_id).get()
+        user_docs = [owner_doc] if owner_doc.exists else []
+    else:
+        user_docs = list(
+            db.collection("users")
+            .where("testIds", "array_contains", user_test_id)
+            .limit(1)
+            .stream()
+        )
+    if not user_docs:
+        return None, 1
+
+    pointers = {OWNER_USER_FIELD: user_docs[0].id}
+    for attempt in user_docs[0].to_dict().get("assessmentAttempts", []):
+        if attempt.get("testId") == user_test_id:
+            attempt_number = attempt.get("attemptNumber", 1)
+            pointers[ASSESSMENT_ATTEMPT_FIELD] = attempt_number
+            break
+
+    if owner_id != user_docs[0].id or ASSESSMENT_ATTEMPT_FIELD in pointers:
+        set_user_test_pointers(user_test_id, **pointers)
+    return user_docs[0].id, attempt_number if attempt_number is not None else 1
 
 
 # -----------------------
@@ -61,6 +169,40 @@ def add_generated_question(
     return question_ref.id
 
 
+def add_generated_questions(
+    user_id: str, questions: list[dict], test_attempt=None
+) -> list[str | None]:
+    """
+    Save many generated questions in batched commits.
+    questions: dicts with the add_generated_question keyword fields.
+    Returns the new document IDs in input order (None where the write failed).
+    """
+    refs = [db.collection("generated_questions").document() for _ in questions]
+    writes = [
+        (
+            ref,
+            {
+                "user_test_id": user_id,
+                "question_text": q.get("question_text"),
+                "code": q.get("code"),
+                "language": q.get("language"),
+                "options": q.get("options") or [],
+                "answer": q.get("answer"),
+                "difficulty": q.get("difficulty"),
+                "question_type": q.get("question_type"),
+                "test_attempt": test_attempt,
+                "created_at": firestore.SERVER_TIMESTAMP,
+            },
+        )
+        for ref, q in zip(refs, questions)
+    ]
+    print(
+        f"[DEBUG] Saving {len(writes)} questions with test_attempt={test_attempt} for user={user_id}"
+    )
+    failed = {f["id"] for f in commit_writes(writes)["failed"]}
+    return [None if ref.id in failed else ref.id for ref in refs]
+
+
 def get_generated_questions(user_id: str, attempt_number: int = 1):
     return [
         {**q.to_dict(), "id": q.id}
@@ -94,6 +236,56 @@ def add_follow_up_answer(
     return answer_ref.id
 
 
+def add_follow_up_answers(answers: list[dict]) -> dict:
+    """
+    Save many follow-up answers in batched commits.
+    answers: dicts with user_test_id, question_id, selected_option, test_attempt.
+    Returns commit_writes' {"written", "failed"} report; failed entries also
+    carry the question_id.
+    """
+    writes = [
+        (
+            db.collection("follow_up_answers").document(),
+            {
+                "user_test_id": a["user_test_id"],
+                "question_id": a["question_id"],
+                "selected_option": a["selected_option"],
+                "test_attempt": a["test_attempt"],
+            },
+        )
+        for a in answers
+    ]
+    question_ids = {ref.id: data["question_id"] for ref, data in writes}
+
+    # advance each test's latest_attempt pointer atomically with its answers
+    # (placed in the batch that holds that test's last answer)
+    last_write = {}
+    for i, (_, data) in enumerate(writes):
+        last_write[data["user_test_id"]] = i
+    for user_test_id, i in sorted(last_write.items(), key=lambda x: -x[1]):
+        writes.insert(
+            i + 1,
+            (
+                _user_test_ref(user_test_id),
+                {
+                    LATEST_ATTEMPT_FIELD: firestore.Maximum(
+                        max(
+                            a["test_attempt"]
+                            for a in answers
+                            if a["user_test_id"] == user_test_id
+                        )
+                    )
+                },
+                True,
+            ),
+        )
+    result = commit_writes(writes)
+    result["failed"] = [f for f in result["failed"] if f["id"] in question_ids]
+    for failure in result["failed"]:
+        failure["question_id"] = question_ids[failure["id"]]
+    return result
+
+
 def get_follow_up_answers_by_user(user_id: str, attempt_number: int):
     return [
         doc.to_dict()
@@ -104,11 +296,16 @@ def get_follow_up_answers_by_user(user_id: str, attempt_number: int):
     ]
 
 
-def get_latest_attempt_number(user_id: str) -> int:
+def get_latest_attempt_number(user_id: str, user_test: dict = None) -> int:
     """
     Get the latest attempt number for a user.
     Returns 1 if no attempts found.
+    Reads the latest_attempt pointer; tests answered before the pointer
+    existed fall back to the follow_up_answers query once and backfill it.
     """
+    pointer = get_user_test_pointer(user_id, LATEST_ATTEMPT_FIELD, user_test)
+    if pointer is not None:
+        return pointer
 
     query = (
         db.collection("follow_up_answers")
@@ -119,7 +316,11 @@ def get_latest_attempt_number(user_id: str) -> int:
     )
 
     for doc in query:
-        return doc.to_dict().get("test_attempt", 1)
+        latest = doc.to_dict().get("test_attempt", 1)
+        _user_test_ref(user_id).set(
+            {LATEST_ATTEMPT_FIELD: firestore.Maximum(latest)}, merge=True
+        )
+        return latest
 
     return 1  # default if no answers exist
 
@@ -128,8 +329,14 @@ def get_latest_attempt_number(user_id: str) -> int:
 # CareerRecommendation
 # -----------------------
 def add_career_recommendation(user_id: str, profile_text: str) -> str:
+    """Create the recommendation and point user_tests at it in one atomic batch."""
     rec_ref = db.collection("career_recommendations").document()
-    rec_ref.set({"user_test_id": user_id, "profile_text": profile_text})
+    batch = db.batch()
+    batch.set(rec_ref, {"user_test_id": user_id, "profile_text": profile_text})
+    batch.set(
+        _user_test_ref(user_id), {LATEST_RECOMMENDATION_FIELD: rec_ref.id}, merge=True
+    )
+    batch.commit()
     return rec_ref.id
 
 
@@ -158,23 +365,27 @@ def get_all_jobs(rec_id: str = None):
     return jobs
 
 
-def get_job_by_index(job_index: str):
+def get_job_by_index(job_index: str, user_test_id: str, rec_id: str = None):
     """
-    Fetch a single job match across all career recommendations by its job_index.
+    Fetch one of this user's job matches by its job_index ("0", "1", "2").
+    job_index is only unique within a recommendation, so the lookup is scoped
+    to the user's recommendation: a single document get when rec_id is known,
+    otherwise one extra lookup to resolve it.
     """
-    recs = db.collection("career_recommendations").stream()
-    for rec in recs:
-        collection = (
-            db.collection("career_recommendations")
-            .document(rec.id)
-            .collection("job_matches")
-        )
-        job_doc = collection.document(job_index).get()
-        if job_doc.exists:
-            job_data = job_doc.to_dict()
-            job_data["job_index"] = job_index
-            return job_data
-    return None
+    rec_id = rec_id or get_recommendation_id_by_user_test_id(user_test_id)
+    if not rec_id:
+        return None
+    return get_job_match(rec_id, job_index)
+
+
+def get_job_match(rec_id: str, job_index: str):
+    """Fetch a single job match of a recommendation (one document get)."""
+    job_doc = _job_match_ref(rec_id, job_index).get()
+    if not job_doc.exists:
+        return None
+    job_data = job_doc.to_dict()
+    job_data["job_index"] = str(job_index)
+    return job_data
 
 
 def get_jobs_for_recommendation(rec_id: str):
@@ -194,11 +405,18 @@ def get_jobs_for_recommendation(rec_id: str):
     return jobs
 
 
-def get_recommendation_id_by_user_test_id(user_test_id: str) -> str | None:
+def get_recommendation_id_by_user_test_id(
+    user_test_id: str, user_test: dict = None
+) -> str | None:
     """
     Retrieve the most recent recommendation document ID for a given user_test_id.
+    Reads the latest_recommendation_id pointer; older tests without it fall
+    back to the query once and backfill the pointer.
     """
     print(f"[DEBUG] Looking for recommendation with user_test_id: {user_test_id}")
+    rec_id = get_user_test_pointer(user_test_id, LATEST_RECOMMENDATION_FIELD, user_test)
+    if rec_id:
+        return rec_id
 
     docs = (
         db.collection("career_recommendations")
@@ -208,15 +426,23 @@ def get_recommendation_id_by_user_test_id(user_test_id: str) -> str | None:
     )
     for doc in docs:
         print(f"[DEBUG] Found recommendation: {doc.id}")
+        set_user_test_pointers(user_test_id, **{LATEST_RECOMMENDATION_FIELD: doc.id})
         return doc.id
     return None
 
 
-def get_profile_text_by_user(user_id: str) -> str | None:
+def get_profile_text_by_user(user_id: str, rec_id: str = None) -> str | None:
     """
     Get the profile_text from career_recommendations for a given user_test_id.
-    Returns the first match (if multiple exist).
+    Uses the latest recommendation when it is known (pass rec_id to skip the
+    lookup), otherwise the first match (if multiple exist).
     """
+    rec_id = rec_id or get_user_test_pointer(user_id, LATEST_RECOMMENDATION_FIELD)
+    if rec_id:
+        rec = db.collection("career_recommendations").document(rec_id).get()
+        if rec.exists:
+            return rec.to_dict().get("profile_text")
+
     recs = (
         db.collection("career_recommendations")
         .where("user_test_id", "==", user_id)
@@ -249,33 +475,75 @@ def add_job_match(
     recommendation_id = str(recommendation_id)
     job_id = str(job_id)
 
+    job_ref = _job_match_ref(recommendation_id, job_id)
+    job_ref.set(
+        _job_match_data(
+            job_title,
+            job_description,
+            similarity_score,
+            similarity_percentage,
+            required_skills,
+            required_knowledge,
+        )
+    )
+    return job_ref.id
+
+
+def add_job_matches(recommendation_id: str, jobs: list[dict]) -> dict:
+    """
+    Save all job matches of a recommendation in one batched commit.
+    jobs: dicts with the add_job_match keyword fields (job_id, job_title, ...).
+    Returns commit_writes' {"written", "failed"} report.
+    """
+    writes = [
+        (
+            _job_match_ref(recommendation_id, job["job_id"]),
+            _job_match_data(
+                job.get("job_title", ""),
+                job.get("job_description", ""),
+                job.get("similarity_score", 0.0),
+                job.get("similarity_percentage", 0.0),
+                job.get("required_skills", {}),
+                job.get("required_knowledge", {}),
+            ),
+        )
+        for job in jobs
+    ]
+    return commit_writes(writes)
+
+
+def _job_match_ref(recommendation_id, job_id):
+    # Ensure recommendation_id and job_id are strings
+    return (
+        db.collection("career_recommendations")
+        .document(str(recommendation_id))
+        .collection("job_matches")
+        .document(str(job_id))
+    )
+
+
+def _job_match_data(
+    job_title,
+    job_description,
+    similarity_score,
+    similarity_percentage,
+    required_skills,
+    required_knowledge,
+) -> dict:
     # Make sure skills and knowledge are JSON-serializable
     def serialize_dict(d):
         if not isinstance(d, dict):
             return {}
         return {k: (list(v) if isinstance(v, set) else v) for k, v in d.items()}
 
-    required_skills = serialize_dict(required_skills)
-    required_knowledge = serialize_dict(required_knowledge)
-
-    # Reference to Firestore document
-    job_ref = (
-        db.collection("career_recommendations")
-        .document(recommendation_id)
-        .collection("job_matches")
-        .document(job_id)
-    )
-    job_ref.set(
-        {
-            "job_title": job_title,
-            "job_description": job_description,
-            "similarity_score": similarity_score,
-            "similarity_percentage": similarity_percentage,
-            "required_skills": required_skills,
-            "required_knowledge": required_knowledge,
-        }
-    )
-    return job_ref.id
+    return {
+        "job_title": job_title,
+        "job_description": job_description,
+        "similarity_score": similarity_score,
+        "similarity_percentage": similarity_percentage,
+        "required_skills": serialize_dict(required_skills),
+        "required_knowledge": serialize_dict(required_knowledge),
+    }
 
 
 def get_job_matches(recommendation_id: str):
@@ -321,8 +589,13 @@ def get_job_match_doc(user_test_id: str, job_index: str):
 
 
 # charts
-def save_job_charts(rec_id: str, job_index: str, charts_data: dict):
-    """Save chart data for a specific job in the recommendation."""
+def save_job_charts(
+    rec_id: str, job_index: str, charts_data: dict, chart_data: dict = None
+):
+    """
+    Save chart refs for a specific job in the recommendation, and with
+    chart_data the series they are drawn from.
+    """
     job_ref = (
         db.collection("career_recommendations")
         .document(rec_id)
@@ -331,7 +604,10 @@ def save_job_charts(rec_id: str, job_index: str, charts_data: dict):
     )
 
     # update the document with chart data
-    job_ref.update({"charts": charts_data})
+    update = {"charts": charts_data}
+    if chart_data is not None:
+        update["chart_data"] = chart_data
+    job_ref.update(update)
 
     return True
 
@@ -391,21 +667,54 @@ def set_user_job_skill_match(
     Save skill/knowledge gap analysis for a specific user and job.
     Synchronous version for compatibility with skill_gap_analysis_service.
     """
-    match_ref = (
+    match_ref = _job_skill_match_ref(user_id, job_match_id)
+    match_ref.set(
+        _job_skill_match_data(job_match_id, skill_status, knowledge_status, job_title)
+    )
+    print(f"[INFO] Saved job_skill_match: user={user_id}, job={job_match_id}")
+
+
+def set_user_job_skill_matches(user_id: str, matches: list[dict]) -> dict:
+    """
+    Save the gap analyses of many jobs in one batched commit.
+    matches: dicts with job_match_id, skill_status, knowledge_status, job_title.
+    Returns commit_writes' {"written", "failed"} report.
+    """
+    writes = [
+        (
+            _job_skill_match_ref(user_id, match["job_match_id"]),
+            _job_skill_match_data(
+                match["job_match_id"],
+                match["skill_status"],
+                match["knowledge_status"],
+                match.get("job_title"),
+            ),
+        )
+        for match in matches
+    ]
+    result = commit_writes(writes)
+    print(f"[INFO] Saved {len(result['written'])} job_skill_matches for user={user_id}")
+    return result
+
+
+def _job_skill_match_ref(user_id: str, job_match_id: str):
+    return (
         db.collection("user_tests")
         .document(user_id)
         .collection("job_skill_matches")
-        .document(job_match_id)
+        .document(str(job_match_id))
     )
-    match_ref.set(
-        {
-            "job_match_id": job_match_id,
-            "skill_status": skill_status,
-            "knowledge_status": knowledge_status,
-            "job_title": job_title,
-        }
-    )
-    print(f"[INFO] Saved job_skill_match: user={user_id}, job={job_match_id}")
+
+
+def _job_skill_match_data(
+    job_match_id: str, skill_status: dict, knowledge_status: dict, job_title: str
+) -> dict:
+    return {
+        "job_match_id": job_match_id,
+        "skill_status": skill_status,
+        "knowledge_status": knowledge_status,
+        "job_title": job_title,
+    }
 
 
 def get_user_job_skill_match(user_id: str, job_match_id: str) -> dict:
@@ -0,0 +1,45 @@
+from functools import cached_property
+from typing import Any, Dict, List, Optional
+
+from models.firestore_models import (
+    get_follow_up_answers_by_user,
+    get_generated_questions,
+    get_latest_attempt_number,
+    get_user_test,
+)
+
+
+class UserTestContext:
+    """
+    Request-scoped view of one user test. Each Firestore read happens at most
+    once and is reused by every service the request calls; create a new
+    context per request so later writes are picked up.
+    """
+
+    def __init__(self, user_test_id: str):
+        self.user_test_id = user_test_id
+        # scored answers + user responses, filled by get_user_embedding_data
+        self.combined_data: Optional[Dict[str, Any]] = None
+
+    @cached_property
+    def user_doc(self) -> Optional[Dict[str, Any]]:
+        return get_user_test(self.user_test_id, include_pointers=True)
+
+    @property
+    def exists(self) -> bool:
+        return self.user_doc is not None
+
+    @cached_property
+    def latest_attempt(self) -> int:
+        # served from the pointer on the already fetched user_tests doc
+        return get_latest_attempt_number(self.user_test_id, self.user_doc or {})
+
+    @cached_property
+    def follow_ups(self) -> List[Dict[str, Any]]:
+        """Follow-up answers of the latest attempt."""
+        return get_follow_up_answers_by_user(self.user_test_id, self.latest_attempt)
+
+    @cached_property
+    def generated_questions(self) -> List[Dict[str, Any]]:
+        """Generated questions of the latest attempt."""
+        return get_generated_questions(self.user_test_id, self.latest_attempt)
@@ -1,6 +1,13 @@
 # acts as the API endpoint. It receives requests from Dart, performs the computation or data retrieval, and returns a response.
 
-from fastapi import APIRouter, Body, Query
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
+
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from schemas.assessment import (
     SkillReflectionRequest,
     FollowUpResponses,
@@ -8,14 +15,19 @@ from schemas.assessment import (
     UserProfileMatchResponse,
     UserResponses,
 )
-from services.questions_generation_service import generate_questions
+from services.question_bank_service import (
+    astream_assessment_questions,
+    get_assessment_questions,
+)
 from services.charts_generation_service import (
     compute_and_save_charts_for_all_jobs,
 )
 from services.embedding_service import (
     create_user_embedding,
+    iter_job_matches,
     match_user_to_job,
     analyze_user_skills_knowledge,
+    query_similar_jobs,
 )
 from services.gap_analysis_service import (
     compute_gap_for_single_job,
@@ -25,24 +37,140 @@ from services.report_generation_service import get_report_data
 from models.firestore_models import (
     create_user_test,
     add_user_skills_knowledge,
-    add_generated_question,
+    add_generated_questions,
+    add_follow_up_answers,
     get_all_jobs,
     get_generated_questions,
     add_career_recommendation,
-    add_job_match,
+    add_job_matches,
     get_job_matches,
     get_recommendation_id_by_user_test_id,
     get_user_test,
+    get_test_owner,
 )
 from services.career_roadmaps_service import (
     compute_career_roadmaps,
     retrieve_career_roadmap,
 )
+from models.user_test_context import UserTestContext
+from core.blob_store import get_blob_store
 from core.database import db  # Firestore client
+from core.job_queue import (
+    FINISHED,
+    SUCCEEDED,
+    IdempotencyKeyReused,
+    get_job_queue,
+    job_handler,
+)
+from core.model_loader import is_initialized
+from core.single_flight import SingleFlight
+from core.streaming import SSE_HEADERS, SSE_MEDIA_TYPE, StreamTimer, sse_event
 
 router = APIRouter()
 
 
+def require_models_ready():
+    """Fail fast with 503 while the embedding model and job corpus are loading."""
+    if not is_initialized():
+        raise HTTPException(
+            status_code=503,
+            detail="AI models are still loading. Please retry shortly.",
+            headers={"Retry-After": "5"},
+        )
+
+
+def wants_async(prefer) -> bool:
+    """Whether the client asked for a background job ("Prefer: respond-async")."""
+    return bool(prefer) and "respond-async" in prefer.lower()
+
+
+def job_accepted(job_id: str, headers: dict = None) -> JSONResponse:
+    """202 with the URL to poll for the job's result."""
+    status_url = f"/jobs/{job_id}"
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": job_id,
+            "status": get_job_queue().get(job_id)["status"],
+            "status_url": status_url,
+        },
+        headers={"Location": status_url, **(headers or {})},
+    )
+
+
+def enqueue_job(
+    kind: str, payload: dict, flight_key: str = None, idempotency_key: str = None
+) -> JSONResponse:
+    """Queue a pipeline job (or find the job it duplicates)."""
+    try:
+        job_id = get_job_queue().submit(kind, payload, flight_key, idempotency_key)
+    except IdempotencyKeyReused as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return job_accepted(job_id, {"Preference-Applied": "respond-async"})
+
+
+def find_job(kind: str, flight_key: str, payload: dict, idempotency_key: str = None):
+    """The job a pipeline request duplicates (see JobQueue.find), or None."""
+    try:
+        return get_job_queue().find(kind, flight_key, idempotency_key, payload)
+    except IdempotencyKeyReused as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def attempt_payload(user_test_id: str) -> dict:
+    """Payload of a per-test pipeline: the test and its assessment attempt."""
+    _, attempt_number = get_test_owner(user_test_id)
+    return {"user_test_id": user_test_id, "attempt_number": attempt_number}
+
+
+def attempt_flight_key(payload: dict) -> str:
+    """Flight key of an attempt_payload, so runs are never shared across attempts."""
+    return f"{payload['user_test_id']}:{payload.get('attempt_number')}"
+
+
+# concurrent identical pipeline requests in this process share one run
+_pipeline_flights = SingleFlight()
+# how long a request waits for the job it duplicates before answering 202
+# with that job's URL instead
+PIPELINE_WAIT_SECONDS = 120
+
+
+def run_pipeline(
+    kind: str,
+    flight_key: str,
+    payload: dict,
+    run,
+    prefer: str = None,
+    idempotency_key: str = None,
+):
+    """
+    Run a pipeline request once. flight_key identifies identical work
+    (user test and attempt, see attempt_flight_key): a duplicate
+    that arrives while it runs, inline or as a job, waits for that run and
+    gets the same result. With an Idempotency-Key, a retry after a
+    successful run gets the stored result; the key sent with another request
+    is rejected (422). "Prefer: respond-async" queues it as a job.
+    """
+    if wants_async(prefer):
+        return enqueue_job(kind, payload, flight_key, idempotency_key)
+
+    queue = get_job_queue()
+    job_id = find_job(kind, flight_key, payload, idempotency_key)
+    if job_id is not None:
+        print(f"[SINGLE-FLIGHT] {kind} {flight_key}: waiting for job {job_id}")
+        try:
+            job = queue.wait(job_id, timeout=PIPELINE_WAIT_SECONDS)
+        except TimeoutError:
+            return job_accepted(job_id)
+        if job is not None and job["status"] == SUCCEEDED:
+            return job["result"]
+
+    result = jsonable_encoder(_pipeline_flights.do((kind, flight_key), run))
+    if idempotency_key and not (isinstance(result, dict) and result.get("error")):
+        queue.record(kind, result, idempotency_key, flight_key, payload)
+    return result
+
+
 # -----------------------------
 # Submit user test responses
 # -----------------------------
@@ -67,45 +195,25 @@ def submit_test(data: UserResponses):
 # -----------------------------
 # Generate follow-up questions
 # -----------------------------
-@router.post("/generate-questions")
-def create_follow_up_questions(data: SkillReflectionRequest):
+def _question_inputs(user_test_id: str) -> dict:
+    """
+    Attempt number and reflection texts of a user test for question
+    generation, or {"error": ...}.
+    """
     # get the user test document
-    user_ref = db.collection("user_tests").document(data.user_test_id).get()
-    print(f"Checked user_tests/{data.user_test_id} - exists: {user_ref.exists}")
+    user_ref = db.collection("user_tests").document(user_test_id).get()
+    print(f"Checked user_tests/{user_test_id} - exists: {user_ref.exists}")
 
     if not user_ref.exists:
         return {"error": "User test not found"}
 
-    # find which user owns this test (look in users collection)
-    print(
-        f"Querying users where assessmentAttempts contains testId: {data.user_test_id}"
-    )
-
-    user_query = (
-        db.collection("users")
-        .where("testIds", "array_contains", data.user_test_id)
-        .limit(1)
-    )
-
-    user_docs = list(user_query.stream())
-    print(f"Found {len(user_docs)} users with this testId")
-
-    user_doc = user_docs[0]
-    user_data = user_doc.to_dict()
-
-    # get the attempt number from assessmentAttempts
-    assessment_attempts = user_data.get("assessmentAttempts", [])
-    attempt_number = 1  # default if not found
-
-    for attempt in assessment_attempts:
-        if attempt.get("testId") == data.user_test_id:
-            attempt_number = attempt.get("attemptNumber", 1)
-            break
-
-    print(f"User attempt number for {data.user_test_id}: {attempt_number}")
+    # owning user and its attemptNumber: pointers on user_tests once resolved
+    user_test_data = user_ref.to_dict()
+    owner_id, attempt_number = get_test_owner(user_test_id, user_test_data)
+    print(f"Owner of {user_test_id}: {owner_id}")
+    print(f"User attempt number for {user_test_id}: {attempt_number}")
 
     # get reflection data from saved user test document
-    user_test_data = user_ref.to_dict()
     skill_reflection = user_test_data.get("skillReflection")
     thesis_findings = user_test_data.get("thesisFindings")
     career_goals = user_test_data.get("careerGoals")
@@ -113,46 +221,137 @@ def create_follow_up_questions(data: SkillReflectionRequest):
     if not skill_reflection and not thesis_findings and not career_goals:
         return {"error": "Insufficient data to generate questions"}
 
-    # pass all three into service (allowing service to handle None/empty)
-    result = generate_questions(
-        skill_reflection=skill_reflection,
-        thesis_findings=thesis_findings,
-        career_goals=career_goals,
+    return {
+        "attempt_number": attempt_number,
+        "skill_reflection": skill_reflection,
+        "thesis_findings": thesis_findings,
+        "career_goals": career_goals,
+    }
+
+
+def _save_questions(user_test_id: str, raw_questions: list, attempt_number) -> list:
+    """Save generated questions; returns the saved ones with their ids."""
+    # one batched commit for the whole set instead of a write per question
+    question_ids = add_generated_questions(
+        user_id=user_test_id,
+        questions=[
+            {
+                "question_text": q.get("question", ""),
+                "code": q.get("code", None),
+                "language": q.get("language", None),
+                "options": q.get("options", []),
+                "answer": q.get("answer", ""),
+                "difficulty": q.get("difficulty", "easy"),
+                "question_type": q.get("category", "general"),
+            }
+            for q in raw_questions
+        ],
+        test_attempt=attempt_number,  # use attempt_number from assessmentAttempts
     )
-    raw_questions = result.get("questions", [])
 
     saved_questions = []
-    for q in raw_questions:
-        try:
-            question_id = add_generated_question(
-                user_id=data.user_test_id,
-                question_text=q.get("question", ""),
-                code=q.get("code", None),
-                language=q.get("language", None),
-                options=q.get("options", []),
-                answer=q.get("answer", ""),
-                difficulty=q.get("difficulty", "easy"),
-                question_type=q.get("category", "general"),
-                test_attempt=attempt_number,  # use attempt_number from assessmentAttempts
-            )
-            saved_questions.append(
-                {
-                    "id": question_id,
-                    "question": q.get("question", ""),
-                    "code": q.get("code", None),
-                    "language": q.get("language", None),
-                    "options": q.get("options", []),
-                    "answer": q.get("answer", ""),
-                    "difficulty": q.get("difficulty", "easy"),
-                    "category": q.get("category", "general"),
-                    "test_attempt": attempt_number,
-                }
-            )
-        except Exception as e:
-            print(f"[ERROR] Failed to save question: {str(e)}")
+    for q, question_id in zip(raw_questions, question_ids):
+        if question_id is None:
+            print(f"[ERROR] Failed to save question: {q.get('question', '')[:50]}")
+            continue
+        saved_questions.append(
+            {
+                "id": question_id,
+                "question": q.get("question", ""),
+                "code": q.get("code", None),
+                "language": q.get("language", None),
+                "options": q.get("options", []),
+                "answer": q.get("answer", ""),
+                "difficulty": q.get("difficulty", "easy"),
+                "category": q.get("category", "general"),
+                "test_attempt": attempt_number,
+            }
+        )
+    return saved_questions
+
+
+@router.post("/generate-questions")
+def create_follow_up_questions(data: SkillReflectionRequest):
+    inputs = _question_inputs(data.user_test_id)
+    if "error" in inputs:
+        return inputs
+
+    # pass all three into service (allowing service to handle None/empty)
+    # served from the question bank when it covers the user's topics
+    result = get_assessment_questions(
+        skill_reflection=inputs["skill_reflection"],
+        thesis_findings=inputs["thesis_findings"],
+        career_goals=inputs["career_goals"],
+    )
+    saved_questions = _save_questions(
+        data.user_test_id, result.get("questions", []), inputs["attempt_number"]
+    )
 
     print(f"=== DEBUG END: Generated {len(saved_questions)} questions ===")
-    return {"questions": saved_questions}
+    return {"questions": saved_questions, "metadata": result.get("metadata", {})}
+
+
+async def _question_events(user_test_id: str):
+    """
+    SSE events: "questions" per MCQ batch as soon as it is validated and
+    saved, then "done" (metadata and timings) or "error".
+    """
+    timer = StreamTimer("generate-questions")
+    inputs = await asyncio.to_thread(_question_inputs, user_test_id)
+    if "error" in inputs:
+        timer.finish()
+        yield sse_event("error", inputs)
+        return
+
+    batches = asyncio.Queue()
+    task = asyncio.ensure_future(
+        astream_assessment_questions(
+            inputs["skill_reflection"],
+            inputs["thesis_findings"],
+            inputs["career_goals"],
+            on_batch=batches.put_nowait,
+        )
+    )
+    task.add_done_callback(lambda _: batches.put_nowait(None))
+
+    count = 0
+    while True:
+        batch = await batches.get()
+        if batch is None:
+            break
+        saved_questions = await asyncio.to_thread(
+            _save_questions, user_test_id, batch, inputs["attempt_number"]
+        )
+        count += len(saved_questions)
+        timer.useful()
+        yield sse_event("questions", {"questions": saved_questions})
+
+    try:
+        result = task.result()
+    except Exception as e:
+        print(f"[ERROR] Question stream failed for {user_test_id}: {e}")
+        timer.finish()
+        yield sse_event("error", {"error": f"Question generation failed: {e}"})
+        return
+    if result.get("metadata", {}).get("error"):
+        timer.finish()
+        yield sse_event("error", {"error": result["metadata"]["error"]})
+        return
+    print(f"=== DEBUG END: Streamed {count} questions ===")
+    yield sse_event(
+        "done",
+        {"count": count, "metadata": result.get("metadata", {}), **timer.finish()},
+    )
+
+
+@router.post("/generate-questions/stream")
+def stream_follow_up_questions(data: SkillReflectionRequest):
+    """/generate-questions as server-sent events (see _question_events)."""
+    return StreamingResponse(
+        _question_events(data.user_test_id),
+        media_type=SSE_MEDIA_TYPE,
+        headers=SSE_HEADERS,
+    )
 
 
 # -----------------------------
@@ -172,39 +371,67 @@ def get_all_generated_questions(request: dict):
 # -----------------------------
 @router.post("/submit-follow-up")
 def submit_follow_up(data: FollowUpResponses):
-    for resp in data.responses:
-        try:
-            db.collection("follow_up_answers").document().set(
-                {
-                    "user_test_id": resp.user_test_id,
-                    "question_id": resp.questionId,
-                    "selected_option": resp.selectedOption,
-                    "test_attempt": resp.test_attempt,
-                }
-            )
-        except Exception as e:
-            print(f"[ERROR] Failed to save follow-up answer: {str(e)}")
+    # all answers go in one batched commit
+    result = add_follow_up_answers(
+        [
+            {
+                "user_test_id": resp.user_test_id,
+                "question_id": resp.questionId,
+                "selected_option": resp.selectedOption,
+                "test_attempt": resp.test_attempt,
+            }
+            for resp in data.responses
+        ]
+    )
+    if result["failed"]:
+        print(f"[ERROR] Failed to save {len(result['failed'])} follow-up answers")
+        return {
+            "message": "Some follow-up answers could not be saved",
+            "failed_question_ids": [f["question_id"] for f in result["failed"]],
+        }
     return {"message": "Follow-up answers saved successfully"}
 
 
 # -----------------------------
 # Generate user profile and job matches
 # -----------------------------
-@router.post("/user-profile-match", response_model=UserProfileMatchResponse)
-def user_profile_match(request: SkillReflectionRequest):
+@router.post(
+    "/user-profile-match",
+    response_model=UserProfileMatchResponse,
+    dependencies=[Depends(require_models_ready)],
+)
+def user_profile_match(
+    request: SkillReflectionRequest,
+    prefer: str = Header(None),
+    idempotency_key: str = Header(None),
+):
+    payload = attempt_payload(request.user_test_id)
+    return run_pipeline(
+        "user-profile-match",
+        attempt_flight_key(payload),
+        payload,
+        lambda: jsonable_encoder(profile_match(request.user_test_id)),
+        prefer,
+        idempotency_key,
+    )
+
+
+def profile_match(user_test_id: str) -> UserProfileMatchResponse:
     print(f"=== USER-PROFILE-MATCH CALLED ===")
-    print(f"Request received for user_test_id: {request.user_test_id}")
+    print(f"Request received for user_test_id: {user_test_id}")
 
-    user_ref = db.collection("user_tests").document(request.user_test_id).get()
-    if not user_ref.exists:
+    # every service below reads the user test through this context, so each
+    # Firestore document/query is fetched once per request
+    context = UserTestContext(user_test_id)
+    if not context.exists:
         print(f"ERROR: User test not found")
         return UserProfileMatchResponse(
             profile_text="",
             top_matches=[],
-            error=f"User test ID {request.user_test_id} not found",
+            error=f"User test ID {user_test_id} not found",
         )
 
-    user_data = create_user_embedding(request.user_test_id)
+    user_data = create_user_embedding(user_test_id, context)
     if not user_data or "error" in user_data:
         return UserProfileMatchResponse(
             profile_text="",
@@ -213,21 +440,10 @@ def user_profile_match(request: SkillReflectionRequest):
         )
 
     # analyze skills/knowledge
-    try:
-        skills_knowledge_result = analyze_user_skills_knowledge(request.user_test_id)
-        if skills_knowledge_result and "error" not in skills_knowledge_result:
-            print(
-                f"[INFO] Skills/Knowledge saved for user_test_id {request.user_test_id}"
-            )
-            print(f"Extracted skills: {skills_knowledge_result.get('skills', [])}")
-            print(
-                f"Extracted knowledge: {skills_knowledge_result.get('knowledge', [])}"
-            )
-    except Exception as e:
-        print(f"[ERROR] Skills/Knowledge analysis failed: {str(e)}")
+    _analyze_skills_knowledge(user_test_id, context)
 
     # match jobs
-    matches = match_user_to_job(request.user_test_id, user_data.get("user_embedding"))
+    matches = match_user_to_job(user_test_id, user_data.get("user_embedding"))
 
     print(f"Matches found: {matches is not None}")
     print(f"Matches has error: {'error' in matches if matches else 'No matches'}")
@@ -242,43 +458,193 @@ def user_profile_match(request: SkillReflectionRequest):
         )
 
     # save into Firestore
+    _save_profile_match(
+        user_test_id,
+        user_data.get("profile_text", ""),
+        matches.get("top_matches", []),
+    )
+
+    return UserProfileMatchResponse(
+        profile_text=user_data.get("profile_text", ""),
+        top_matches=[_job_match(job) for job in matches.get("top_matches", [])],
+    )
+
+
+def _streamed_profile_match(user_test_id: str, emit) -> dict:
+    """
+    profile_match for the stream: emit("profile", ...) once the profile text
+    is built and emit("job_match", ...) per job as soon as its summary and
+    skills are ready (completion order; job_index is the rank). Returns the
+    /user-profile-match response plus the saved recommendation_id.
+    """
+    context = UserTestContext(user_test_id)
+    if not context.exists:
+        return {
+            "profile_text": "",
+            "top_matches": [],
+            "error": f"User test ID {user_test_id} not found",
+        }
+
+    user_data = create_user_embedding(user_test_id, context)
+    if not user_data or "error" in user_data:
+        return {
+            "profile_text": "",
+            "top_matches": [],
+            "error": f"User embedding failed: {user_data.get('error', 'Unknown error') if user_data else 'No data returned'}",
+        }
+    profile_text = user_data.get("profile_text", "")
+    emit("profile", {"profile_text": profile_text})
+
+    # the skills analysis only feeds later steps (gap analysis), so it
+    # runs alongside the job matching instead of before it
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        analysis = executor.submit(_analyze_skills_knowledge, user_test_id, context)
+        similar_jobs = query_similar_jobs(user_data.get("user_embedding"), top_k=3)
+        top_matches = []
+        for job in iter_job_matches(user_test_id, similar_jobs):
+            top_matches.append(job)
+            emit("job_match", jsonable_encoder(_job_match(job)))
+        analysis.result()
+
+    rec_id = None
+    if top_matches:
+        top_matches.sort(key=lambda job: job["job_index"])
+        rec_id = _save_profile_match(user_test_id, profile_text, top_matches)
+    return {
+        "profile_text": profile_text,
+        "top_matches": [jsonable_encoder(_job_match(job)) for job in top_matches],
+        "recommendation_id": rec_id,
+    }
+
+
+def _profile_match_events(payload: dict, idempotency_key: str = None):
+    """
+    SSE events: "profile", then "job_match" per job, then "done" after
+    saving, or "error". The match runs as the /user-profile-match pipeline,
+    so a duplicate request shares one run: events stream live when this
+    request runs it, and are replayed from the result when another request
+    (or an earlier one with the same Idempotency-Key) did. "job" with the
+    job's URL if that run is a background job that is still going.
+    """
+    user_test_id = payload["user_test_id"]
+    timer = StreamTimer("user-profile-match")
+    events = Queue()
+    executor = ThreadPoolExecutor(max_workers=1)
+    pipeline = executor.submit(
+        run_pipeline,
+        "user-profile-match",
+        attempt_flight_key(payload),
+        payload,
+        lambda: _streamed_profile_match(
+            user_test_id, lambda event, data: events.put((event, data))
+        ),
+        None,
+        idempotency_key,
+    )
+    pipeline.add_done_callback(lambda _: events.put(None))
+    executor.shutdown(wait=False)
+
+    streamed = False
+    while True:
+        event = events.get()
+        if event is None:
+            break
+        streamed = True
+        timer.useful()
+        yield sse_event(*event)
+
     try:
-        rec_id = add_career_recommendation(
-            request.user_test_id, profile_text=user_data.get("profile_text", "")
-        )
-        print(f"SUCCESS: Created career recommendation ID: {rec_id}")
+        result = pipeline.result()
+    except Exception as e:
+        print(f"[ERROR] Profile match stream failed for {user_test_id}: {e}")
+        timer.finish()
+        yield sse_event("error", {"error": f"Profile match failed: {e}"})
+        return
+    if isinstance(result, JSONResponse):
+        timer.finish()
+        yield sse_event("job", json.loads(result.body))
+        return
+    if result.get("error"):
+        timer.finish()
+        yield sse_event("error", {"error": result["error"]})
+        return
+
+    if not streamed:
+        timer.useful()
+        yield sse_event("profile", {"profile_text": result["profile_text"]})
+        for job in result["top_matches"]:
+            yield sse_event("job_match", job)
+    yield sse_event(
+        "done",
+        {
+            "recommendation_id": result.get("recommendation_id"),
+            "count": len(result["top_matches"]),
+            **timer.finish(),
+        },
+    )
+
+
+@router.post(
+    "/user-profile-match/stream",
+    dependencies=[Depends(require_models_ready)],
+)
+def stream_user_profile_match(
+    request: SkillReflectionRequest, idempotency_key: str = Header(None)
+):
+    """/user-profile-match as server-sent events (see _profile_match_events)."""
+    payload = attempt_payload(request.user_test_id)
+    # a reused Idempotency-Key is rejected before the stream starts
+    find_job(
+        "user-profile-match", attempt_flight_key(payload), payload, idempotency_key
+    )
+    return StreamingResponse(
+        _profile_match_events(payload, idempotency_key),
+        media_type=SSE_MEDIA_TYPE,
+        headers=SSE_HEADERS,
+    )
 
-        for job in matches.get("top_matches", []):
-            add_job_match(
-                recommendation_id=rec_id,
-                job_id=str(job.get("job_index", "")),
-                job_title=job.get("job_title", ""),
-                job_description=job.get("job_description", ""),
-                similarity_score=job.get("similarity_score", 0.0),
-                similarity_percentage=job.get("similarity_percentage", 0.0),
-                required_skills=job.get("required_skills", {}),
-                required_knowledge=job.get("required_knowledge", {}),
+
+def _analyze_skills_knowledge(user_test_id: str, context: UserTestContext):
+    try:
+        skills_knowledge_result = analyze_user_skills_knowledge(user_test_id, context)
+        if skills_knowledge_result and "error" not in skills_knowledge_result:
+            print(f"[INFO] Skills/Knowledge saved for user_test_id {user_test_id}")
+            print(f"Extracted skills: {skills_knowledge_result.get('skills', [])}")
+            print(
+                f"Extracted knowledge: {skills_knowledge_result.get('knowledge', [])}"
             )
-            print(f"SUCCESS: Saved {len(matches.get('top_matches', []))} job matches")
     except Exception as e:
-        print(f"[ERROR] Failed to save career recommendation/job matches: {str(e)}")
+        print(f"[ERROR] Skills/Knowledge analysis failed: {str(e)}")
 
-    top_matches_list = [
-        JobMatch(
-            job_index=str(job.get("job_index", "")),
-            job_title=job.get("job_title", ""),
-            job_description=job.get("job_description", ""),
-            similarity_score=job.get("similarity_score", 0.0),
-            similarity_percentage=job.get("similarity_percentage", 0.0),
-            required_skills=job.get("required_skills", {}),
-            required_knowledge=job.get("required_knowledge", {}),
-        )
-        for job in matches.get("top_matches", [])
-    ]
 
-    return UserProfileMatchResponse(
-        profile_text=user_data.get("profile_text", ""),
-        top_matches=top_matches_list,
+def _save_profile_match(user_test_id: str, profile_text: str, top_matches: list):
+    """Save the career recommendation and its job matches; returns its id."""
+    try:
+        rec_id = add_career_recommendation(user_test_id, profile_text=profile_text)
+        print(f"SUCCESS: Created career recommendation ID: {rec_id}")
+
+        result = add_job_matches(
+            rec_id,
+            [{**job, "job_id": str(job.get("job_index", ""))} for job in top_matches],
+        )
+        print(f"SUCCESS: Saved {len(result['written'])} job matches")
+        if result["failed"]:
+            print(f"[ERROR] Failed to save {len(result['failed'])} job matches")
+        return rec_id
+    except Exception as e:
+        print(f"[ERROR] Failed to save career recommendation/job matches: {str(e)}")
+        return None
+
+
+def _job_match(job: dict) -> JobMatch:
+    return JobMatch(
+        job_index=str(job.get("job_index", "")),
+        job_title=job.get("job_title", ""),
+        job_description=job.get("job_description", ""),
+        similarity_score=job.get("similarity_score", 0.0),
+        similarity_percentage=job.get("similarity_percentage", 0.0),
+        required_skills=job.get("required_skills", {}),
+        required_knowledge=job.get("required_knowledge", {}),
     )
 
 
@@ -334,16 +700,44 @@ def get_gap_analysis_for_single_job(
 # Charts for All Jobs
 # -----------------------------
 @router.post("/generate-charts/{user_test_id}")
-def run_charts_all(user_test_id: str, data: dict = Body(...)):
+def run_charts_all(
+    user_test_id: str,
+    data: dict = Body(...),
+    prefer: str = Header(None),
+    idempotency_key: str = Header(None),
+):
     """
     Generate charts for all recommended jobs.
-    Requires attempt_number in request body.
+    Requires attempt_number in request body. format "png" (default) renders
+    and saves the chart images, which the admin report list reads from
+    Firestore; format "data" returns the chart series only and leaves PNG
+    rendering to the first report request.
     """
     # get attempt number from request body
     attempt_number = data.get("attempt_number", 1)
+    chart_format = data.get("format", "png")
+    if chart_format not in ("data", "png"):
+        return {"error": "format must be 'data' or 'png'"}
+
+    return run_pipeline(
+        "generate-charts",
+        f"{user_test_id}:{attempt_number}:{chart_format}",
+        {
+            "user_test_id": user_test_id,
+            "attempt_number": attempt_number,
+            "format": chart_format,
+        },
+        lambda: charts_all(user_test_id, attempt_number, chart_format),
+        prefer,
+        idempotency_key,
+    )
 
+
+def charts_all(user_test_id: str, attempt_number, chart_format: str) -> dict:
     # pass both parameters to the function
-    results = compute_and_save_charts_for_all_jobs(user_test_id, attempt_number)
+    results = compute_and_save_charts_for_all_jobs(
+        user_test_id, attempt_number, render_png=chart_format == "png"
+    )
 
     if isinstance(results, dict) and results.get("error"):
         return {"error": results["error"]}
@@ -351,14 +745,42 @@ def run_charts_all(user_test_id: str, data: dict = Body(...)):
     return {"message": "Charts computed", "data": results}
 
 
+# Chart blobs are content-addressed: a hash never changes, so clients and
+# proxies may cache the bytes forever.
+CHART_CACHE_HEADERS = {"Cache-Control": "public, max-age=31536000, immutable"}
+
+
+@router.get("/charts/{chart_hash}")
+def get_chart_image(chart_hash: str, if_none_match: str = Header(None)):
+    """Stream a stored chart PNG by the sha256 kept in the job's chart refs."""
+    store = get_blob_store()
+    size = store.size(chart_hash)
+    if size is None:
+        raise HTTPException(status_code=404, detail="Chart not found")
+
+    etag = f'"{chart_hash}"'
+    headers = {**CHART_CACHE_HEADERS, "ETag": etag}
+    if if_none_match and etag in if_none_match:
+        return Response(status_code=304, headers=headers)
+
+    return StreamingResponse(
+        store.iter_chunks(chart_hash),
+        media_type="image/png",
+        headers={**headers, "Content-Length": str(size)},
+    )
+
+
 # -----------------------------
 # Report Retrieval
 # -----------------------------
 @router.get("/report-retrieval/{user_test_id}/{job_index}")
 # FastAPI automatically extracts user_test_id and job_index from the URL and passes it as the function argument.
-def get_report(user_test_id: str, job_index: str):
-    """Retrieve complete report data including saved charts."""
-    report_data = get_report_data(user_test_id, job_index)
+def get_report(user_test_id: str, job_index: str, charts: str = Query("png")):
+    """
+    Retrieve complete report data including saved charts. charts=data skips
+    rendering PNG charts that are not stored yet; chart_data is always sent.
+    """
+    report_data = get_report_data(user_test_id, job_index, render_png=charts != "data")
 
     if "error" in report_data:
         return report_data
@@ -391,8 +813,24 @@ def get_recent_user_test(user_id: str):
 @router.post(
     "/career-roadmap-generation/all/{user_test_id}"
 )  # FastAPI automatically extracts user_test_id from the URL and passes it as the function argument.
-def generate_career_roadmaps(user_test_id: str):
+def generate_career_roadmaps(
+    user_test_id: str,
+    prefer: str = Header(None),
+    idempotency_key: str = Header(None),
+):
     """Retrieve career roadmaps for all jobs."""
+    payload = attempt_payload(user_test_id)
+    return run_pipeline(
+        "career-roadmap-generation",
+        attempt_flight_key(payload),
+        payload,
+        lambda: career_roadmaps(user_test_id),
+        prefer,
+        idempotency_key,
+    )
+
+
+def career_roadmaps(user_test_id: str) -> dict:
     career_roadmap = compute_career_roadmaps(user_test_id)
 
     if "error" in career_roadmap:
@@ -448,3 +886,76 @@ def get_all_recommended_jobs(user_test_id: str):
         }
     except Exception as e:
         return {"error": f"Failed to retrieve recommended jobs: {str(e)}"}
+
+
+# -----------------------------
+# Background pipeline jobs
+# -----------------------------
+# Handlers run the same code as the synchronous endpoints, in the same
+# single-flight groups; a job's result is the response the endpoint would
+# have returned.
+@job_handler("user-profile-match")
+def _user_profile_match_job(payload: dict):
+    user_test_id = payload["user_test_id"]
+    return _pipeline_flights.do(
+        ("user-profile-match", attempt_flight_key(payload)),
+        lambda: jsonable_encoder(profile_match(user_test_id)),
+    )
+
+
+@job_handler("generate-charts")
+def _charts_job(payload: dict):
+    user_test_id = payload["user_test_id"]
+    attempt_number = payload["attempt_number"]
+    chart_format = payload["format"]
+    return _pipeline_flights.do(
+        ("generate-charts", f"{user_test_id}:{attempt_number}:{chart_format}"),
+        lambda: charts_all(user_test_id, attempt_number, chart_format),
+    )
+
+
+@job_handler("career-roadmap-generation")
+def _career_roadmaps_job(payload: dict):
+    user_test_id = payload["user_test_id"]
+    return _pipeline_flights.do(
+        ("career-roadmap-generation", attempt_flight_key(payload)),
+        lambda: career_roadmaps(user_test_id),
+    )
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Status of a background job; result (or error) once it has finished."""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+# how often /jobs/{id}/events checks the job
+JOB_EVENTS_POLL_SECONDS = 0.5
+
+
+async def _job_events(job_id: str):
+    """SSE events: "status" on each change, then "done" or "error"."""
+    status = None
+    while True:
+        job = await asyncio.to_thread(get_job_queue().get, job_id)
+        if job is None:
+            yield sse_event("error", {"error": "Job not found"})
+            return
+        if job["status"] in FINISHED:
+            yield sse_event("done" if job["error"] is None else "error", job)
+            return
+        if job["status"] != status:
+            status = job["status"]
+            yield sse_event("status", {"job_id": job_id, "status": status})
+        await asyncio.sleep(JOB_EVENTS_POLL_SECONDS)
+
+
+@router.get("/jobs/{job_id}/events")
+def stream_job_events(job_id: str):
+    """Subscribe to a background job instead of polling /jobs/{job_id}."""
+    return StreamingResponse(
+        _job_events(job_id), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS
+    )
@@ -80,3 +80,4 @@ class JobMatch(BaseModel):
 class UserProfileMatchResponse(BaseModel):
     profile_text: str
     top_matches: List[JobMatch]
+    error: Optional[str] = None
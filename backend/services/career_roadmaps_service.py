@@ -1,14 +1,17 @@
 import os
 import json
 import re
+import time
+import hashlib
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
+from core.llm_cache import LLMCache, get_llm_cache
 from models.firestore_models import (
     get_recommendation_id_by_user_test_id,
     get_user_job_skill_matches,
     create_career_roadmap,
     get_career_roadmap,
 )
+from services.embedding_service import submit_llm_task
 
 # -----------------------------
 # Load environment variables
@@ -19,16 +22,33 @@ if not GROQ_API_KEY:
     raise ValueError("GROQ_API_KEY not found. Please set it in your .env file.")
 
 # -----------------------------
-# Initialize LLM
+# LLM (created on first use)
 # -----------------------------
-llm = ChatGroq(model="llama-3.3-70b-versatile", temperature=0.2, groq_api_key=GROQ_API_KEY)
+_llm = None
+ROADMAP_MODEL = "llama-3.3-70b-versatile"
+ROADMAP_TEMPERATURE = 0.2
 
 
-def generate_roadmap_with_openai(skill_status: dict, knowledge_status: dict) -> dict:
-    """
-    Generate career roadmap topics and subtopics using OpenAI.
-    Uses the skill_status and knowledge_status from job_skill_matches.
-    """
+def get_llm():
+    global _llm
+    if _llm is None:
+        from langchain_groq import ChatGroq
+
+        # no LangChain cache: only roadmaps that parse are cached, by gap
+        # signature (see generate_roadmaps)
+        _llm = ChatGroq(
+            model=ROADMAP_MODEL,
+            temperature=ROADMAP_TEMPERATURE,
+            groq_api_key=GROQ_API_KEY,
+        )
+    return _llm
+
+
+def build_roadmap_prompt(skill_status: dict, knowledge_status: dict) -> str:
+    # entries in name order, so profiles with the same gap signature get the
+    # same prompt
+    skill_status = dict(sorted((skill_status or {}).items()))
+    knowledge_status = dict(sorted((knowledge_status or {}).items()))
 
     prompt = f"""
     Create a structured career roadmap based on skill gap analysis:
@@ -72,39 +92,144 @@ def generate_roadmap_with_openai(skill_status: dict, knowledge_status: dict) ->
     
     Return ONLY the JSON object, no markdown code blocks or explanations.
     """
+    return prompt
 
-    try:
-        response = llm.invoke(prompt)
-        response_text = response.content.strip()
-        
-        # Remove markdown code blocks if present
-        if response_text.startswith("```json"):
-            response_text = response_text[7:]
-        elif response_text.startswith("```"):
-            response_text = response_text[3:]
-        if response_text.endswith("```"):
-            response_text = response_text[:-3]
-        response_text = response_text.strip()
-
-        # find JSON in the response
-        json_match = re.search(r"\{.*\}", response_text, re.DOTALL)
-        if json_match:
-            roadmap_data = json.loads(json_match.group())
-            return roadmap_data
 
+def parse_roadmap_response(response_text: str):
+    """Roadmap dict from the LLM's answer, or None if it is not usable."""
+    response_text = response_text.strip()
+
+    # Remove markdown code blocks if present
+    if response_text.startswith("```json"):
+        response_text = response_text[7:]
+    elif response_text.startswith("```"):
+        response_text = response_text[3:]
+    if response_text.endswith("```"):
+        response_text = response_text[:-3]
+    response_text = response_text.strip()
+
+    # find JSON in the response
+    json_match = re.search(r"\{.*\}", response_text, re.DOTALL)
+    if not json_match:
+        return None
+    try:
+        roadmap_data = json.loads(json_match.group())
     except json.JSONDecodeError as e:
         print(f"JSON parse error in roadmap generation: {e}")
-    except Exception as e:
-        print(f"Roadmap API error: {e}")
-    
-    # Return fallback roadmap if generation fails
-    print("Returning fallback roadmap due to generation error")
+        return None
+    if not isinstance(roadmap_data, dict) or not all(
+        isinstance(roadmap_data.get(key), dict) for key in ("topics", "sub_topics")
+    ):
+        return None
+    return roadmap_data
+
+
+def fallback_roadmap() -> dict:
     return {
         "topics": {"Learning Path": "Basic"},
-        "sub_topics": {"Learning Path": ["Review skill gaps", "Practice coding exercises", "Build portfolio projects"]}
+        "sub_topics": {
+            "Learning Path": [
+                "Review skill gaps",
+                "Practice coding exercises",
+                "Build portfolio projects",
+            ]
+        },
     }
 
 
+def gap_signature(skill_status: dict, knowledge_status: dict) -> str:
+    """
+    Canonical key of a gap profile: the sorted (name, user_level,
+    required_level, status) tuples of each section, hashed. Gap profiles
+    that only differ in order share a signature, and so a roadmap.
+    """
+    canonical = {
+        section: sorted(
+            (
+                str(name),
+                str(entry.get("user_level", "")),
+                str(entry.get("required_level", "")),
+                str(entry.get("status", "")),
+            )
+            for name, entry in (status or {}).items()
+        )
+        for section, status in (
+            ("skills", skill_status),
+            ("knowledge", knowledge_status),
+        )
+    }
+    return hashlib.sha256(json.dumps(canonical).encode("utf-8")).hexdigest()
+
+
+def _roadmap_cache_key(signature: str) -> str:
+    return LLMCache.key(
+        ROADMAP_MODEL, ROADMAP_TEMPERATURE, "career-roadmap", signature
+    )
+
+
+def generate_roadmaps(gap_profiles: list) -> list:
+    """
+    Roadmaps for [(skill_status, knowledge_status), ...], in order.
+    Profiles are deduplicated by gap_signature and served from the LLM cache
+    when seen before; the rest are generated concurrently, so a full set
+    costs one LLM round trip (within the shared Groq concurrency cap).
+    Failed generations get the fallback roadmap (not cached).
+    """
+    cache = get_llm_cache()
+    signatures = [gap_signature(*profile) for profile in gap_profiles]
+    roadmaps = {}
+    pending = {}  # signature -> profile still to generate
+    for signature, profile in zip(signatures, gap_profiles):
+        if signature in roadmaps or signature in pending:
+            continue
+        cached = cache.get(_roadmap_cache_key(signature))
+        if cached is not None:
+            roadmaps[signature] = json.loads(cached)
+        else:
+            pending[signature] = profile
+
+    print(
+        f"[ROADMAP] {len(gap_profiles)} jobs, {len(set(signatures))} gap profiles,"
+        f" {len(pending)} to generate"
+    )
+    if pending:
+        start = time.perf_counter()
+        llm = get_llm()
+        calls = [
+            submit_llm_task(llm.invoke, build_roadmap_prompt(*profile))
+            for profile in pending.values()
+        ]
+        for signature, call in zip(pending, calls):
+            roadmap = None
+            try:
+                roadmap = parse_roadmap_response(call.result().content)
+            except Exception as e:
+                print(f"Roadmap API error: {e}")
+            latency = time.perf_counter() - start
+            if roadmap is None:
+                # Return fallback roadmap if generation fails
+                print("Returning fallback roadmap due to generation error")
+                roadmap = fallback_roadmap()
+            else:
+                cache.put(
+                    _roadmap_cache_key(signature),
+                    json.dumps(roadmap),
+                    model=ROADMAP_MODEL,
+                    latency=latency,
+                )
+            roadmaps[signature] = roadmap
+
+    return [roadmaps[signature] for signature in signatures]
+
+
+def generate_roadmap_with_openai(skill_status: dict, knowledge_status: dict) -> dict:
+    """
+    Generate career roadmap topics and subtopics using OpenAI.
+    Uses the skill_status and knowledge_status from job_skill_matches.
+    """
+    return generate_roadmaps([(skill_status, knowledge_status)])[0]
+
+
 def compute_career_roadmaps(user_test_id: str) -> dict:
     """
     Compute Career Roadmaps for all jobs based on the given user_test_id.
@@ -123,19 +248,21 @@ def compute_career_roadmaps(user_test_id: str) -> dict:
         if not recommendation_id:
             return {"error": "No recommendation found for this user test ID."}
 
-        # generate roadmap for each job
+        # generate roadmaps for all jobs at once (concurrent, cached by gap)
+        roadmap_contents = generate_roadmaps(
+            [
+                (
+                    job_match.get("skill_status", {}),
+                    job_match.get("knowledge_status", {}),
+                )
+                for job_match in job_skill_matches
+            ]
+        )
         generated_roadmaps = {}
 
-        for job_match in job_skill_matches:
+        for job_match, roadmap_content in zip(job_skill_matches, roadmap_contents):
             job_match_id = job_match.get("job_match_id")
             job_title = job_match.get("job_title", f"Job_{job_match_id}")
-            skill_status = job_match.get("skill_status", {})
-            knowledge_status = job_match.get("knowledge_status", {})
-
-            # generate roadmap content using OpenAI
-            roadmap_content = generate_roadmap_with_openai(
-                skill_status, knowledge_status
-            )
 
             # save to Firestore (using job_match_id as job_index)
             create_career_roadmap(
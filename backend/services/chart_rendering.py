@@ -0,0 +1,80 @@
+# Chart rasterization with matplotlib's object-oriented Figure API (no pyplot
+# global state), so charts can render concurrently in worker processes.
+# Kept free of Firestore/model imports: pool workers import only this module.
+
+import io
+
+import numpy as np
+
+
+def _figure(figsize):
+    """Import matplotlib on first render so API workers don't load it at boot."""
+    from matplotlib.figure import Figure
+
+    return Figure(figsize=figsize)
+
+
+def _to_png(fig) -> bytes:
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=300, bbox_inches="tight")
+    return buf.getvalue()
+
+
+def radar_chart_png(skills, user_level, required_level) -> bytes:
+    """Render the skill gap radar chart as PNG bytes."""
+    angles = np.linspace(0, 2 * np.pi, len(skills), endpoint=False).tolist()
+    user_level_radar = user_level + user_level[:1]
+    required_level_radar = required_level + required_level[:1]
+    angles += angles[:1]
+
+    fig = _figure((6, 6))
+    ax = fig.add_subplot(111, polar=True)
+
+    soft_red = "#F7A8A8"
+    soft_blue = "#A8D0F7"
+
+    ax.plot(angles, user_level_radar, label="Your Level", color=soft_red, linewidth=2)
+    ax.fill(angles, user_level_radar, color=soft_red, alpha=0.25)
+    ax.plot(
+        angles,
+        required_level_radar,
+        label="Required Level",
+        color=soft_blue,
+        linewidth=2,
+        linestyle="dashed",
+    )
+    ax.fill(angles, required_level_radar, color=soft_blue, alpha=0.1)
+
+    ax.set_xticks(angles[:-1])
+    ax.set_xticklabels(skills)
+    ax.set_yticks([0, 1, 2, 3])
+    ax.set_yticklabels(["Not Detected", "Basic", "Intermediate", "Advanced"])
+    ax.set_title("Skill Gap Analysis", size=12)
+    ax.legend(loc="upper right")
+
+    return _to_png(fig)
+
+
+def bar_chart_png(data: dict) -> bytes:
+    """Render the correct vs incorrect answers bar chart as PNG bytes."""
+    categories = list(data.keys())
+    values = list(data.values())
+
+    fig = _figure((4, 4))
+    ax = fig.add_subplot(111)
+    bars = ax.bar(categories, values, color=["#A8D0F7", "#F7A8A8"])
+    ax.set_title("Overall Test Performance")
+    ax.set_xlabel("Result")
+    ax.set_ylabel("Number of Questions")
+    ax.set_ylim(0, max(values) + 1)
+
+    for bar, value in zip(bars, values):
+        ax.text(
+            bar.get_x() + bar.get_width() / 2,
+            bar.get_height() + 0.1,
+            str(value),
+            ha="center",
+            fontsize=9,
+        )
+
+    return _to_png(fig)
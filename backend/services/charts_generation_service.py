@@ -6,13 +6,13 @@ from models.firestore_models import (
     get_follow_up_answers_by_user,
     save_job_charts,
 )
-import matplotlib
-
-matplotlib.use("Agg")  # non-interactive backend
-import matplotlib.pyplot as plt
-import numpy as np
-import io
-import base64
+from core.blob_store import get_blob_store, png_size
+from services.chart_rendering import bar_chart_png, radar_chart_png
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 # Map text labels to numeric levels
 LEVEL_MAP = {
@@ -22,6 +22,78 @@ LEVEL_MAP = {
     "Advanced": 3,
 }
 
+# Radar charts are rasterized in worker processes; 0 or 1 renders in-process.
+CHART_RENDER_WORKERS = int(
+    os.getenv("CHART_RENDER_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+
+def get_render_pool():
+    """Process pool for chart rendering, started on first use (None = in-process)."""
+    global _render_pool
+    if CHART_RENDER_WORKERS <= 1:
+        return None
+    if _render_pool is None:
+        with _render_pool_lock:
+            if _render_pool is None:
+                # spawn: workers import only services.chart_rendering, not the
+                # forked state (Firestore client, models) of the API process
+                _render_pool = ProcessPoolExecutor(
+                    max_workers=CHART_RENDER_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _render_pool
+
+
+def render_radar_charts(chart_args):
+    """Render [(skills, user_level, required_level), ...] to PNG bytes, in order."""
+    global _render_pool
+    pool = get_render_pool()
+    if pool is not None and len(chart_args) > 1:
+        try:
+            # map the chart_rendering function itself so workers never
+            # import this module (and with it the Firestore client)
+            return list(pool.map(radar_chart_png, *zip(*chart_args)))
+        except BrokenProcessPool:
+            print("[CHARTS] Render pool died, rendering in-process")
+            with _render_pool_lock:
+                _render_pool = None
+    return [radar_chart_png(*args) for args in chart_args]
+
+
+def store_chart(png: bytes) -> dict:
+    """Put a PNG in the blob store; the returned ref is what documents keep."""
+    width, height = png_size(png)
+    return {
+        "sha256": get_blob_store().put(png),
+        "content_type": "image/png",
+        "width": width,
+        "height": height,
+        "size": len(png),
+    }
+
+
+def chart_url(digest: str) -> str:
+    return f"/charts/{digest}"
+
+
+def with_chart_urls(charts: dict) -> dict:
+    """
+    Add the streaming URL to each stored chart ref. Charts saved before the
+    blob store (inline base64 strings) are returned unchanged.
+    """
+    return {
+        name: (
+            {**ref, "url": chart_url(ref["sha256"])}
+            if isinstance(ref, dict) and "sha256" in ref
+            else ref
+        )
+        for name, ref in (charts or {}).items()
+    }
+
 
 def normalize_level(level):
     """Convert skill level text/number into a consistent numeric scale."""
@@ -32,46 +104,6 @@ def normalize_level(level):
     return LEVEL_MAP.get(str(level).strip(), 0)
 
 
-def generate_radar_chart(skills, user_level, required_level):
-    """Generate radar chart and return as base64 string."""
-    angles = np.linspace(0, 2 * np.pi, len(skills), endpoint=False).tolist()
-    user_level_radar = user_level + user_level[:1]
-    required_level_radar = required_level + required_level[:1]
-    angles += angles[:1]
-
-    plt.figure(figsize=(6, 6))
-    ax = plt.subplot(111, polar=True)
-
-    soft_red = "#F7A8A8"
-    soft_blue = "#A8D0F7"
-
-    ax.plot(angles, user_level_radar, label="Your Level", color=soft_red, linewidth=2)
-    ax.fill(angles, user_level_radar, color=soft_red, alpha=0.25)
-    ax.plot(
-        angles,
-        required_level_radar,
-        label="Required Level",
-        color=soft_blue,
-        linewidth=2,
-        linestyle="dashed",
-    )
-    ax.fill(angles, required_level_radar, color=soft_blue, alpha=0.1)
-
-    ax.set_xticks(angles[:-1])
-    ax.set_xticklabels(skills)
-    ax.set_yticks([0, 1, 2, 3])
-    ax.set_yticklabels(["Not Detected", "Basic", "Intermediate", "Advanced"])
-    ax.set_title("Skill Gap Analysis", size=12)
-    ax.legend(loc="upper right")
-
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png", dpi=300, bbox_inches="tight")
-    buf.seek(0)
-    plt.close()
-
-    return base64.b64encode(buf.getvalue()).decode("utf-8")
-
-
 def calculate_test_performance(user_test_id: str, attempt_number: int):
     """Calculate total correct vs incorrect answers."""
     questions = get_generated_questions(user_test_id, attempt_number)
@@ -98,39 +130,59 @@ def calculate_test_performance(user_test_id: str, attempt_number: int):
     return {"Correct": correct, "Incorrect": incorrect}
 
 
-def generate_bar_chart(data: dict):
-    """Generate bar chart showing how many answers are correct vs incorrect."""
-    categories = list(data.keys())
-    values = list(data.values())
-
-    plt.figure(figsize=(4, 4))
-    bars = plt.bar(categories, values, color=["#A8D0F7", "#F7A8A8"])
-    plt.title("Overall Test Performance")
-    plt.xlabel("Result")
-    plt.ylabel("Number of Questions")
-    plt.ylim(0, max(values) + 1)
-
-    for bar, value in zip(bars, values):
-        plt.text(
-            bar.get_x() + bar.get_width() / 2,
-            bar.get_height() + 0.1,
-            str(value),
-            ha="center",
-            fontsize=9,
+def chart_series(job: dict, user_skills_raw: dict) -> dict:
+    """Radar chart series for one job, on the LEVEL_MAP scale (0-3)."""
+    job_skills_raw = job.get("required_skills", {})
+
+    skills = list(job_skills_raw.keys())
+    required_level = [normalize_level(job_skills_raw.get(skill, 0)) for skill in skills]
+    user_level = [
+        normalize_level(
+            user_skills_raw.get(skill)
+            or user_skills_raw.get(skill.lower())
+            or user_skills_raw.get(skill.title())
+            or 0
         )
+        for skill in skills
+    ]
+    return {
+        "skills": skills,
+        "user_levels": user_level,
+        "required_levels": required_level,
+    }
 
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png", dpi=300, bbox_inches="tight")
-    buf.seek(0)
-    plt.close()
 
-    return base64.b64encode(buf.getvalue()).decode("utf-8")
+def _radar_args(radar: dict):
+    return radar["skills"], radar["user_levels"], radar["required_levels"]
 
 
-def compute_and_save_charts_for_all_jobs(user_test_id: str, attempt_number: int):
+def ensure_job_charts(rec_id: str, job: dict) -> dict:
+    """
+    Chart refs for a job, rendering and saving them from the job's
+    chart_data on first request. Jobs charted in data-only mode get their
+    PNGs only if someone actually asks for them.
+    """
+    charts = job.get("charts") or {}
+    chart_data = job.get("chart_data")
+    if charts or not chart_data:
+        return with_chart_urls(charts)
+
+    charts = {
+        "radar_chart": store_chart(radar_chart_png(*_radar_args(chart_data["radar"]))),
+        "result_chart": store_chart(bar_chart_png(chart_data["performance"])),
+    }
+    save_job_charts(rec_id, str(job["job_index"]), charts)
+    return with_chart_urls(charts)
+
+
+def compute_and_save_charts_for_all_jobs(
+    user_test_id: str, attempt_number: int, render_png: bool = False
+):
     """
-    Compute radar and bar charts for all jobs linked to the user's recommendation.
-    Uses Firestore model functions only.
+    Compute chart data for all jobs linked to the user's recommendation:
+    the radar series per job and the attempt's correct/incorrect counts.
+    With render_png the PNG charts are rendered now as well; otherwise they
+    are rendered lazily by ensure_job_charts when a report asks for them.
     """
     # retrieve recommendation id from career recommendations
     rec_id = get_recommendation_id_by_user_test_id(user_test_id)
@@ -147,49 +199,43 @@ def compute_and_save_charts_for_all_jobs(user_test_id: str, attempt_number: int)
         return {"error": "No jobs found for this recommendation."}
 
     user_data = get_user_skills_knowledge(user_test_id)
-    results = []
+    user_skills_raw = user_data.get("skills", {})
+    radars = [chart_series(job, user_skills_raw) for job in recommended_jobs]
 
-    for job in recommended_jobs:
-        job_skills_raw = job.get("required_skills", {})
-        user_skills_raw = user_data.get("skills", {})
+    # test performance is per attempt, not per job: compute and render it once
+    test_performance = calculate_test_performance(user_test_id, attempt_number)
 
-        skills = list(job_skills_raw.keys())
-        required_level = [
-            normalize_level(job_skills_raw.get(skill, 0)) for skill in skills
-        ]
-        user_level = [
-            normalize_level(
-                user_skills_raw.get(skill)
-                or user_skills_raw.get(skill.lower())
-                or user_skills_raw.get(skill.title())
-                or 0
-            )
-            for skill in skills
+    if render_png:
+        result_chart = store_chart(bar_chart_png(test_performance))
+        radar_charts = [
+            store_chart(png)
+            for png in render_radar_charts([_radar_args(r) for r in radars])
         ]
+    else:
+        result_chart = None
+        radar_charts = [None] * len(radars)
 
-        # generate charts
-        radar_chart_base64 = generate_radar_chart(skills, user_level, required_level)
-        test_performance = calculate_test_performance(user_test_id, attempt_number)
-        result_chart = generate_bar_chart(test_performance)
-
-        # prepare charts data to be saved
-        charts_data = {
-            "radar_chart": radar_chart_base64,
-            "result_chart": result_chart,
-        }
+    results = []
+    for job, radar, radar_chart in zip(recommended_jobs, radars, radar_charts):
+        chart_data = {"radar": radar, "performance": test_performance}
+        # documents keep only the blob refs, not the image bytes; in
+        # data-only mode the refs of a previous attempt are cleared
+        charts_data = (
+            {"radar_chart": radar_chart, "result_chart": result_chart}
+            if render_png
+            else {}
+        )
 
         # save charts to Firestore
-        save_job_charts(rec_id, str(job["job_index"]), charts_data)
-
-        results.append(
-            {
-                "rec_id": rec_id,
-                "job_index": str(job["job_index"]),
-                "charts": {
-                    "radar_chart": radar_chart_base64,
-                    "result_chart": result_chart,
-                },
-            }
-        )
+        save_job_charts(rec_id, str(job["job_index"]), charts_data, chart_data)
+
+        result = {
+            "rec_id": rec_id,
+            "job_index": str(job["job_index"]),
+            "chart_data": chart_data,
+        }
+        if render_png:
+            result["charts"] = with_chart_urls(charts_data)
+        results.append(result)
 
     return results
@@ -1,21 +1,18 @@
 import os
 import re
 import json
-from typing import Any, Dict, List
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional
 from dotenv import load_dotenv
-from groq import Groq
 import numpy as np
 import core.model_loader as loader
-from core.database import db
+from core.llm_cache import llm_cached
+from core.vector_index import top_k_unique
 from schemas.assessment import UserResponses
-from services.pinecone_service import PineconeService
 from services.scoring_service import calculate_score
-from models.firestore_models import (
-    get_follow_up_answers_by_user,
-    get_generated_questions,
-    add_user_skills_knowledge,
-    get_latest_attempt_number,
-)
+from models.firestore_models import add_user_skills_knowledge
+from models.user_test_context import UserTestContext
 
 # -----------------------------
 # Env & Groq client
@@ -25,38 +22,95 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     raise ValueError("GROQ_API_KEY not found. Please set it in your .env file.")
 
-client = Groq(api_key=GROQ_API_KEY)
+# clients are created on first use so importing this module stays cheap
+_client = None
+_pinecone_service = None
+
+
+def get_groq_client():
+    global _client
+    if _client is None:
+        from groq import Groq
+
+        _client = Groq(api_key=GROQ_API_KEY)
+    return _client
+
+
+def get_pinecone_service():
+    """Connect to Pinecone on first use instead of at import."""
+    global _pinecone_service
+    if _pinecone_service is None:
+        from services.pinecone_service import PineconeService
+
+        _pinecone_service = PineconeService(index_name="code-map")
+    return _pinecone_service
 
-# initialize Pinecone service
-pinecone_service = PineconeService(index_name="code-map")
+
+# job matching engine: "local" (in-process index, Pinecone if not built) or "pinecone"
+JOB_MATCH_ENGINE = os.getenv("JOB_MATCH_ENGINE", "local").lower()
+
+# Groq calls: per-call timeout in seconds and a process-wide cap on calls in
+# flight, shared by every request (the pool only fans out; the semaphore also
+# bounds direct call_openai callers)
+GROQ_TIMEOUT_SECONDS = float(os.getenv("GROQ_TIMEOUT_SECONDS", "30"))
+GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "12"))
+
+_llm_slots = threading.BoundedSemaphore(GROQ_MAX_CONCURRENCY)
+_llm_pool = ThreadPoolExecutor(
+    max_workers=GROQ_MAX_CONCURRENCY, thread_name_prefix="groq"
+)
 
 
 # -----------------------------
 # Groq call function
 # -----------------------------
-def call_openai(prompt: str, max_tokens=2000, temperature=0.2) -> str:
+GROQ_MODEL = "llama-3.3-70b-versatile"
+GROQ_SYSTEM_PROMPT = (
+    "You are an assistant that returns clean, concise outputs. "
+    "Write in a professional, neutral tone; avoid buzzwords."
+)
+
+
+# identical prompts are answered from the persistent LLM cache
+@llm_cached(model=GROQ_MODEL, system=GROQ_SYSTEM_PROMPT, ignore=("timeout",))
+def call_openai(prompt: str, max_tokens=2000, temperature=0.2, timeout=None) -> str:
     """
     Generate a descriptive profile text from Groq based on a prompt.
     (Function name kept for compatibility)
+    Waits for a free slot under GROQ_MAX_CONCURRENCY before calling.
     """
-    resp = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You are an assistant that returns clean, concise outputs. "
-                    "Write in a professional, neutral tone; avoid buzzwords."
-                ),
-            },
-            {"role": "user", "content": prompt},
-        ],
-        max_tokens=max_tokens,
-        temperature=temperature,
-    )
+    with _llm_slots:
+        resp = get_groq_client().chat.completions.create(
+            model=GROQ_MODEL,
+            messages=[
+                {"role": "system", "content": GROQ_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            max_tokens=max_tokens,
+            temperature=temperature,
+            timeout=timeout or GROQ_TIMEOUT_SECONDS,
+        )
     return resp.choices[0].message.content.strip()
 
 
+def submit_llm_call(prompt: str, **kwargs) -> Future:
+    """Run call_openai on the shared Groq pool; returns its Future."""
+    return _llm_pool.submit(call_openai, prompt, **kwargs)
+
+
+def _run_in_llm_slot(fn, *args, **kwargs):
+    with _llm_slots:
+        return fn(*args, **kwargs)
+
+
+def submit_llm_task(fn, *args, **kwargs) -> Future:
+    """
+    Run fn, a Groq call made through another client (e.g. LangChain), on the
+    shared Groq pool within GROQ_MAX_CONCURRENCY; returns its Future.
+    """
+    return _llm_pool.submit(_run_in_llm_slot, fn, *args, **kwargs)
+
+
 def normalize_option(opt: str) -> str:
     if not opt:
         return ""
@@ -67,28 +121,37 @@ def normalize_option(opt: str) -> str:
 # -----------------------------
 # Data aggregation for a user
 # -----------------------------
-def get_user_embedding_data(user_test_id: str) -> Dict[str, Any]:
+def get_user_embedding_data(
+    user_test_id: str, context: Optional[UserTestContext] = None
+) -> Dict[str, Any]:
     """
     Fetch user responses and follow-up results, compute score, build combined_data.
     score reflects how consistent/true the skillReflection is relative to follow-up answers.
+    With a request context the reads and the result are shared with other callers.
     """
+    context = context or UserTestContext(user_test_id)
+    if context.combined_data is None:
+        context.combined_data = _build_user_embedding_data(context)
+    return context.combined_data
+
+
+def _build_user_embedding_data(context: UserTestContext) -> Dict[str, Any]:
+    user_test_id = context.user_test_id
     # fetch Firestore doc (dict)
-    doc_ref = db.collection("user_tests").document(user_test_id).get()
-    if not doc_ref.exists:
+    doc = context.user_doc
+    if doc is None:
         return {"error": f"No user responses found for {user_test_id}"}
 
-    doc = doc_ref.to_dict()
-
     try:
         # convert dict → Pydantic model
         user_res = UserResponses(**doc)
 
-        latest_attempt = get_latest_attempt_number(user_test_id)
+        latest_attempt = context.latest_attempt
         print(f"Latest attempt for user_test_id {user_test_id}: {latest_attempt}")
 
         # fetch all data once
-        follow_ups = get_follow_up_answers_by_user(user_test_id, latest_attempt)
-        user_questions = get_generated_questions(user_test_id, latest_attempt)
+        follow_ups = context.follow_ups
+        user_questions = context.generated_questions
 
         # build lookup table for O(1) question match
         question_lookup = {q["id"]: q for q in user_questions}
@@ -155,8 +218,10 @@ def get_user_embedding_data(user_test_id: str) -> Dict[str, Any]:
 # -----------------------------
 # Analyze user skills & knowledge
 # -----------------------------
-def analyze_user_skills_knowledge(user_test_id: str) -> Dict[str, Any]:
-    combined_data = get_user_embedding_data(user_test_id)
+def analyze_user_skills_knowledge(
+    user_test_id: str, context: Optional[UserTestContext] = None
+) -> Dict[str, Any]:
+    combined_data = get_user_embedding_data(user_test_id, context)
     if "error" in combined_data:
         return combined_data
 
@@ -252,9 +317,11 @@ def generate_user_profile_text(combined_data: Dict[str, Any]) -> str:
 # -----------------------------
 # Create user embedding
 # -----------------------------
-def create_user_embedding(user_test_id: str) -> Dict[str, Any]:
+def create_user_embedding(
+    user_test_id: str, context: Optional[UserTestContext] = None
+) -> Dict[str, Any]:
     print(f"=== CREATE_USER_EMBEDDING DEBUG ===")
-    combined_data = get_user_embedding_data(user_test_id)
+    combined_data = get_user_embedding_data(user_test_id, context)
     print(
         f"Combined data: {'error' in combined_data if isinstance(combined_data, dict) else 'Not dict'}"
     )
@@ -358,7 +425,7 @@ def store_user_in_pinecone(user_test_id: str) -> Dict[str, Any]:
     }
 
     try:
-        pinecone_service.upsert_user(
+        get_pinecone_service().upsert_user(
             user_test_id=user_test_id,
             embedding=user_embedding,
             metadata=metadata,
@@ -377,76 +444,246 @@ def store_user_in_pinecone(user_test_id: str) -> Dict[str, Any]:
 # -----------------------------
 # Extract job skills and knowledge
 # -----------------------------
+def submit_job_skills_knowledge(job_description: str) -> Dict[str, Future]:
+    """
+    Start the skills and knowledge extraction calls for a job description.
+    Both run concurrently on the Groq pool; pass the result to
+    collect_job_skills_knowledge.
+    """
+    skills_prompt = (
+        "ANALYZE THIS JOB DESCRIPTION AND EXTRACT ALL REQUIRED SKILLS WITH PROFICIENCY LEVELS:\n\n"
+        f"{job_description}\n\n"
+        "DEFINITION:\n"
+        "- Skills are abilities or tools that a person can use to perform tasks.\n"
+        "- Examples of skills: programming languages, frameworks, libraries, software, platforms, or tools.\n"
+        "- Do NOT include theoretical knowledge, concepts, or methodologies.\n\n"
+        "EXTRACTION RULES:\n"
+        "1. Extract ONLY technical skills: programming languages, frameworks, libraries, tools, software, and platforms.\n"
+        "2. Assign a proficiency level for each skill: **ONLY** Basic, Intermediate, or Advanced.\n"
+        '3. Respond STRICTLY in JSON format as a dictionary: {"Skill Name": "Level", ...} without any additional text.\n'
+        "4. Be as specific as possible: if 'Python with Django' is mentioned, include 'Python' and 'Django' as separate entries.\n"
+        "5. Exclude soft skills and natural languages.\n"
+        "6. Include skills mentioned in requirements, qualifications, or responsibilities sections.\n"
+        "7. Remove duplicates and keep the most specific term.\n"
+        "8. If multiple skills are mentioned together, create separate entries for each.\n"
+        "9. DO NOT include explanations, markdown, or code blocks.\n\n"
+        "EXAMPLE OUTPUT:\n"
+        '{"Python": "Basic", "Django": "Intermediate", "SQL": "Advanced"}'
+    )
+
+    knowledge_prompt = (
+        "ANALYZE THIS JOB DESCRIPTION AND EXTRACT ALL REQUIRED KNOWLEDGE AREAS WITH PROFICIENCY LEVELS:\n\n"
+        f"{job_description}\n\n"
+        "- Knowledge is the understanding of concepts, theories, methodologies, or domains.\n"
+        "- Examples of knowledge: Algorithms, Data Structures, Machine Learning, Web Development, Cybersecurity.\n"
+        "- Do NOT include specific tools, software, or platforms.\n\n"
+        "EXTRACTION RULES:\n"
+        "1. Extract ONLY knowledge domains, concepts, methodologies, and specialized areas.\n"
+        "2. Assign a proficiency level for each: **ONLY** Basic, Intermediate, or Advanced.\n"
+        '3. Respond STRICTLY in JSON format as a dictionary: {"Knowledge Name": "Level", ...}\n'
+        "4. Be as specific as possible: if 'Mathematics (Linear Algebra, Probability)' is mentioned, include 'Mathematics', 'Linear Algebra' and 'Probability' as separate entries.\n"
+        "5. Exclude soft skills and natural languages.\n"
+        "6. Remove duplicates and keep the most specific term.\n"
+        "7. If multiple knowledge areas are mentioned together, create separate entries for each.\n"
+        "8. DO NOT include explanations, markdown, or code blocks.\n\n"
+        "EXAMPLE OUTPUT:\n"
+        '{"Algorithms": "Basic", "Machine Learning": "Advanced", "Database Systems": "Intermediate"}'
+    )
+
+    return {
+        "skills": submit_llm_call(skills_prompt, max_tokens=300),
+        "knowledge": submit_llm_call(knowledge_prompt, max_tokens=300),
+    }
+
+
+def collect_job_skills_knowledge(futures: Dict[str, Future]) -> Dict[str, Any]:
+    """Wait for submit_job_skills_knowledge calls; failed parts come back empty."""
+    result = {}
+    for kind, future in futures.items():
+        try:
+            result[kind] = parse_json_response(future.result(), kind)
+        except Exception as e:
+            print(f"Error extracting {kind}: {e}")
+            result[kind] = {}
+    return result
+
+
 def extract_job_skills_knowledge(job_description: str) -> Dict[str, Any]:
     """
     Extract skills and knowledge from job description using OpenAI
     """
+    return collect_job_skills_knowledge(submit_job_skills_knowledge(job_description))
+
+
+def build_job_summary_prompt(job_description: str) -> str:
+    return (
+        "Summarize the following job description in one concise, professional paragraph. "
+        "Focus on core responsibilities and tasks of the career. "
+        "Start with 'This career involves...'"
+        "Avoid mentioning overly detailed information such as the company, years of experience, etc."
+        "Keep it under 400 characters.\n\n"
+        f"JOB DESCRIPTION:\n{job_description}\n\n"
+        "Return only the cleaned-up job description without any additional text."
+    )
+
+
+# -----------------------------
+# Match user to job (local index / Pinecone)
+# -----------------------------
+def query_similar_jobs(
+    user_embedding: List[float], top_k: int = 3
+) -> List[Dict[str, Any]]:
+    """
+    Top-k jobs for an embedding from the configured engine.
+    The local index answers in-process; Pinecone is used when selected via
+    JOB_MATCH_ENGINE or when the local index has not been built.
+    """
+    if JOB_MATCH_ENGINE != "pinecone" and loader.job_vector_index is not None:
+        print(f"Querying local job index ({len(loader.job_vector_index)} jobs)")
+        return loader.job_vector_index.query(user_embedding, top_k=top_k)
+
+    return get_pinecone_service().query_similar_jobs(
+        user_embedding=user_embedding, top_k=top_k
+    )
+
+
+def _submit_job_match(job_match: Dict[str, Any], use_openai_summary: bool) -> Dict:
+    """Parse one match's metadata and start the LLM calls it still needs."""
+    job_metadata = job_match["metadata"]
+    job_id = job_metadata.get("job_id", job_match["id"])  # use match ID as fallback
+    original_job_desc = job_metadata.get("description", "N/A")
+
+    # try to parse skills/knowledge from metadata
+    required_skills = {}
+    required_knowledge = {}
     try:
-        skills_prompt = (
-            "ANALYZE THIS JOB DESCRIPTION AND EXTRACT ALL REQUIRED SKILLS WITH PROFICIENCY LEVELS:\n\n"
-            f"{job_description}\n\n"
-            "DEFINITION:\n"
-            "- Skills are abilities or tools that a person can use to perform tasks.\n"
-            "- Examples of skills: programming languages, frameworks, libraries, software, platforms, or tools.\n"
-            "- Do NOT include theoretical knowledge, concepts, or methodologies.\n\n"
-            "EXTRACTION RULES:\n"
-            "1. Extract ONLY technical skills: programming languages, frameworks, libraries, tools, software, and platforms.\n"
-            "2. Assign a proficiency level for each skill: **ONLY** Basic, Intermediate, or Advanced.\n"
-            '3. Respond STRICTLY in JSON format as a dictionary: {"Skill Name": "Level", ...} without any additional text.\n'
-            "4. Be as specific as possible: if 'Python with Django' is mentioned, include 'Python' and 'Django' as separate entries.\n"
-            "5. Exclude soft skills and natural languages.\n"
-            "6. Include skills mentioned in requirements, qualifications, or responsibilities sections.\n"
-            "7. Remove duplicates and keep the most specific term.\n"
-            "8. If multiple skills are mentioned together, create separate entries for each.\n"
-            "9. DO NOT include explanations, markdown, or code blocks.\n\n"
-            "EXAMPLE OUTPUT:\n"
-            '{"Python": "Basic", "Django": "Intermediate", "SQL": "Advanced"}'
-        )
+        if job_metadata.get("required_skills"):
+            required_skills = json.loads(job_metadata.get("required_skills", "{}"))
+        if job_metadata.get("required_knowledge"):
+            required_knowledge = json.loads(
+                job_metadata.get("required_knowledge", "{}")
+            )
+    except json.JSONDecodeError:
+        print(f"Failed to parse skills/knowledge for job {job_id}")
+
+    summary_future = None
+    extraction_futures = None
+    # generate cleaned/comprehensive description using OpenAI if requested
+    # (jobs enriched offline by services/enrich_jobs.py skip the calls)
+    if use_openai_summary and original_job_desc != "N/A":
+        if not job_metadata.get("summary"):
+            summary_future = submit_llm_call(
+                build_job_summary_prompt(original_job_desc), max_tokens=400
+            )
 
-        knowledge_prompt = (
-            "ANALYZE THIS JOB DESCRIPTION AND EXTRACT ALL REQUIRED KNOWLEDGE AREAS WITH PROFICIENCY LEVELS:\n\n"
-            f"{job_description}\n\n"
-            "- Knowledge is the understanding of concepts, theories, methodologies, or domains.\n"
-            "- Examples of knowledge: Algorithms, Data Structures, Machine Learning, Web Development, Cybersecurity.\n"
-            "- Do NOT include specific tools, software, or platforms.\n\n"
-            "EXTRACTION RULES:\n"
-            "1. Extract ONLY knowledge domains, concepts, methodologies, and specialized areas.\n"
-            "2. Assign a proficiency level for each: **ONLY** Basic, Intermediate, or Advanced.\n"
-            '3. Respond STRICTLY in JSON format as a dictionary: {"Knowledge Name": "Level", ...}\n'
-            "4. Be as specific as possible: if 'Mathematics (Linear Algebra, Probability)' is mentioned, include 'Mathematics', 'Linear Algebra' and 'Probability' as separate entries.\n"
-            "5. Exclude soft skills and natural languages.\n"
-            "6. Remove duplicates and keep the most specific term.\n"
-            "7. If multiple knowledge areas are mentioned together, create separate entries for each.\n"
-            "8. DO NOT include explanations, markdown, or code blocks.\n\n"
-            "EXAMPLE OUTPUT:\n"
-            '{"Algorithms": "Basic", "Machine Learning": "Advanced", "Database Systems": "Intermediate"}'
-        )
+        # only extract skills/knowledge if not already in metadata
+        if not required_skills or not required_knowledge:
+            extraction_futures = submit_job_skills_knowledge(original_job_desc)
 
-        # Extract skills
-        skills_response = call_openai(skills_prompt, max_tokens=300)
-        skills_dict = parse_json_response(skills_response, "skills")
+    return {
+        "job_match": job_match,
+        "required_skills": required_skills,
+        "required_knowledge": required_knowledge,
+        "summary_future": summary_future,
+        "extraction_futures": extraction_futures,
+    }
 
-        # Extract knowledge
-        knowledge_response = call_openai(knowledge_prompt, max_tokens=300)
-        knowledge_dict = parse_json_response(knowledge_response, "knowledge")
 
-        return {"skills": skills_dict, "knowledge": knowledge_dict}
+def _job_match_futures(pending: Dict) -> List[Future]:
+    futures = list((pending["extraction_futures"] or {}).values())
+    if pending["summary_future"] is not None:
+        futures.append(pending["summary_future"])
+    return futures
 
-    except Exception as e:
-        print(f"Error extracting skills/knowledge: {e}")
-        return {"skills": {}, "knowledge": {}}
+
+def _finish_job_match(
+    user_test_id: str, job_index: int, pending: Dict, use_openai_summary: bool
+) -> Dict[str, Any]:
+    """Build the match data once the job's LLM calls have finished."""
+    job_match = pending["job_match"]
+    required_skills = pending["required_skills"]
+    required_knowledge = pending["required_knowledge"]
+    similarity_score = job_match["score"]
+    similarity_percentage = round(similarity_score * 100, 2)
+    job_metadata = job_match["metadata"]
+
+    # extract job details from metadata
+    job_title = job_metadata.get("title", "N/A")
+    job_id = job_metadata.get("job_id", job_match["id"])
+    job_desc = job_metadata.get("description", "N/A")
+
+    if use_openai_summary and job_metadata.get("summary"):
+        job_desc = job_metadata["summary"]
+    elif pending["summary_future"] is not None:
+        try:
+            job_desc = pending["summary_future"].result()
+            print(f"Generated OpenAI summary for job: {job_title}")
+        except Exception as e:
+            print(f"OpenAI error for job {job_id}: {e}")
+            # keep original description if OpenAI fails
+
+    if pending["extraction_futures"] is not None:
+        extraction_result = collect_job_skills_knowledge(pending["extraction_futures"])
+        if not required_skills:
+            required_skills = extraction_result.get("skills", {})
+        if not required_knowledge:
+            required_knowledge = extraction_result.get("knowledge", {})
+
+    # Build match data
+    return {
+        "user_test_id": str(user_test_id),
+        "job_index": job_index,  # MUST be 0, 1, 2
+        "job_title": job_title,
+        "job_description": job_desc,
+        "similarity_score": similarity_score,
+        "similarity_percentage": similarity_percentage,
+        "required_skills": required_skills,
+        "required_knowledge": required_knowledge,
+    }
+
+
+def iter_job_matches(
+    user_test_id: str,
+    similar_jobs: List[Dict[str, Any]],
+    use_openai_summary: bool = True,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the match data of each similar job as soon as its summary and
+    skills are ready (completion order; job_index keeps the rank). Every
+    job's LLM calls are started up front so they overlap.
+    """
+    pending = {
+        i: _submit_job_match(job_match, use_openai_summary)
+        for i, job_match in enumerate(similar_jobs)
+    }
+    while pending:
+        ready = [
+            i
+            for i, job in pending.items()
+            if all(f.done() for f in _job_match_futures(job))
+        ]
+        if not ready:
+            wait(
+                [
+                    f
+                    for job in pending.values()
+                    for f in _job_match_futures(job)
+                    if not f.done()
+                ],
+                return_when=FIRST_COMPLETED,
+            )
+            continue
+        for i in ready:
+            yield _finish_job_match(user_test_id, i, pending.pop(i), use_openai_summary)
 
 
-# -----------------------------
-# Match user to job (Pinecone version)
-# -----------------------------
 def match_user_to_job(
     user_test_id: str,
     user_embedding: List[float],
     use_openai_summary: bool = True,
 ) -> Dict[str, Any]:
     """
-    Query Pinecone for similar jobs using user embedding.
+    Find the most similar jobs for a user embedding (local index or Pinecone).
     """
     try:
         print(f"=== MATCH_USER_TO_JOB DEBUG ===")
@@ -457,101 +694,30 @@ def match_user_to_job(
             f"User embedding sample: {user_embedding[:5] if user_embedding else 'None'}"
         )
 
-        # query Pinecone for similar jobs
-        similar_jobs = pinecone_service.query_similar_jobs(
-            user_embedding=user_embedding, top_k=3
-        )
+        # query the job index for similar jobs
+        similar_jobs = query_similar_jobs(user_embedding, top_k=3)
 
         print(f"Similar jobs found: {len(similar_jobs) if similar_jobs else 0}")
         print(f"Similar jobs: {similar_jobs}")
 
         if not similar_jobs:
-            print("No similar jobs found in Pinecone")
+            print("No similar jobs found")
             return {"error": "No matching jobs found"}
 
         print(f"Found {len(similar_jobs)} potential job matches")
-        top_matches = []
-
-        for i, job_match in enumerate(similar_jobs):
-            similarity_score = job_match["score"]
-            similarity_percentage = round(similarity_score * 100, 2)
-            job_metadata = job_match["metadata"]
-
-            # extract job details from metadata
-            job_title = job_metadata.get("title", "N/A")
-            original_job_desc = job_metadata.get("description", "N/A")
-            job_id = job_metadata.get(
-                "job_id", job_match["id"]
-            )  # use match ID as fallback
-
-            # initialize with metadata values
-            job_desc = original_job_desc
-            required_skills = {}
-            required_knowledge = {}
-
-            # try to parse skills/knowledge from metadata
-            try:
-                if job_metadata.get("required_skills"):
-                    required_skills = json.loads(
-                        job_metadata.get("required_skills", "{}")
-                    )
-                if job_metadata.get("required_knowledge"):
-                    required_knowledge = json.loads(
-                        job_metadata.get("required_knowledge", "{}")
-                    )
-            except json.JSONDecodeError:
-                print(f"Failed to parse skills/knowledge for job {job_id}")
-
-            # generate cleaned/comprehensive description using OpenAI if requested
-            if use_openai_summary and original_job_desc != "N/A":
-                try:
-                    summary_prompt = (
-                        "Summarize the following job description in one concise, professional paragraph. "
-                        "Focus on core responsibilities and tasks of the career. "
-                        "Start with 'This career involves...'"
-                        "Avoid mentioning overly detailed information such as the company, years of experience, etc."
-                        "Keep it under 400 characters.\n\n"
-                        f"JOB DESCRIPTION:\n{original_job_desc}\n\n"
-                        "Return only the cleaned-up job description without any additional text."
-                    )
-
-                    job_desc = call_openai(summary_prompt, max_tokens=400)
-                    print(f"Generated OpenAI summary for job: {job_title}")
-
-                    # only extract skills/knowledge if not already in metadata
-                    if not required_skills or not required_knowledge:
-                        extraction_result = extract_job_skills_knowledge(
-                            original_job_desc
-                        )
-                        if not required_skills:
-                            required_skills = extraction_result.get("skills", {})
-                        if not required_knowledge:
-                            required_knowledge = extraction_result.get("knowledge", {})
-
-                except Exception as e:
-                    print(f"OpenAI error for job {job_id}: {e}")
-                    # keep original values if OpenAI fails
-
-            # Build match data
-            match_data = {
-                "user_test_id": str(user_test_id),
-                "job_index": i,  # MUST be 0, 1, 2
-                "job_title": job_title,
-                "job_description": job_desc,
-                "similarity_score": similarity_score,
-                "similarity_percentage": similarity_percentage,
-                "required_skills": required_skills,
-                "required_knowledge": required_knowledge,
-            }
 
-            top_matches.append(match_data)
+        # results arrive in completion order; return them in rank order
+        top_matches = sorted(
+            iter_job_matches(user_test_id, similar_jobs, use_openai_summary),
+            key=lambda match: match["job_index"],
+        )
 
         print(f"Returning {len(top_matches)} top matches")
 
         return {"top_matches": top_matches}
 
     except Exception as e:
-        error_msg = f"Failed to query jobs from Pinecone: {str(e)}"
+        error_msg = f"Failed to query similar jobs: {str(e)}"
         print(error_msg)
         return {"error": error_msg}
 
@@ -572,53 +738,48 @@ def match_user_to_job_legacy(
 
     # check if globals are loaded correctly
     print(
-        f"DF length: {len(loader.df)}, Job embeddings length: {len(loader.job_embeddings)}"
+        f"DF length: {len(loader.df) if loader.df is not None else 0}, Job embeddings length: {len(loader.job_embeddings)}"
     )
 
-    if loader.df.empty or not loader.job_embeddings:
+    if loader.df is None or loader.df.empty or len(loader.job_embeddings) == 0:
         return {"error": "No jobs or embeddings available."}
 
-    # convert to numpy
-    user_vec = np.array(user_embedding).reshape(1, -1)  # (1, dim)
-    job_matrix = np.array(loader.job_embeddings)  # (num_jobs, dim)
+    # job rows are stored L2-normalized, so cosine similarity is a dot product
+    user_vec = np.asarray(user_embedding, dtype=np.float32)
+    user_vec = user_vec / max(float(np.linalg.norm(user_vec)), 1e-12)
+    similarities = loader.job_embeddings @ user_vec  # shape: (num_jobs,)
 
-    # compute cosine similarity
-    from sklearn.metrics.pairwise import cosine_similarity
+    # top 3 jobs by similarity, one per distinct title
+    unique_indices = top_k_unique(similarities, loader.job_title_ids, top_k=3)
+    descriptions = loader.df["Full Job Description"]
 
-    similarities = cosine_similarity(user_vec, job_matrix)[0]  # shape: (num_jobs,)
-
-    # get indices of top 3 jobs (sorted by similarity score)
-    top_n = min(3, len(similarities))
-
-    # get sorted indices
-    sorted_indices = np.argsort(similarities)[::-1]  # highest first
+    job_descs = []
+    extractions = []
+    for idx in unique_indices:
+        original_job_desc = descriptions.iat[idx]
+        if not isinstance(original_job_desc, str):
+            original_job_desc = "N/A"
+        job_descs.append(original_job_desc)
 
-    # deduplicate by job title before slicing
-    seen_titles = set()
-    unique_indices = []
-    for idx in sorted_indices:
-        title = loader.df.iloc[idx].get("Title", "N/A")
-        if title not in seen_titles:
-            seen_titles.add(title)
-            unique_indices.append(idx)
-        if len(unique_indices) >= top_n:
-            break
+        # process with OpenAI if requested (all jobs' calls run concurrently)
+        if use_openai_summary and original_job_desc != "N/A":
+            extractions.append(submit_job_skills_knowledge(original_job_desc))
+        else:
+            extractions.append(None)
 
     top_matches = []
 
-    for idx in unique_indices:
-        job = loader.df.iloc[idx]
+    for idx, job_desc, extraction_futures in zip(
+        unique_indices, job_descs, extractions
+    ):
         similarity_score = float(similarities[idx])
         similarity_percentage = round(similarity_score * 100, 2)
-        original_job_desc = job.get("Full Job Description", "N/A")
 
-        # process with OpenAI if requested
-        job_desc = original_job_desc
         required_skills = {}
         required_knowledge = {}
 
-        if use_openai_summary and original_job_desc != "N/A":
-            extraction_result = extract_job_skills_knowledge(original_job_desc)
+        if extraction_futures is not None:
+            extraction_result = collect_job_skills_knowledge(extraction_futures)
             required_skills = extraction_result.get("skills", {})
             required_knowledge = extraction_result.get("knowledge", {})
 
@@ -626,7 +787,7 @@ def match_user_to_job_legacy(
             {
                 "user_test_id": user_test_id,
                 "job_index": int(idx),
-                "job_title": job.get("Title", "N/A"),
+                "job_title": loader.job_index[idx]["title"],
                 "job_description": job_desc,
                 "similarity_score": similarity_score,
                 "similarity_percentage": similarity_percentage,
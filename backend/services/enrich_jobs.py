@@ -0,0 +1,164 @@
+# Precompute summary, required skills and required knowledge for every
+# canonical job, so matching reads them from index metadata instead of calling
+# the LLM per request.
+#
+# Run from backend/:  python -m services.enrich_jobs [--rpm 30] [--limit N]
+# Progress is checkpointed to data/job_enrichment.jsonl after every job; an
+# interrupted run resumes where it stopped, and jobs whose description changed
+# are redone. Restart the API (or re-run upload_embeddings_pinecone.py) to
+# publish the results.
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+
+# allow running as a script from backend/services
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.job_enrichment import (
+    ENRICHMENT_FILE,
+    append_enrichment,
+    current_record,
+    description_key,
+    load_enrichment,
+)
+from core.job_ingest import DESCRIPTION_COLUMN, TITLE_COLUMN, load_job_corpus
+from services.embedding_service import (
+    GROQ_MAX_CONCURRENCY,
+    build_job_summary_prompt,
+    collect_job_skills_knowledge,
+    submit_job_skills_knowledge,
+    submit_llm_call,
+)
+
+FOLDER_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"
+)
+CALLS_PER_JOB = 3  # summary, skills, knowledge
+
+
+class RateLimiter:
+    """Spaces calls at least 60 / rpm seconds apart (rpm <= 0 disables it)."""
+
+    def __init__(self, rpm: float):
+        self.interval = 60.0 / rpm if rpm > 0 else 0.0
+        self._next = 0.0
+
+    def wait(self):
+        now = time.monotonic()
+        if self._next > now:
+            time.sleep(self._next - now)
+            now = self._next
+        self._next = now + self.interval
+
+
+def pending_jobs(corpus, records):
+    """
+    (job_id, title, description) of jobs without a current record. Records
+    are keyed by the canonical job's "Job ID", unique per job.
+    """
+    jobs = []
+    for job_id, title, description in zip(
+        corpus["Job ID"], corpus[TITLE_COLUMN].astype(str), corpus[DESCRIPTION_COLUMN]
+    ):
+        if not isinstance(description, str) or not description.strip():
+            continue
+        if current_record(records, job_id, description) is None:
+            jobs.append((job_id, title, description))
+    return jobs
+
+
+def submit_job(limiter: RateLimiter, description: str):
+    limiter.wait()
+    summary = submit_llm_call(build_job_summary_prompt(description), max_tokens=400)
+    for _ in range(CALLS_PER_JOB - 1):  # skills and knowledge prompts
+        limiter.wait()
+    extraction = submit_job_skills_knowledge(description)
+    return summary, extraction
+
+
+def finish_job(job, futures):
+    """Build the checkpoint record, or None when any part failed."""
+    job_id, title, description = job
+    summary_future, extraction_futures = futures
+    try:
+        summary = summary_future.result()
+    except Exception as e:
+        print(f"Summary failed for '{title}': {e}")
+        summary = ""
+    extraction = collect_job_skills_knowledge(extraction_futures)
+
+    if not summary or not extraction["skills"] or not extraction["knowledge"]:
+        return None
+    return {
+        "job_id": job_id,
+        "title": title,
+        "description_key": description_key(description),
+        "summary": summary,
+        "required_skills": extraction["skills"],
+        "required_knowledge": extraction["knowledge"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--rpm", type=float, default=30, help="max LLM requests per minute"
+    )
+    parser.add_argument("--limit", type=int, default=0, help="enrich at most N jobs")
+    args = parser.parse_args()
+
+    corpus = load_job_corpus(FOLDER_PATH)
+    if corpus.empty:
+        raise ValueError("No CSV files found or all were empty.")
+
+    records = load_enrichment(FOLDER_PATH)
+    jobs = pending_jobs(corpus, records)
+    print(f"{len(corpus)} canonical jobs, {len(jobs)} need enrichment")
+    if args.limit:
+        jobs = jobs[: args.limit]
+
+    limiter = RateLimiter(args.rpm)
+    in_flight = deque()
+    max_in_flight = max(1, GROQ_MAX_CONCURRENCY // CALLS_PER_JOB)
+    done = failed = 0
+    started = time.perf_counter()
+
+    def drain_one():
+        nonlocal done, failed
+        job, futures = in_flight.popleft()
+        record = finish_job(job, futures)
+        if record is None:
+            failed += 1
+            return
+        append_enrichment(FOLDER_PATH, record)
+        done += 1
+        if done % 10 == 0:
+            rate = done / (time.perf_counter() - started)
+            print(f"  {done}/{len(jobs)} enriched ({rate * 60:.1f} jobs/min)")
+
+    for job in jobs:
+        if len(in_flight) >= max_in_flight:
+            drain_one()
+        in_flight.append((job, submit_job(limiter, job[2])))
+    while in_flight:
+        drain_one()
+
+    print(
+        f"✓ Enriched {done} jobs, {failed} failed (re-run to retry) -> "
+        f"{os.path.join(FOLDER_PATH, ENRICHMENT_FILE)}"
+    )
+
+    # a finished checkpoint must leave nothing for the next run to submit
+    remaining = pending_jobs(corpus, load_enrichment(FOLDER_PATH))
+    if not args.limit and not failed and remaining:
+        raise RuntimeError(
+            f"{len(remaining)} jobs still pending after a complete run; "
+            "checkpoint records do not line up with the corpus"
+        )
+    print(f"{len(remaining)} jobs left for the next run")
+
+
+if __name__ == "__main__":
+    main()
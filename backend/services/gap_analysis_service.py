@@ -1,13 +1,13 @@
+from core.gap_engine import batch_gap_analysis
 from models.firestore_models import (
     get_job_by_index,
     get_user_skills_knowledge,
     get_all_jobs,
     get_recommendation_id_by_user_test_id,
     set_user_job_skill_match,
+    set_user_job_skill_matches,
 )
 
-LEVEL_ORDER = {"Not Provided": 0, "Basic": 1, "Intermediate": 2, "Advanced": 3}
-
 
 def compute_gaps_for_all_jobs(user_test_id: str):
     print(f"=== GAP ANALYSIS DEBUG START for {user_test_id} ===")
@@ -32,36 +32,41 @@ def compute_gaps_for_all_jobs(user_test_id: str):
     for i, job in enumerate(recommended_jobs):
         print(f"  Job {i}: index={job.get('job_index')}, title={job.get('job_title')}")
 
-    results = []
-
-    # compute gaps
-    for job in recommended_jobs:
-        job_index = job.get("job_index")
-        if not job_index:
-            print(f"[WARNING] Job missing job_index: {job}")
-            continue
+    jobs = [job for job in recommended_jobs if job.get("job_index")]
+    if len(jobs) < len(recommended_jobs):
+        print(f"[WARNING] {len(recommended_jobs) - len(jobs)} jobs missing job_index")
 
-        print(f"\n[DEBUG] Processing job_index: {job_index}")
-
-        # CRITICAL: Check what compare_and_save returns
-        gap_result = compare_and_save(user_test_id, str(job_index))
+    # one profile read, one pass over every job, one batched write
+    user_data = get_user_skills_knowledge(user_test_id)
+    if not user_data:
+        print(f"[ERROR] No user skills/knowledge found for {user_test_id}")
+        return {"error": "Failed to compute any gap analyses"}
 
-        print(
-            f"[DEBUG] compare_and_save returned: {gap_result.keys() if isinstance(gap_result, dict) else 'Not a dict'}"
-        )
+    gaps = batch_gap_analysis(user_data, jobs)
 
-        if "error" in gap_result:
-            print(f"[ERROR] compare_and_save failed: {gap_result['error']}")
-            # Continue with next job instead of stopping
-            continue
+    results = [
+        {
+            "job_index": str(job["job_index"]),
+            "job_title": job.get("job_title", "N/A"),
+            "gap_analysis": gap_analysis,
+        }
+        for job, gap_analysis in zip(jobs, gaps)
+    ]
 
-        results.append(
+    saved = set_user_job_skill_matches(
+        user_test_id,
+        [
             {
-                "job_index": str(job_index),
-                "job_title": gap_result.get("job_title", job.get("job_title", "N/A")),
-                "gap_analysis": gap_result.get("gap_analysis", {}),
+                "job_match_id": result["job_index"],
+                "skill_status": result["gap_analysis"]["skills"],
+                "knowledge_status": result["gap_analysis"]["knowledge"],
+                "job_title": result["job_title"],
             }
-        )
+            for result in results
+        ],
+    )
+    if saved["failed"]:
+        print(f"[ERROR] Failed to save {len(saved['failed'])} job skill matches")
 
     print(f"\n[DEBUG] Total results computed: {len(results)}")
     print(f"=== GAP ANALYSIS DEBUG END ===")
@@ -87,7 +92,7 @@ def compute_gap_for_single_job(user_test_id: str, job_index: str):
 
     # compute gap for this specific job
     print(f"[DEBUG] Calling compare_and_save for job {job_index}")
-    gap_result = compare_and_save(user_test_id, job_index)
+    gap_result = compare_and_save(user_test_id, job_index, rec_id=rec_id)
 
     print(f"[DEBUG] compare_and_save result: {gap_result}")
 
@@ -102,7 +107,14 @@ def compute_gap_for_single_job(user_test_id: str, job_index: str):
     }
 
 
-def compare_and_save(user_test_id: str, job_match_id: str):
+def compare_and_save(
+    user_test_id: str, job_match_id: str, rec_id: str = None, job_data: dict = None
+):
+    """
+    Compare the user's skills/knowledge with one job match and save the gaps.
+    Callers that already hold the recommendation id or the job match pass
+    them so no extra lookups are made.
+    """
     print(
         f"\n=== COMPARE_AND_SAVE DEBUG for user={user_test_id}, job={job_match_id} ==="
     )
@@ -133,7 +145,8 @@ def compare_and_save(user_test_id: str, job_match_id: str):
     )
 
     # check job data
-    job_data = get_job_by_index(job_match_id)
+    if job_data is None:
+        job_data = get_job_by_index(job_match_id, user_test_id, rec_id=rec_id)
     print(f"[DEBUG] get_job_by_index returned: {type(job_data)}")
     print(f"[DEBUG] Job data exists: {bool(job_data)}")
 
@@ -163,47 +176,8 @@ def compare_and_save(user_test_id: str, job_match_id: str):
         f"[DEBUG] Job requires {len(req_skills)} skills, {len(req_knowledge)} knowledge items"
     )
 
-    gap_analysis = {"skills": {}, "knowledge": {}}
-
-    # compare skills
-    skill_count = 0
-    for skill, req_level in req_skills.items():
-        user_level = user_skills.get(skill, "Not Provided")
-        if user_level == "Not Provided":
-            status = "Missing"
-        elif LEVEL_ORDER[user_level] >= LEVEL_ORDER[req_level]:
-            status = "Achieved"
-        else:
-            status = "Weak"
-
-        gap_analysis["skills"][skill] = {
-            "required_level": req_level,
-            "user_level": user_level,
-            "status": status,
-        }
-        skill_count += 1
-
-    print(f"[DEBUG] Compared {skill_count} skills")
-
-    # compare knowledge
-    knowledge_count = 0
-    for knowledge, req_level in req_knowledge.items():
-        user_level = user_knowledge.get(knowledge, "Not Provided")
-        if user_level == "Not Provided":
-            status = "Missing"
-        elif LEVEL_ORDER[user_level] >= LEVEL_ORDER[req_level]:
-            status = "Achieved"
-        else:
-            status = "Weak"
-
-        gap_analysis["knowledge"][knowledge] = {
-            "required_level": req_level,
-            "user_level": user_level,
-            "status": status,
-        }
-        knowledge_count += 1
+    gap_analysis = batch_gap_analysis(user_data, [job_data])[0]
 
-    print(f"[DEBUG] Compared {knowledge_count} knowledge items")
     print(
         f"[DEBUG] Gap analysis has {len(gap_analysis['skills'])} skills, {len(gap_analysis['knowledge'])} knowledge"
     )
@@ -4,7 +4,6 @@
 import os
 from typing import List, Dict, Any
 from dotenv import load_dotenv
-from pinecone import Pinecone
 
 load_dotenv()
 
@@ -25,6 +24,8 @@ class PineconeService:
             return
             
         try:
+            from pinecone import Pinecone
+
             self.pc = Pinecone(api_key=self.api_key)
             
             # Check if index exists, if not we'll need to create it
@@ -0,0 +1,219 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from core import model_loader
+from core.question_bank import (
+    KNOWN_LANGUAGES,
+    KNOWN_SKILLS,
+    ambiguous_name,
+    get_question_bank,
+    mentions,
+    pick_questions,
+    topic_key,
+)
+from services.questions_generation_service import (
+    agenerate_questions,
+    generate_questions,
+)
+
+# questions per assessment, by category and difficulty
+BANK_TARGETS = {
+    "Coding": {"Easy": 1, "Medium": 1, "Hard": 3},
+    "Non-coding": {"Easy": 1, "Medium": 2, "Hard": 2},
+}
+# a matched topic with fewer bank questions than this gets a background top-up
+QUESTION_BANK_MIN_PER_TOPIC = int(os.getenv("QUESTION_BANK_MIN_PER_TOPIC", "15"))
+# existing questions listed in a top-up prompt so the LLM writes new ones
+TOP_UP_AVOID_LIMIT = 30
+
+_top_up_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bank-top-up")
+_top_ups_in_flight = set()
+_top_ups_lock = threading.Lock()
+
+
+def _user_input(skill_reflection, thesis_findings, career_goals) -> str:
+    return "\n".join(
+        str(part) for part in (skill_reflection, thesis_findings, career_goals) if part
+    )
+
+
+def _query_vector(bank, text: str):
+    """Embedding of the user's text, or None while the model is loading."""
+    if not model_loader.is_initialized():
+        return None
+    bank.embed_topics(model_loader.get_embeddings_batch)
+    return model_loader.get_embeddings(text)
+
+
+def _top_up(topics: List[str]):
+    bank = get_question_bank()
+    keys = [topic_key(t) for t in topics]
+    try:
+        print(f"[BANK] Topping up questions for: {topics}")
+        result = generate_questions(
+            skill_reflection=f"Topics: {', '.join(topics)}",
+            thesis_findings="",
+            career_goals="",
+            avoid=bank.sample_questions(keys, TOP_UP_AVOID_LIMIT),
+        )
+        added = bank.add_questions(
+            result["questions"], result["metadata"].get("topics") or topics
+        )
+        print(f"[BANK] Added {added} questions for: {topics}")
+    except Exception as e:
+        print(f"[BANK] Top-up failed for {topics}: {e}")
+    finally:
+        with _top_ups_lock:
+            _top_ups_in_flight.difference_update(keys)
+
+
+def schedule_top_up(topics: List[str]):
+    """Generate more questions for topics in the background (once at a time)."""
+    with _top_ups_lock:
+        topics = [t for t in topics if topic_key(t) not in _top_ups_in_flight]
+        if not topics:
+            return
+        _top_ups_in_flight.update(topic_key(t) for t in topics)
+    _top_up_pool.submit(_top_up, topics)
+
+
+def assemble_from_bank(skill_reflection, thesis_findings, career_goals) -> Dict:
+    """
+    Assessment questions picked from the bank for the user's topics, or
+    {"questions": []} when the bank cannot cover them. Thin topics are topped
+    up in the background either way.
+    """
+    start = time.perf_counter()
+    bank = get_question_bank()
+    text = _user_input(skill_reflection, thesis_findings, career_goals)
+    topic_keys = bank.match_topics(text, _query_vector(bank, text))
+    names = bank.topic_names()
+    # a skill the user names that the bank has never seen would be dropped
+    # from the assessment: generate with the LLM instead and bank the skill
+    unseen = [
+        skill
+        for skill in KNOWN_SKILLS
+        if topic_key(skill) not in names
+        and mentions(text, skill, case_sensitive=ambiguous_name(skill))
+    ]
+    if unseen:
+        schedule_top_up(unseen)
+        return {"questions": [], "metadata": {"topics": topic_keys}}
+    if not topic_keys:
+        return {"questions": [], "metadata": {"topics": []}}
+
+    thin = [
+        names[key]
+        for key, count in bank.topic_counts(topic_keys).items()
+        if count < QUESTION_BANK_MIN_PER_TOPIC
+    ]
+    if thin:
+        schedule_top_up(thin)
+
+    # coding questions only in languages the user names, as the LLM path does.
+    # Names must match case-sensitively ("Go", "C", "R" are also plain words);
+    # a looser mention, or a language the bank lacks, goes to the LLM.
+    bank_languages = bank.languages()
+    candidates = dict(bank_languages)
+    candidates.update({topic_key(name): name for name in KNOWN_LANGUAGES})
+    named = {
+        key
+        for key, name in candidates.items()
+        if mentions(text, name, case_sensitive=True)
+    }
+    loosely_named = {key for key, name in candidates.items() if mentions(text, name)}
+    if loosely_named - named or named - set(bank_languages):
+        return {"questions": [], "metadata": {"topics": topic_keys}}
+    languages = sorted(named)
+    picked = []
+    if languages:
+        coding = pick_questions(
+            bank.candidates(topic_keys, "Coding", languages), BANK_TARGETS["Coding"]
+        )
+        if not coding:
+            return {"questions": [], "metadata": {"topics": topic_keys}}
+        picked += coding
+    non_coding = pick_questions(
+        bank.candidates(topic_keys, "Non-coding"), BANK_TARGETS["Non-coding"]
+    )
+    if not non_coding:
+        return {"questions": [], "metadata": {"topics": topic_keys}}
+    picked += non_coding
+
+    bank.mark_served([c["id"] for c in picked])
+    return {
+        "questions": [c["question"] for c in picked],
+        "metadata": {
+            "source": "bank",
+            "topics": [names.get(key, key) for key in topic_keys],
+            "languages": languages,
+            "timings": {"bank": round(time.perf_counter() - start, 3)},
+        },
+    }
+
+
+def get_assessment_questions(skill_reflection, thesis_findings, career_goals) -> Dict:
+    """
+    Questions for /generate-questions: from the bank when it covers the
+    user's topics, otherwise generated by the LLM pipeline and banked.
+    """
+    try:
+        result = assemble_from_bank(skill_reflection, thesis_findings, career_goals)
+        if result["questions"]:
+            print(f"[BANK] Served {len(result['questions'])} questions from the bank")
+            return result
+    except Exception as e:
+        print(f"[BANK] Lookup failed, generating instead: {e}")
+
+    return _bank_generated(
+        generate_questions(
+            skill_reflection=skill_reflection,
+            thesis_findings=thesis_findings,
+            career_goals=career_goals,
+        )
+    )
+
+
+async def astream_assessment_questions(
+    skill_reflection,
+    thesis_findings,
+    career_goals,
+    on_batch: Callable[[List[Dict]], None],
+) -> Dict:
+    """
+    get_assessment_questions for the streaming route: a bank hit goes to
+    on_batch in one call, otherwise on_batch gets each MCQ batch as soon as
+    the LLM pipeline has validated it. Returns the full result.
+    """
+    try:
+        result = await asyncio.to_thread(
+            assemble_from_bank, skill_reflection, thesis_findings, career_goals
+        )
+        if result["questions"]:
+            print(f"[BANK] Served {len(result['questions'])} questions from the bank")
+            on_batch(result["questions"])
+            return result
+    except Exception as e:
+        print(f"[BANK] Lookup failed, generating instead: {e}")
+
+    result = await agenerate_questions(
+        skill_reflection, thesis_findings, career_goals, on_batch=on_batch
+    )
+    return await asyncio.to_thread(_bank_generated, result)
+
+
+def _bank_generated(result: Dict) -> Dict:
+    """Mark an LLM-generated result and add its questions to the bank."""
+    result["metadata"]["source"] = "llm"
+    try:
+        added = get_question_bank().add_questions(
+            result["questions"], result["metadata"].get("topics") or []
+        )
+        print(f"[BANK] Banked {added} new questions")
+    except Exception as e:
+        print(f"[BANK] Failed to bank generated questions: {e}")
+    return result
@@ -1,12 +1,13 @@
+import asyncio
 import os
 import json
 import re
+import time
+from typing import Callable, Dict, List, Optional
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
-from langchain_core.prompts import PromptTemplate
-from langchain_classic.chains import LLMChain
-from langchain_core.output_parsers import JsonOutputParser
-from langchain_core.messages import SystemMessage, HumanMessage
+
+# LangChain and the Groq client are imported when the chains are first built
+# (see _get_chains), not when this module is imported.
 
 # -----------------------------
 # Load environment variables
@@ -16,16 +17,10 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     raise ValueError("GROQ_API_KEY not found. Please set it in your .env file.")
 
-# -----------------------------
-# Initialize LLM
-# -----------------------------
-llm = ChatGroq(model="llama-3.3-70b-versatile", temperature=0.2, groq_api_key=GROQ_API_KEY)
-
 # -----------------------------
 # System Message
 # -----------------------------
-SYSTEM_MESSAGE = SystemMessage(
-    content="""
+SYSTEM_MESSAGE = """
 You are an academic question generator for IT topics.
 - Generate coding and non-coding questions based on given topics.
 - Output valid JSON only.
@@ -34,52 +29,34 @@ You are an academic question generator for IT topics.
 - Do not include answers unless explicitly instructed.
 - Coding questions must include short self-contained code snippets (≤30 lines). No external files or APIs.
 """
-)
-
-# -----------------------------
-# JSON Parser
-# -----------------------------
-json_parser = JsonOutputParser()
 
 # -----------------------------
 # Prompt Templates
 # -----------------------------
-topics_prompt = PromptTemplate(
-    input_variables=["user_input"],
-    template="Extract all coding-related topics, skills, languages, libraries, and frameworks from: '{user_input}'. Output comma-separated list, no explanations.",
-)
-
-languages_prompt = PromptTemplate(
-    input_variables=["topics"],
-    template="From this list: '{topics}', extract all programming languages. Return comma-separated list or 'None' if none.",
-)
-
-coding_questions_prompt = PromptTemplate(
-    input_variables=["topics", "lang", "count"],
-    template="""Generate {count} coding problems based on: '{topics}' in '{lang}'.
+TOPICS_LANGUAGES_TEMPLATE = """Extract all coding-related topics, skills, languages, libraries, and frameworks from: '{user_input}'.
+Then, from those topics, extract all programming languages.
+Return JSON only, no explanations, like:
+{{"topics": ["...", "..."], "languages": ["..."]}}
+Use an empty "languages" list if there are none."""
+
+CODING_QUESTIONS_TEMPLATE = """Generate {count} coding problems based on: '{topics}' in '{lang}'.
 - Present incomplete code, buggy code, or output prediction questions 
 - Question types allowed: output prediction, identify the bug, complete the missing logic (no markdown blocks)  
 - Code must not be a complete runnable program. It must contai a bug, missing lines, or a tricky behavior suitable for MCQs
 - Difficulty ratio: 1 Easy, 1 Medium, 3 Hard (if {count} >=5; else distribute proportionally)
 - Only self-contained examples, no APIs/external files
 - Return as JSON array like:
-[{{"question": "...", "code": "...", "language": "{lang}", "difficulty": "Easy/Medium/Hard", "category": "Coding"}}]""",
-)
+[{{"question": "...", "code": "...", "language": "{lang}", "topic": "<one of the given topics>", "difficulty": "Easy/Medium/Hard", "category": "Coding"}}]{avoid}"""
 
-non_coding_questions_prompt = PromptTemplate(
-    input_variables=["topics"],
-    template="""Generate 5 non-coding conceptual questions based on: '{topics}'.
+NON_CODING_QUESTIONS_TEMPLATE = """Generate 5 non-coding conceptual questions based on: '{topics}'.
 - Use formal academic language.
 - Include definitions, theory, practical applications, higher-order thinking.
 - Ensure all topics represented at least once.
 - Difficulty ratio: 1 Easy, 1 Medium, 2 Hard.
 - Return as JSON array like:
-[{{"question": "...", "difficulty": "Easy/Medium/Hard", "category": "Non-coding"}}]""",
-)
+[{{"question": "...", "topic": "<one of the given topics>", "difficulty": "Easy/Medium/Hard", "category": "Non-coding"}}]{avoid}"""
 
-coding_mcqs_prompt = PromptTemplate(
-    input_variables=["questions"],
-    template="""Convert the following coding questions to JSON MCQs:
+CODING_MCQS_TEMPLATE = """Convert the following coding questions to JSON MCQs:
 {questions}
 
 Requirements:
@@ -87,16 +64,13 @@ Requirements:
 - Each question must have 4 equally difficult and plausible options: A, B, C, D
 - Only 1 option correct, indicate with "answer"
 - Options format: ["A. Option text", "B. Option text", "C. Option text", "D. Option text"]
-- Preserve the 'code' and 'language' fields from original questions
+- Preserve the 'code', 'language' and 'topic' fields from original questions
 - Return JSON only, no markdown code blocks, no explanations
-- Structure: [{{"question": "...", "code": "...", "language": "...", "options": ["A...","B...","C...","D..."], "answer":"A", "difficulty":"Easy", "category":"Coding"}}]
+- Structure: [{{"question": "...", "code": "...", "language": "...", "topic": "...", "options": ["A...","B...","C...","D..."], "answer":"A", "difficulty":"Easy", "category":"Coding"}}]
 
-IMPORTANT: Output must be valid JSON only, no ```json or any other text:""",
-)
+IMPORTANT: Output must be valid JSON only, no ```json or any other text:"""
 
-non_coding_mcqs_prompt = PromptTemplate(
-    input_variables=["questions"],
-    template="""Convert the following non-coding questions to JSON MCQs:
+NON_CODING_MCQS_TEMPLATE = """Convert the following non-coding questions to JSON MCQs:
 {questions}
 
 Requirements:
@@ -104,24 +78,54 @@ Requirements:
 - Each question must have 4 equally difficult and plausible options: A, B, C, D
 - Only 1 option correct, indicate with "answer"
 - Options format: ["A. Option text", "B. Option text", "C. Option text", "D. Option text"]
+- Preserve the 'topic' field from original questions
 - Return JSON only, no markdown code blocks, no explanations
-- Structure: [{{"question": "...", "options": ["A...","B...","C...","D..."], "answer":"A", "difficulty":"Easy", "category":"Non-coding"}}]
-""",
-)
+- Structure: [{{"question": "...", "topic": "...", "options": ["A...","B...","C...","D..."], "answer":"A", "difficulty":"Easy", "category":"Non-coding"}}]
+"""
 
-# -----------------------------
-# LLM Chains
-# -----------------------------
-topics_chain = LLMChain(llm=llm, prompt=topics_prompt)
-languages_chain = LLMChain(llm=llm, prompt=languages_prompt)
-coding_questions_chain = LLMChain(
-    llm=llm, prompt=coding_questions_prompt, output_parser=json_parser
-)
-non_coding_questions_chain = LLMChain(
-    llm=llm, prompt=non_coding_questions_prompt, output_parser=json_parser
-)
-coding_mcqs_chain = LLMChain(llm=llm, prompt=coding_mcqs_prompt)
-non_coding_mcqs_chain = LLMChain(llm=llm, prompt=non_coding_mcqs_prompt)
+_chains = None
+
+
+def _get_chains():
+    """Build the LLM and chains on first use and reuse them afterwards."""
+    global _chains
+    if _chains is None:
+        from langchain_groq import ChatGroq
+        from core.langchain_cache import PersistentLLMCache
+        from langchain_core.prompts import PromptTemplate
+        from langchain_classic.chains import LLMChain
+        from langchain_core.output_parsers import JsonOutputParser
+
+        llm = ChatGroq(
+            model="llama-3.3-70b-versatile",
+            temperature=0.2,
+            groq_api_key=GROQ_API_KEY,
+            cache=PersistentLLMCache(),
+        )
+        json_parser = JsonOutputParser()
+
+        def chain(template, input_variables, output_parser=None):
+            prompt = PromptTemplate(input_variables=input_variables, template=template)
+            if output_parser is None:
+                return LLMChain(llm=llm, prompt=prompt)
+            return LLMChain(llm=llm, prompt=prompt, output_parser=output_parser)
+
+        _chains = {
+            "topics_languages": chain(
+                TOPICS_LANGUAGES_TEMPLATE, ["user_input"], json_parser
+            ),
+            "coding_questions": chain(
+                CODING_QUESTIONS_TEMPLATE,
+                ["topics", "lang", "count", "avoid"],
+                json_parser,
+            ),
+            "non_coding_questions": chain(
+                NON_CODING_QUESTIONS_TEMPLATE, ["topics", "avoid"], json_parser
+            ),
+            "coding_mcqs": chain(CODING_MCQS_TEMPLATE, ["questions"]),
+            "non_coding_mcqs": chain(NON_CODING_MCQS_TEMPLATE, ["questions"]),
+        }
+    return _chains
 
 
 def extract_json_from_response(text):
@@ -190,81 +194,196 @@ def validate_question_structure(questions):
     return valid_questions
 
 
-def generate_questions(skill_reflection: str, thesis_findings: str, career_goals: str):
+async def _run_chain(name: str, inputs: dict):
+    """Run one chain asynchronously and return its (parsed) output."""
+    return (await _get_chains()[name].ainvoke(inputs))["text"]
+
+
+async def _run_stages(stages: dict, timings: dict) -> dict:
+    """
+    Run a dependency graph of async stages.
+    stages: {name: (dependency names, async fn(**dependency outputs))}.
+    Each stage starts as soon as its dependencies finish, so independent
+    branches run concurrently. Stage durations (seconds, excluding time spent
+    waiting on dependencies) are recorded in timings.
+    """
+    tasks = {}
+
+    async def run(name):
+        dependencies, fn = stages[name]
+        inputs = {dep: await tasks[dep] for dep in dependencies}
+        start = time.perf_counter()
+        try:
+            return await fn(**inputs)
+        finally:
+            timings[name] = round(time.perf_counter() - start, 3)
+
+    for name in stages:
+        tasks[name] = asyncio.ensure_future(run(name))
+    outputs = await asyncio.gather(*tasks.values())
+    return dict(zip(tasks, outputs))
+
+
+def _as_mcqs(raw):
+    mcqs = extract_json_from_response(raw)
+    if not isinstance(mcqs, list):
+        print(f"[ERROR] MCQs are not a list. Type: {type(mcqs)}")
+        return []
+    return validate_question_structure(mcqs)
+
+
+def avoid_instruction(questions: Optional[List[str]]) -> str:
+    """Prompt suffix asking for questions different from the given ones."""
+    if not questions:
+        return ""
+    listed = "\n".join(f"  - {q}" for q in questions)
+    return f"\n- Do not repeat or paraphrase these existing questions:\n{listed}"
+
+
+async def agenerate_questions(
+    skill_reflection: str,
+    thesis_findings: str,
+    career_goals: str,
+    avoid: Optional[List[str]] = None,
+    on_batch: Optional[Callable[[List[Dict]], None]] = None,
+):
+    """
+    Question pipeline as a graph: one structured topics+languages call, then
+    the coding branch (questions -> MCQs) and the non-coding branch
+    (questions -> MCQs) run concurrently. avoid: existing question texts the
+    new questions must differ from. on_batch: called (on the event loop) with
+    each branch's validated MCQs as soon as they are ready.
+    """
     user_input = f"Skill Reflection: {skill_reflection}\nThesis Findings: {thesis_findings}\nCareer Goals: {career_goals}"
+    avoid_text = avoid_instruction(avoid)
+
+    def emit(mcqs):
+        if mcqs and on_batch is not None:
+            on_batch(mcqs)
+        return mcqs
 
-    # extract topics
-    topics = topics_chain.run({"user_input": user_input}).strip()
-    print("\n[DEBUG] Extracted topics:", topics)
-
-    # extract programming languages with filtering
-    all_languages_text = languages_chain.run({"topics": topics}).strip()
-    language_list = []
-    if all_languages_text != "none":
-        language_list = [lang.strip() for lang in all_languages_text.split(",")]
-    print("[DEBUG] Filtered languages list:", language_list)
-
-    # generate coding questions
-    coding_questions = []
-    total_coding_questions = 5
-    if language_list:
+    async def extract():
+        try:
+            parsed = await _run_chain("topics_languages", {"user_input": user_input})
+        except Exception as e:
+            # nothing to generate from: the branches below skip, and the error
+            # goes out in the result metadata
+            print("[ERROR] Failed topic extraction:", e)
+            return {
+                "topics": "",
+                "topic_list": [],
+                "languages": [],
+                "error": f"Topic extraction failed: {e}",
+            }
+        if not isinstance(parsed, dict):
+            parsed = {}
+        topics = ", ".join(str(t).strip() for t in parsed.get("topics") or [])
+        languages = [
+            str(lang).strip()
+            for lang in parsed.get("languages") or []
+            if str(lang).strip() and str(lang).strip().lower() != "none"
+        ]
+        print("\n[DEBUG] Extracted topics:", topics)
+        print("[DEBUG] Filtered languages list:", languages)
+        topic_list = [t.strip() for t in topics.split(",") if t.strip()]
+        return {"topics": topics, "topic_list": topic_list, "languages": languages}
+
+    async def coding_questions(extract):
+        if not extract["languages"]:
+            return []
         # merge all languages into one string for prompt
-        langs_str = ", ".join(language_list)
+        langs_str = ", ".join(extract["languages"])
+        total_coding_questions = 5
         try:
-            coding_json = coding_questions_chain.run(
-                {"topics": topics, "lang": langs_str, "count": total_coding_questions}
+            coding_json = await _run_chain(
+                "coding_questions",
+                {
+                    "topics": extract["topics"],
+                    "lang": langs_str,
+                    "count": total_coding_questions,
+                    "avoid": avoid_text,
+                },
             )
-            if isinstance(coding_json, list):
-                coding_questions.extend(coding_json)
-                print(
-                    f"[SUCCESS] Generated {len(coding_json)} coding questions for {langs_str}"
-                )
         except Exception as e:
             print(f"[ERROR] Failed coding questions for {langs_str}:", e)
-
-    # generate non-coding questions
-    try:
-        non_coding_questions = non_coding_questions_chain.run({"topics": topics})
-        if not isinstance(non_coding_questions, list):
-            non_coding_questions = []
-    except Exception as e:
-        print("[ERROR] Failed non-coding questions:", e)
-        non_coding_questions = []
-
-    # convert coding questions to MCQs
-    coding_mcqs = []
-    if coding_questions:
+            return []
+        if not isinstance(coding_json, list):
+            return []
+        print(
+            f"[SUCCESS] Generated {len(coding_json)} coding questions for {langs_str}"
+        )
+        return coding_json
+
+    async def non_coding_questions(extract):
+        if extract.get("error"):
+            return []
         try:
-            coding_mcqs_raw = coding_mcqs_chain.run({"questions": coding_questions})
-            coding_mcqs = extract_json_from_response(coding_mcqs_raw)
-
-            if not isinstance(coding_mcqs, list):
-                print(f"[ERROR] Coding MCQs are not a list. Type: {type(coding_mcqs)}")
-                coding_mcqs = []
-            else:
-                coding_mcqs = validate_question_structure(coding_mcqs)
+            questions = await _run_chain(
+                "non_coding_questions",
+                {"topics": extract["topics"], "avoid": avoid_text},
+            )
+        except Exception as e:
+            print("[ERROR] Failed non-coding questions:", e)
+            return []
+        return questions if isinstance(questions, list) else []
 
+    async def coding_mcqs(coding_questions):
+        if not coding_questions:
+            return []
+        try:
+            raw = await _run_chain("coding_mcqs", {"questions": coding_questions})
         except Exception as e:
             print("[ERROR] Failed coding MCQs:", e)
+            return []
+        return emit(_as_mcqs(raw))
 
-    # convert non-coding questions to MCQs
-    non_coding_mcqs = []
-    if non_coding_questions:
+    async def non_coding_mcqs(non_coding_questions):
+        if not non_coding_questions:
+            return []
         try:
-            non_coding_mcqs_raw = non_coding_mcqs_chain.run(
-                {"questions": non_coding_questions}
+            raw = await _run_chain(
+                "non_coding_mcqs", {"questions": non_coding_questions}
             )
-            non_coding_mcqs = extract_json_from_response(non_coding_mcqs_raw)
-
-            if not isinstance(non_coding_mcqs, list):
-                non_coding_mcqs = []
-            else:
-                non_coding_mcqs = validate_question_structure(non_coding_mcqs)
-
         except Exception as e:
             print("[ERROR] Failed non-coding MCQs:", e)
-
-    all_questions = coding_mcqs + non_coding_mcqs
+            return []
+        return emit(_as_mcqs(raw))
+
+    timings = {}
+    start = time.perf_counter()
+    outputs = await _run_stages(
+        {
+            "extract": ((), extract),
+            "coding_questions": (("extract",), coding_questions),
+            "non_coding_questions": (("extract",), non_coding_questions),
+            "coding_mcqs": (("coding_questions",), coding_mcqs),
+            "non_coding_mcqs": (("non_coding_questions",), non_coding_mcqs),
+        },
+        timings,
+    )
+    timings["total"] = round(time.perf_counter() - start, 3)
+
+    all_questions = outputs["coding_mcqs"] + outputs["non_coding_mcqs"]
     print("[DEBUG] Total questions generated:", len(all_questions))
-
-    return {"questions": all_questions}
+    print("[DEBUG] Question stage timings (s):", timings)
+
+    metadata = {
+        "timings": timings,
+        "topics": outputs["extract"]["topic_list"],
+        "languages": outputs["extract"]["languages"],
+    }
+    if outputs["extract"].get("error"):
+        metadata["error"] = outputs["extract"]["error"]
+    return {"questions": all_questions, "metadata": metadata}
+
+
+def generate_questions(
+    skill_reflection: str,
+    thesis_findings: str,
+    career_goals: str,
+    avoid: Optional[List[str]] = None,
+):
+    """Synchronous entry point for threadpool (def) routes."""
+    return asyncio.run(
+        agenerate_questions(skill_reflection, thesis_findings, career_goals, avoid)
+    )
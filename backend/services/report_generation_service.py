@@ -1,31 +1,40 @@
 from models.firestore_models import (
     get_profile_text_by_user,
     get_job_by_index,
-    get_job_charts,
     get_recommendation_id_by_user_test_id,
 )
+from services.charts_generation_service import ensure_job_charts, with_chart_urls
 
 
-def get_report_data(user_test_id: str, job_index: str):
-    """Combine profile_text, job details, and saved charts into a single report."""
-    profile_text = get_profile_text_by_user(user_test_id)
-    job_data = get_job_by_index(job_index)
+def get_report_data(user_test_id: str, job_index: str, render_png: bool = True):
+    """
+    Combine profile_text, job details, and saved charts into a single report.
+    chart_data carries the chart series for clients that draw charts
+    themselves; with render_png=False missing PNG charts are not rendered.
+    """
+    # Get recommendation ID to locate this user's profile, job and charts
+    rec_id = get_recommendation_id_by_user_test_id(user_test_id)
+    profile_text = get_profile_text_by_user(user_test_id, rec_id=rec_id)
+    job_data = get_job_by_index(job_index, user_test_id, rec_id=rec_id)
 
     if not job_data:
         return {"error": f"Job with index {job_index} not found"}
 
-    # Get recommendation ID to locate the charts
-    rec_id = get_recommendation_id_by_user_test_id(user_test_id)
-
-    # Get the pre-saved charts from database
-    charts_data = get_job_charts(rec_id, job_index)
+    # charts live on the job match document; images stream from /charts
+    if render_png:
+        charts_data = ensure_job_charts(rec_id, job_data)
+    else:
+        charts_data = with_chart_urls(job_data.get("charts"))
+    chart_data = job_data.pop("chart_data", None)
+    job_data.pop("charts", None)
 
     report = {
         "user_test_id": user_test_id,
         "recommendation_id": rec_id,
         "profile_text": profile_text,
         "job": job_data,
-        "charts": charts_data or {},
+        "charts": charts_data,
+        "chart_data": chart_data,
     }
 
     return report
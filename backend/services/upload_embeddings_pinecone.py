@@ -1,13 +1,17 @@
 import os
-import glob
-import pickle
+import sys
 import pandas as pd
-import hashlib
 from tqdm import tqdm
 from dotenv import load_dotenv
 from pinecone import Pinecone
-from transformers import AutoTokenizer, AutoModel
-import torch
+
+# allow running as a script from backend/services
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import core.model_loader as loader
+from core import job_store
+from core.embedding_cache import EmbeddingCache
+from core.job_enrichment import current_record, enrichment_metadata, load_enrichment
+from core.job_ingest import load_job_corpus
 
 # =====================================
 # Load API Key from .env
@@ -24,48 +28,29 @@ INDEX_NAME = "code-map"  # Pinecone index name
 FOLDER_PATH = "../data"  # Folder containing CSVs
 COLUMN_NAME = "Full Job Description"  # Column to embed
 BATCH_SIZE = 100  # Number of vectors per upload batch
-EMBEDDINGS_FILE = os.path.join(FOLDER_PATH, "job_embeddings.pkl")
+EMBED_BATCH_SIZE = loader.EMBEDDING_BATCH_SIZE  # Number of texts per forward pass
 NAMESPACE = "jobs"  # pinecone namespace for jobs
 
 # =====================================
 # Initialize Hugging Face Model
 # =====================================
 print("Loading Hugging Face model...")
-hf_model_name = "sentence-transformers/all-MiniLM-L6-v2"
-tokenizer = AutoTokenizer.from_pretrained(hf_model_name)
-model = AutoModel.from_pretrained(hf_model_name)
+loader.load_embedding_model()
 print("✓ Model loaded successfully\n")
 
 
-def get_embeddings(text: str):
-    """Return embedding as a list of floats."""
-    inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-    with torch.no_grad():
-        outputs = model(**inputs)
-    emb = outputs.last_hidden_state.mean(dim=1)
-    return emb.squeeze(0).cpu().numpy().tolist()
-
-
 # =====================================
 # Load All Job CSVs
 # =====================================
-csv_files = glob.glob(f"{FOLDER_PATH}/*.csv")
-dfs = []
-
-for file in csv_files:
-    try:
-        df_temp = pd.read_csv(file)
-        if not df_temp.empty:
-            dfs.append(df_temp)
-            print(f"✓ Loaded {len(df_temp)} records from {file}")
-    except Exception as e:
-        print(f"Skipping {file} due to error: {e}")
+# duplicate postings are collapsed so only canonical jobs are embedded
+df = load_job_corpus(FOLDER_PATH)
 
-if not dfs:
+if df.empty:
     raise ValueError("No CSV files found or all were empty.")
 
-df = pd.concat(dfs, ignore_index=True)
-print(f"\nTotal combined job records: {len(df)}")
+print(f"\nTotal canonical job records: {len(df)}")
+aliases = df.pop("Aliases").tolist()
+store_titles = df["Title"].astype(str).tolist()
 
 # =====================================
 # Data Cleaning
@@ -85,20 +70,33 @@ print(f"✓ Connected to Pinecone index: {INDEX_NAME}\n")
 # =====================================
 # Generate and Upload Embeddings
 # =====================================
-job_descriptions = df[COLUMN_NAME].astype(str)
-embeddings = []
+job_descriptions = df[COLUMN_NAME].astype(str).tolist()
+
+print("Generating embeddings...\n")
+# only descriptions missing from the content-addressed cache are embedded
+cache = EmbeddingCache(FOLDER_PATH, loader.HF_MODEL_NAME)
+content_keys = [cache.key(text) for text in job_descriptions]
+embeddings = cache.embed(
+    job_descriptions,
+    lambda texts: loader.get_embeddings_batch(texts, batch_size=EMBED_BATCH_SIZE),
+)
+cache.retain(content_keys)
+cache.save()
+print(f"✓ {cache.stats()}\n")
+
+# precomputed summaries/skills from services/enrich_jobs.py
+enrichment = load_enrichment(FOLDER_PATH)
+
+print("Uploading embeddings...\n")
 batch = []
 
-print("Generating and uploading embeddings...\n")
-
-for i, job_desc in enumerate(tqdm(job_descriptions, desc="Processing jobs")):
+for i, (job_desc, emb) in enumerate(
+    tqdm(zip(job_descriptions, embeddings), total=len(embeddings), desc="Uploading")
+):
     try:
-        emb = get_embeddings(job_desc)
-        embeddings.append(emb)
-
-        # stable vector ID: hash of title
+        # stable vector ID: hash of title and description
         title = df.iloc[i].get("Title", "")
-        vector_id = hashlib.md5(f"{title}".encode()).hexdigest()
+        vector_id = df.iloc[i]["Job ID"]
 
         metadata = {
             "title": title,
@@ -109,8 +107,12 @@ for i, job_desc in enumerate(tqdm(job_descriptions, desc="Processing jobs")):
 
         # force clean metadata
         metadata = {k: ("" if pd.isna(v) else str(v)) for k, v in metadata.items()}
+        metadata["aliases"] = [str(a) for a in aliases[i]]
+        metadata.update(
+            enrichment_metadata(current_record(enrichment, vector_id, job_desc))
+        )
 
-        batch.append({"id": vector_id, "values": emb, "metadata": metadata})
+        batch.append({"id": vector_id, "values": emb.tolist(), "metadata": metadata})
 
         # upload in batches
         if len(batch) >= BATCH_SIZE:
@@ -125,6 +127,12 @@ for i, job_desc in enumerate(tqdm(job_descriptions, desc="Processing jobs")):
 if batch:
     index.upsert(vectors=batch, namespace=NAMESPACE)
 
-# save embeddings locally as backup
-with open(EMBEDDINGS_FILE, "wb") as f:
-    pickle.dump(embeddings, f)
+# save embeddings locally as backup (same store the API memory-maps at startup)
+job_store.save_job_store(
+    FOLDER_PATH,
+    embeddings,
+    store_titles,
+    df["Job ID"].tolist(),
+    loader.HF_MODEL_NAME,
+    content_keys=content_keys,
+)
@@ -1,4 +1,5 @@
 import 'package:cloud_firestore/cloud_firestore.dart';
+import 'package:code_map/services/api_service.dart';
 import 'package:flutter/material.dart';
 import 'dart:convert';
 
@@ -969,7 +970,6 @@ class _ReportListScreenState extends State<ReportListScreen> {
         const SizedBox(height: 8),
         ...charts.entries.map((entry) {
           final chartName = entry.key;
-          final base64Data = entry.value.toString();
 
           return Container(
             margin: const EdgeInsets.only(bottom: 8),
@@ -981,7 +981,7 @@ class _ReportListScreenState extends State<ReportListScreen> {
                   style: const TextStyle(fontSize: 12, color: Colors.grey),
                 ),
                 const SizedBox(height: 4),
-                _buildChartImage(base64Data),
+                _buildChartImage(entry.value),
               ],
             ),
           );
@@ -990,20 +990,27 @@ class _ReportListScreenState extends State<ReportListScreen> {
     );
   }
 
-  Widget _buildChartImage(String base64Data) {
+  Widget _buildChartImage(dynamic chart) {
     try {
-      final bytes = base64.decode(base64Data);
+      final url = ApiService.chartUrl(chart);
       return Container(
         decoration: BoxDecoration(
           border: Border.all(color: Colors.grey.shade300),
           borderRadius: BorderRadius.circular(4),
         ),
-        child: Image.memory(
-          bytes,
-          height: 150,
-          width: double.infinity,
-          fit: BoxFit.contain,
-        ),
+        child: url != null
+            ? Image.network(
+                url,
+                height: 150,
+                width: double.infinity,
+                fit: BoxFit.contain,
+              )
+            : Image.memory(
+                base64.decode(chart.toString()),
+                height: 150,
+                width: double.infinity,
+                fit: BoxFit.contain,
+              ),
       );
     } catch (e) {
       return Container(
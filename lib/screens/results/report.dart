@@ -101,6 +101,18 @@ class _ReportResultScreenState extends State<ReportResultScreen> {
   }
 
   // method to display gap analysis table (similar to Gap Analysis Screen)
+  Widget _buildChartImage(dynamic chart) {
+    final url = ApiService.chartUrl(chart);
+    if (url != null) {
+      return Image.network(url, fit: BoxFit.contain, height: 250);
+    }
+    return Image.memory(
+      base64Decode(chart),
+      fit: BoxFit.contain,
+      height: 250,
+    );
+  }
+
   Widget _buildGapAnalysisTable(Map<String, dynamic> data, String title) {
     if (data.isEmpty) {
       print("DEBUG Table: $title data is empty!");
@@ -558,12 +570,8 @@ class _ReportResultScreenState extends State<ReportResultScreen> {
                                         ),
                                       ),
                                       padding: const EdgeInsets.all(12),
-                                      child: Image.memory(
-                                        base64Decode(reportData['charts']
-                                            ['radar_chart']),
-                                        fit: BoxFit.contain,
-                                        height: 250,
-                                      ),
+                                      child: _buildChartImage(
+                                          reportData['charts']['radar_chart']),
                                     ),
                                   ),
                                   const SizedBox(height: 30),
@@ -592,12 +600,8 @@ class _ReportResultScreenState extends State<ReportResultScreen> {
                                         ),
                                       ),
                                       padding: const EdgeInsets.all(12),
-                                      child: Image.memory(
-                                        base64Decode(reportData['charts']
-                                            ['result_chart']),
-                                        fit: BoxFit.contain,
-                                        height: 250,
-                                      ),
+                                      child: _buildChartImage(
+                                          reportData['charts']['result_chart']),
                                     ),
                                   ),
                                   const SizedBox(height: 30),
@@ -1,6 +1,7 @@
 // calls APIs, sends HTTP requests, and receives responses.
 
 import 'dart:convert';
+import 'dart:math';
 import 'package:flutter_dotenv/flutter_dotenv.dart';
 import 'package:http/http.dart' as http;
 import '../models/follow_up_responses.dart';
@@ -33,6 +34,67 @@ class ApiService {
   static final String baseUrl =
       dotenv.env['BASE_URL'] ?? "http://localhost:8000";
 
+  // 31-bit draws stay within the int range on web (dart2js) as well
+  static final Random _keyRandom = Random.secure();
+
+  // long pipeline endpoints run as background jobs on the server: submit
+  // with "Prefer: respond-async", then poll /jobs/<id> until it finishes.
+  // Retries only repeat the cheap submit/poll calls, never the pipeline:
+  // the Idempotency-Key makes a repeated submit return the same job.
+  // Returns the job result as if the endpoint had answered directly.
+  static Future<http.Response> _runJob(
+    Uri url, {
+    Object? body,
+    Duration pollInterval = const Duration(seconds: 2),
+    Duration timeout = const Duration(minutes: 10),
+  }) async {
+    final idempotencyKey = [
+      DateTime.now().microsecondsSinceEpoch,
+      _keyRandom.nextInt(1 << 31),
+      _keyRandom.nextInt(1 << 31),
+    ].map((part) => part.toRadixString(16)).join("-");
+    final submitted = await _requestWithRetry(() => http.post(
+          url,
+          headers: {
+            "Content-Type": "application/json",
+            "Prefer": "respond-async",
+            "Idempotency-Key": idempotencyKey,
+          },
+          body: body,
+        ));
+    if (submitted.statusCode != 202) return submitted;
+
+    final jobUrl =
+        Uri.parse("$baseUrl${jsonDecode(submitted.body)['status_url']}");
+    final deadline = DateTime.now().add(timeout);
+    while (DateTime.now().isBefore(deadline)) {
+      await Future.delayed(pollInterval);
+      final polled = await _requestWithRetry(() => http.get(jobUrl));
+      if (polled.statusCode != 200) return polled;
+
+      final job = jsonDecode(polled.body);
+      if (job['status'] == 'succeeded') {
+        return http.Response.bytes(utf8.encode(jsonEncode(job['result'])), 200,
+            headers: {"content-type": "application/json; charset=utf-8"});
+      }
+      if (job['status'] == 'failed') {
+        return http.Response.bytes(
+            utf8.encode(jsonEncode({"error": job['error']})), 500,
+            headers: {"content-type": "application/json; charset=utf-8"});
+      }
+    }
+    throw Exception("Job timed out: $jobUrl");
+  }
+
+  // charts are stored as refs ({sha256, width, height, ...}) and streamed
+  // from /charts/<sha256>; returns null for charts saved inline as base64
+  static String? chartUrl(dynamic chart) {
+    if (chart is Map && chart['sha256'] != null) {
+      return "$baseUrl/charts/${chart['sha256']}";
+    }
+    return null;
+  }
+
   // submit the initial test and return the generated userTestId (String)
   static Future<String> submitTest(UserResponses responses) async {
     final url = Uri.parse("$baseUrl/submit-test");
@@ -170,11 +232,7 @@ class ApiService {
     print("[DEBUG] Request body: $body");
 
     try {
-      final response = await http.post(
-        url,
-        headers: {"Content-Type": "application/json"},
-        body: jsonEncode(body),
-      );
+      final response = await _runJob(url, body: jsonEncode(body));
 
       if (response.statusCode == 200) {
         final decoded = jsonDecode(response.body);
@@ -321,11 +379,8 @@ class ApiService {
   }) async {
     final url = Uri.parse("$baseUrl/generate-charts/$userTestId");
 
-    final response = await _requestWithRetry(() => http.post(
-          url,
-          headers: {"Content-Type": "application/json"},
-          body: jsonEncode({'attempt_number': attemptNumber}),
-        ));
+    final response =
+        await _runJob(url, body: jsonEncode({'attempt_number': attemptNumber}));
 
     if (response.statusCode == 200) {
       final decoded = jsonDecode(response.body);
@@ -412,7 +467,7 @@ class ApiService {
       String userTestId) async {
     final url = Uri.parse("$baseUrl/career-roadmap-generation/all/$userTestId");
 
-    final response = await http.post(url);
+    final response = await _runJob(url);
 
     if (response.statusCode == 200) {
       return json.decode(response.body);